@@ -2,6 +2,7 @@ from flask import Flask, jsonify, send_from_directory, request, Response
 import time
 import threading
 from .state import state # Import shared state
+from .broadcaster import DEFAULT_STREAM_FPS, DEFAULT_STREAM_QUALITY
 
 # ... (rest of imports)
 
@@ -11,8 +12,8 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
 import os
 import subprocess
-from backend.extensions import db, jwt
-from backend.models import User, Zone, Alert, AnalyticsData
+from backend.extensions import db, jwt, enable_sqlite_wal
+from backend.models import User, Zone, Alert, AnalyticsData, ZoneSample
 
 from backend.system_manager import start_unified_detection
 
@@ -61,27 +62,47 @@ def create_app():
     # MJPEG Streaming Route
     @app.route('/video_feed/<id>')
     def video_feed(id):
-        # IN-MEMORY STREAMING
+        # IN-MEMORY STREAMING: this viewer's mailbox on the camera's broadcaster
+        # Optional ?fps=<max frames per second>&quality=<JPEG quality 1-100>
+        max_fps = request.args.get('fps', type=float) or DEFAULT_STREAM_FPS
+        quality = request.args.get('quality', type=int) or DEFAULT_STREAM_QUALITY
+        quality = max(1, min(100, quality))
+        client = state.subscribe_stream(id, max_fps, quality)
+
         def gen():
-            while True:
-                try:
-                    # Blocking wait for new frame (efficient)
-                    frame = state.wait_for_frame(id, timeout=1.0)
-                    if frame:
-                        yield (b'--frame\r\n'
-                               b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
-                    else:
-                        # Timeout or no frame yet
-                         time.sleep(0.1)
-                except Exception as e:
-                    print(f"Stream Error: {e}")
-                    time.sleep(1)
+            try:
+                while True:
+                    # Waits on this client's own mailbox; if we are slower than the
+                    # camera, older frames were already dropped for us
+                    frame = client.next(timeout=1.0)
+                    if frame is not None:
+                        # Same bytes object for every viewer: encoded once, no copies
+                        yield b'--frame\r\nContent-Type: image/jpeg\r\n\r\n'
+                        yield frame
+                        yield b'\r\n'
+            finally:
+                # Viewer disconnected (generator closed)
+                state.unsubscribe_stream(id, client)
 
         return Response(gen(), mimetype='multipart/x-mixed-replace; boundary=frame')
 
     # Create Tables
     with app.app_context():
+        enable_sqlite_wal(db.engine)
         db.create_all()
+        # create_all skips columns added to existing tables...
+        columns = {c['name'] for c in db.inspect(db.engine).get_columns(ZoneSample.__tablename__)}
+        if 'dwell_hist' not in columns:
+            with db.engine.begin() as conn:
+                conn.execute(db.text(f"ALTER TABLE {ZoneSample.__tablename__} ADD COLUMN dwell_hist TEXT"))
+        # ... and indexes of tables that already existed
+        for model in (AnalyticsData, ZoneSample):
+            for index in model.__table__.indexes:
+                index.create(db.engine, checkfirst=True)
+        # Superseded by the covering indexes above
+        with db.engine.begin() as conn:
+            conn.execute(db.text("DROP INDEX IF EXISTS ix_analytics_zone_time"))
+            conn.execute(db.text("DROP INDEX IF EXISTS ix_zone_sample_zone_time"))
 
     return app
 
@@ -0,0 +1,129 @@
+import threading
+import time
+
+# Defaults for /video_feed clients that do not ask for anything specific
+DEFAULT_STREAM_QUALITY = 70   # JPEG quality (what the detection loop always encoded)
+DEFAULT_STREAM_FPS = None     # None = every frame the detection loop produces
+
+
+def rate_limit(next_due, now, max_fps):
+    """
+    (due, new next_due) for a max_fps cap. The deadline advances by the
+    interval (not from `now`), so max_fps is met on average even when it is
+    not a divisor of the source's frame rate.
+    """
+    if now < next_due:
+        return False, next_due
+    interval = 1.0 / max_fps
+    base = next_due if next_due > now - interval else now
+    return True, base + interval
+
+
+class StreamClient:
+    """
+    One /video_feed viewer: a single-slot mailbox.
+
+    The broadcaster never waits for a client. A new frame replaces one the
+    client has not picked up yet (counted as dropped), so a slow viewer gets
+    fewer, current frames instead of a growing backlog.
+    """
+
+    def __init__(self, max_fps=None, quality=DEFAULT_STREAM_QUALITY):
+        self.max_fps = max_fps
+        self.quality = quality
+        self.cond = threading.Condition()
+        self.frame = None
+        self.closed = False
+        self.next_due = 0.0     # Earliest time the next frame is accepted (max_fps)
+
+        # Metrics
+        self.started = time.time()
+        self.delivered = 0
+        self.dropped = 0        # Replaced in the mailbox before being sent
+        self.rate_skipped = 0   # Not offered because of max_fps
+
+    def offer(self, frame, now=None):
+        """Called by the broadcaster; never blocks on the client"""
+        now = now or time.time()
+        if self.max_fps:
+            due, self.next_due = rate_limit(self.next_due, now, self.max_fps)
+            if not due:
+                self.rate_skipped += 1
+                return
+        with self.cond:
+            if self.frame is not None:
+                self.dropped += 1
+            self.frame = frame
+            self.cond.notify()
+
+    def next(self, timeout=1.0):
+        """Wait for the next frame; None on timeout or when closed"""
+        with self.cond:
+            if self.frame is None and not self.closed:
+                self.cond.wait(timeout)
+            frame, self.frame = self.frame, None
+        if frame is not None:
+            self.delivered += 1
+        return frame
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify()
+
+    def stats(self):
+        elapsed = max(time.time() - self.started, 1e-6)
+        return {
+            "fps": round(self.delivered / elapsed, 1),
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "rate_skipped": self.rate_skipped,
+            "max_fps": self.max_fps,
+            "quality": self.quality
+        }
+
+
+class FrameBroadcaster:
+    """
+    Fans each encoded frame of one camera out to all its viewers.
+
+    The detection loop encodes a frame once per requested JPEG quality and
+    publishes it; every StreamClient asking for that quality gets the same
+    bytes object. Viewers block on their own mailbox, not on a shared lock.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clients = []
+
+    def subscribe(self, max_fps=DEFAULT_STREAM_FPS, quality=DEFAULT_STREAM_QUALITY):
+        client = StreamClient(max_fps, quality)
+        with self.lock:
+            self.clients = self.clients + [client]  # Copy-on-write: publish iterates lock-free
+        return client
+
+    def unsubscribe(self, client):
+        client.close()
+        with self.lock:
+            self.clients = [c for c in self.clients if c is not client]
+
+    def demand(self):
+        """{quality: max fps wanted (None = unlimited)} over current viewers"""
+        wanted = {}
+        for c in self.clients:
+            if c.quality not in wanted:
+                wanted[c.quality] = c.max_fps
+            elif wanted[c.quality] is None or c.max_fps is None:
+                wanted[c.quality] = None
+            else:
+                wanted[c.quality] = max(wanted[c.quality], c.max_fps)
+        return wanted
+
+    def publish(self, frame, quality=DEFAULT_STREAM_QUALITY):
+        now = time.time()
+        for c in self.clients:
+            if c.quality == quality:
+                c.offer(frame, now)
+
+    def stats(self):
+        return [c.stats() for c in self.clients]
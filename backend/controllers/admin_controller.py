@@ -3,6 +3,7 @@ from flask_jwt_extended import create_access_token
 from backend.models import User, Zone, Alert
 from backend.extensions import db
 from backend.state import state # Shared State
+from backend.live_view import live_view
 from werkzeug.security import check_password_hash
 import subprocess
 import sys
@@ -134,6 +135,8 @@ class AdminController:
             
         formatted_zones = {}
         for z in zones_data:
+            if 'line' in z:
+                continue # Tripwire: not editable here, kept on save
             zid = str(z.get('id', 'unknown'))
             formatted_zones[zid] = {
                 "name": z.get('id'), # logic uses ID as name often
@@ -155,6 +158,8 @@ class AdminController:
              # 1. Save to File
              json_zones = []
              for z_data in new_zones:
+                 if not z_data.get('coords'):
+                     return jsonify({"message": f"Zone '{z_data.get('name') or z_data.get('id')}' has no coordinates"}), 400
                  json_zones.append({
                      "id": z_data.get('name') or z_data.get('id'),
                      "coords": z_data.get('coords', []),
@@ -163,9 +168,16 @@ class AdminController:
              
              filepath = f"zones/zones_source_{source}.json"
              os.makedirs("zones", exist_ok=True)
+             # Tripwires share the file but are not edited here: keep them
+             tripwires = []
+             if os.path.exists(filepath):
+                 try:
+                     with open(filepath, 'r') as f:
+                         tripwires = [z for z in json.load(f) if 'line' in z]
+                 except: pass
              try:
                  with open(filepath, "w") as f:
-                     json.dump(json_zones, f, indent=4)
+                     json.dump(json_zones + tripwires, f, indent=4)
              except Exception as e:
                  return jsonify({"message": f"Failed to save file: {e}"}), 500
 
@@ -185,6 +197,7 @@ class AdminController:
                          db.session.add(zone)
                  
                  db.session.commit()
+                 live_view.invalidate_thresholds() # Dashboard picks up the new thresholds
              except Exception as e:
                  print(f"DB Update Error: {e}")
 
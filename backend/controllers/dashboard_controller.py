@@ -1,7 +1,9 @@
-from flask import jsonify, request
+from flask import jsonify, request, Response, stream_with_context
 from backend.models import Alert
 from backend.extensions import db
 from backend.state import state # Shared State
+from backend.live_feed import LiveFeed
+from backend.live_view import live_view
 
 class DashboardController:
     @staticmethod
@@ -14,115 +16,82 @@ class DashboardController:
         
         return jsonify({"status": "deprecated, use shared state"}), 200
 
+    @staticmethod
+    def _build_live_data():
+        """Shared state + 24h alert count + DB zone thresholds (materialized in live_view)"""
+        return live_view.build()
+
     @staticmethod
     def get_live_data():
         try:
-            from backend.models import Alert, Zone
-            import datetime
-            
-            # GET FROM SHARED STATE
-            live_counts = state.get_data()
-            
-            # 1. Alert Count (Last 24h)
-            cutoff = datetime.datetime.now() - datetime.timedelta(hours=24)
-            alert_count = db.session.query(Alert).filter(Alert.timestamp >= cutoff).count()
-            live_counts['alert_count'] = alert_count
-            
-            # 2. Active Cameras
-            live_counts['active_cameras'] = len(live_counts.get('cameras', {}))
-            
-            # 3. Sync Thresholds from DB (Source of Truth)
-            db_zones = {z.name: z.threshold for z in Zone.query.all()}
-            current_zones = live_counts.get("zones", [])
-            
-            def sync_threshold(z_item):
-                if not isinstance(z_item, dict): return
-                raw_name = z_item.get('name', '')
-                
-                # Robust matching
-                candidates = [raw_name]
-                if ':' in raw_name:
-                    parts = raw_name.split(':')
-                    if len(parts) > 1:
-                        candidates.append(parts[1].strip()) 
-                
-                for c in candidates:
-                    if c in db_zones:
-                        z_item['threshold'] = db_zones[c]
-                        break
-
-            if isinstance(current_zones, list):
-                for z in current_zones: sync_threshold(z)
-            elif isinstance(current_zones, dict):
-                # Logic to convert dict to flat list for dashboard if needed?
-                # Actually dashboard.html handles both? Let's assume yes or sync deeply
-                for cam_id, z_list in current_zones.items():
-                    for z in z_list: sync_threshold(z)
-                    
+            body, etag = live_view.serialized()
         except Exception as e:
             print(f"Live Data Error: {e}")
             return jsonify({}), 500
-            
-        return jsonify(live_counts), 200
+
+        # Pre-serialized; unchanged since the client's last poll -> 304
+        resp = Response(body, mimetype='application/json')
+        resp.set_etag(etag)
+        resp.headers['Cache-Control'] = 'no-cache' # Always revalidate
+        return resp.make_conditional(request)
+
+    @staticmethod
+    def stream_live_data():
+        """
+        Server-Sent Events: pushes the live data whenever the detection loop
+        publishes (state.update), instead of clients polling /get_count.
+        One build + serialization per update, shared by all open streams.
+        """
+        return Response(
+            stream_with_context(live_feed.events(state)),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
 
     @staticmethod
     def get_analytics():
-        try:
-            # Prefer in-memory high-freq history from State
-            history = state.get_history()
-            
-            # Helper to format/downsample to 1-minute
-            labels = []
-            data = []
-            
-            # Group by HH:MM
-            grouped = {}
-            
-            # Combine Memory History + DB History (if needed, but let's stick to memory for 'Live Trend')
-            # Actually, for a 1-minute interval, we might want longer history than just the last 100 seconds (RAM).
-            # But sticking to the requested change:
-            
-            if history:
-                 for item in history:
-                     # item['time'] is 'HH:MM:SS'
-                     t_str = item['time']
-                     hm = t_str[:5] # Extract HH:MM
-                     # Overwrite to get the LATEST count for that minute
-                     grouped[hm] = item['count']
-            
-            for t_label, count in grouped.items():
-                labels.append(t_label)
-                data.append(count)
-                
-            return jsonify({"labels": labels, "data": data}), 200
+        """
+        Occupancy trend over any range, from persisted data (time-series
+        store, DB for older history), decimated server-side to a point budget.
 
-            # Fallback to DB if history is empty (e.g. freshly started)
-            from backend.models import AnalyticsData
+        ?minutes=N (range ending now, default 60) or ?start=&end= (ISO),
+        ?points=N (default 300), ?series=<zone name / _CAMERA_<id>_>
+        """
+        try:
             import datetime
+            from backend.timeseries import GLOBAL_SERIES
+            from backend.trend import trend, TREND_POINTS, TREND_MAX_POINTS
+
             now = datetime.datetime.now()
-            start_time = now - datetime.timedelta(hours=1)
-            data_points = AnalyticsData.query.filter(
-                AnalyticsData.zone_name == '_GLOBAL_OCCUPANCY_',
-                AnalyticsData.timestamp >= start_time
-            ).order_by(AnalyticsData.timestamp).all()
-            
-            # Simple downsample for DB data
-            for dp in data_points:
-                labels.append(dp.timestamp.strftime('%H:%M:%S'))
-                data.append(dp.count)
-            
-            return jsonify({"labels": labels, "data": data}), 200
+            try:
+                end_dt = datetime.datetime.fromisoformat(request.args['end']) if 'end' in request.args else now
+                if 'start' in request.args:
+                    start_dt = datetime.datetime.fromisoformat(request.args['start'])
+                else:
+                    start_dt = end_dt - datetime.timedelta(minutes=max(1, request.args.get('minutes', 60, type=int)))
+            except ValueError:
+                return jsonify({"error": "Invalid start/end, use ISO format"}), 400
+            if start_dt >= end_dt:
+                return jsonify({"error": "start must be before end"}), 400
+
+            points = min(max(3, request.args.get('points', TREND_POINTS, type=int)), TREND_MAX_POINTS)
+            series = request.args.get('series', GLOBAL_SERIES)
+
+            result = trend(series, start_dt, end_dt, points)
+            # Same HH:MM labels as the live chart appends; dates once the range spans days
+            fmt = '%H:%M' if end_dt - start_dt <= datetime.timedelta(days=1) else '%m-%d %H:%M'
+            result["labels"] = [datetime.datetime.fromtimestamp(t).strftime(fmt) for t in result["timestamps"]]
+            return jsonify(result), 200
         except Exception as e:
             print(f"Analytics Error: {e}")
             return jsonify({"labels": [], "data": []}), 500
 
     @staticmethod
     def get_analytics_summary():
-        # ... (analytics logic unchanged, assuming it queries DB)
         try:
-            from backend.models import AnalyticsData
             import datetime
-            from sqlalchemy import func
+            from backend.timeseries import GLOBAL_SERIES
+            from backend.reports import summary, zone_breakdown
             
             # Date Filter
             date_str = request.args.get('date')
@@ -134,45 +103,24 @@ class DashboardController:
             else:
                 target_date = datetime.datetime.now()
 
-            start_dt = target_date.replace(hour=0, minute=0, second=0, microsecond=0)
-            end_dt = start_dt + datetime.timedelta(days=1)
-            
-            # 1. Peak Occupancy (Target Day)
-            peak_val = db.session.query(func.max(AnalyticsData.count)).filter(
-                AnalyticsData.zone_name == '_GLOBAL_OCCUPANCY_',
-                AnalyticsData.timestamp >= start_dt,
-                AnalyticsData.timestamp < end_dt
-            ).scalar() or 0
-            
-            # 2. Avg Occupancy (Target Day)
-            avg_val = db.session.query(func.avg(AnalyticsData.count)).filter(
-                AnalyticsData.zone_name == '_GLOBAL_OCCUPANCY_',
-                AnalyticsData.timestamp >= start_dt,
-                AnalyticsData.timestamp < end_dt
-            ).scalar() or 0
-            
-            # 3. Hourly Trend (Target Day) - Average Occupancy
-            data_points = AnalyticsData.query.filter(
-                AnalyticsData.zone_name == '_GLOBAL_OCCUPANCY_',
-                AnalyticsData.timestamp >= start_dt,
-                AnalyticsData.timestamp < end_dt
-            ).all()
-            
-            hourly_sums = {} # hour -> sum
-            hourly_counts = {} # hour -> count of records
-            
-            for dp in data_points:
-                h = dp.timestamp.strftime("%H")
-                if h not in hourly_sums: 
-                    hourly_sums[h] = 0
-                    hourly_counts[h] = 0
-                hourly_sums[h] += dp.count
-                hourly_counts[h] += 1
-                
-            hourly_data = [0] * 24
-            for h_str, total in hourly_sums.items():
-                avg = total / hourly_counts[h_str]
-                hourly_data[int(h_str)] = round(avg)
+            # Optional: ?days=N (range ending with `date`), ?series=<zone name / _CAMERA_<id>_>,
+            # ?zones=1 (per-zone breakdown of the range)
+            days = max(1, request.args.get('days', 1, type=int))
+            series = request.args.get('series', GLOBAL_SERIES)
+            with_zones = request.args.get('zones', '0') in ('1', 'true')
+
+            end_dt = target_date.replace(hour=0, minute=0, second=0, microsecond=0) + datetime.timedelta(days=1)
+            start_dt = end_dt - datetime.timedelta(days=days)
+
+            # Store days + DB days from before the store (grouped SQL, cached per day)
+            peak_val, avg_val, hourly_data = summary(series, start_dt, end_dt) or (0, 0, [0] * 24)
+            report = {
+                "peak_occupancy": peak_val,
+                "avg_occupancy": round(avg_val, 1),
+                "hourly_trend": hourly_data
+            }
+            if with_zones:
+                report["zone_breakdown"] = zone_breakdown(start_dt, end_dt)
                 
             # 4. Zone Distribution
             zone_dist = []
@@ -200,10 +148,8 @@ class DashboardController:
                      })
             
             return jsonify({
-                "peak_occupancy": peak_val,
-                "avg_occupancy": round(avg_val, 1),
-                "hourly_trend": hourly_data,
-                "zone_distribution": zone_dist
+                **report,
+                "zone_distribution": zone_dist # Live
             }), 200
 
         except Exception as e:
@@ -217,6 +163,18 @@ class DashboardController:
         pass
 
 
+def _build_streamed_live_data():
+    try:
+        return DashboardController._build_live_data()
+    finally:
+        # Streams stay open for hours: don't hold a pooled connection between updates
+        db.session.remove()
+
+
+# One serialized live view per state update, shared by every /stream/live client
+live_feed = LiveFeed(_build_streamed_live_data)
+
+
 def get_commands():
     # Deprecated: usage should go through state manager directly in main.py
     return jsonify([]), 200
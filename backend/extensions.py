@@ -1,5 +1,21 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
+from sqlalchemy import event
 
 db = SQLAlchemy()
 jwt = JWTManager()
+
+def enable_sqlite_wal(engine):
+    """
+    WAL journal for SQLite: the persistence thread's bulk writes no longer
+    block dashboard reads (and vice versa); synchronous=NORMAL is safe with WAL.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
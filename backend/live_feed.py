@@ -0,0 +1,54 @@
+import json
+import threading
+
+
+class LiveFeed:
+    """
+    Serialized live data, built once per SystemState version.
+
+    However many /stream/live clients are connected, the first one to ask for
+    a new version runs `build` (the DB-backed live view) and serializes it; the
+    rest get the cached JSON. Besides the full snapshot it keeps the delta
+    against the previous version (top-level keys whose value changed), which
+    is all a client that saw that previous version needs.
+    """
+
+    def __init__(self, build):
+        self.build = build
+        self.lock = threading.Lock()
+        self.version = None       # State version the cache was built for
+        self.prev_version = None  # Version the delta is relative to
+        self.data = None
+        self.full_json = None
+        self.delta_json = None
+
+    def get(self, version):
+        """(version, prev_version, full_json, delta_json) for `version`"""
+        with self.lock:
+            if self.version != version:
+                data = self.build()
+                old = self.data or {}
+                delta = {k: v for k, v in data.items() if k not in old or old[k] != v}
+                self.prev_version, self.version = self.version, version
+                self.data = data
+                self.full_json = json.dumps(data)
+                self.delta_json = json.dumps(delta)
+            return self.version, self.prev_version, self.full_json, self.delta_json
+
+    def events(self, state, keepalive=15.0):
+        """SSE event stream: a snapshot first, then deltas (or a snapshot after a gap)"""
+        yield "retry: 2000\n\n"
+        last = None
+        version = state.version
+        while True:
+            version, prev, full, delta = self.get(version)
+            if last is not None and prev == last:
+                yield f"event: delta\ndata: {delta}\n\n"
+            else:
+                yield f"event: snapshot\ndata: {full}\n\n"
+            last = version
+
+            version = state.wait_for_update(last, timeout=keepalive)
+            while version == last:
+                yield ": keepalive\n\n" # Keeps proxies from closing an idle stream
+                version = state.wait_for_update(last, timeout=keepalive)
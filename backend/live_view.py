@@ -0,0 +1,152 @@
+import collections
+import datetime
+import hashlib
+import json
+import threading
+
+from .state import state
+
+# Alerts in the last ALERT_WINDOW count towards the dashboard's alert_count
+ALERT_WINDOW = datetime.timedelta(hours=24)
+
+# The ETag hashes only what the dashboard pages draw. Per-frame telemetry
+# (Re-ID worker metrics, camera scheduler/reader stats) changes on every
+# update and would make every poll a 200.
+ETAG_SKIPPED_KEYS = ("reid", "new_alerts")
+ETAG_CAMERA_FIELDS = ("source", "resolution", "fps")
+
+
+class LiveView:
+    """
+    Materialized /get_count payload.
+
+    Keeps what get_live_data used to query on every poll in memory:
+      - the last-24h alert count, as a deque of alert times: seeded from the
+        DB once, appended to when the persistence thread saves alerts,
+        expired from the left as the window moves;
+      - zone thresholds from the DB, plus the zone-name -> threshold
+        resolution, reloaded only after invalidate_thresholds() (zone save).
+    The serialized JSON and its ETag are rebuilt only when the state version,
+    the alert count or the thresholds changed; the ETag only covers the
+    rendered fields (see ETAG_SKIPPED_KEYS), so telemetry-only changes still
+    revalidate as 304.
+    """
+
+    def __init__(self, state):
+        self.state = state
+        self.lock = threading.Lock()
+
+        self.alert_times = None         # deque of datetimes, None until seeded
+        self.thresholds = None          # Zone name -> threshold, None until loaded
+        self.resolved = {}              # Live zone name -> threshold (or None)
+        self.thresholds_gen = 0         # Bumped on invalidate_thresholds()
+
+        self.key = None                 # (state version, alert count, thresholds gen)
+        self.data = None
+        self.body = None
+        self.etag = None
+
+    # --- Alert counter ---
+    def _seed_alerts(self, now):
+        from backend.models import Alert
+        rows = Alert.query.with_entities(Alert.timestamp).filter(Alert.timestamp >= now - ALERT_WINDOW).all()
+        self.alert_times = collections.deque(sorted(ts for (ts,) in rows if ts is not None))
+
+    def record_alerts(self, count, when=None):
+        """Called after `count` alerts were committed to the DB"""
+        when = when or datetime.datetime.now()
+        with self.lock:
+            if self.alert_times is not None: # Not seeded yet: the seed query will see them
+                self.alert_times.extend([when] * count)
+
+    def alert_count(self, now=None):
+        now = now or datetime.datetime.now()
+        with self.lock:
+            if self.alert_times is None:
+                self._seed_alerts(now)
+            cutoff = now - ALERT_WINDOW
+            while self.alert_times and self.alert_times[0] < cutoff:
+                self.alert_times.popleft()
+            return len(self.alert_times)
+
+    # --- Zone thresholds ---
+    def invalidate_thresholds(self):
+        """Zones were saved: reload thresholds on the next build"""
+        with self.lock:
+            self.thresholds = None
+            self.resolved = {}
+            self.thresholds_gen += 1
+
+    def _threshold_for(self, raw_name):
+        if raw_name in self.resolved:
+            return self.resolved[raw_name]
+        # Robust matching: "CAM 1: Entrance" is zone "Entrance" in the DB
+        candidates = [raw_name]
+        if ':' in raw_name:
+            parts = raw_name.split(':')
+            if len(parts) > 1:
+                candidates.append(parts[1].strip())
+        threshold = next((self.thresholds[c] for c in candidates if c in self.thresholds), None)
+        self.resolved[raw_name] = threshold
+        return threshold
+
+    def _sync_thresholds(self, zones):
+        if self.thresholds is None:
+            from backend.models import Zone
+            self.thresholds = {name: threshold for name, threshold in Zone.query.with_entities(Zone.name, Zone.threshold)}
+
+        def sync(z_list):
+            synced = []
+            for z in z_list:
+                if isinstance(z, dict):
+                    threshold = self._threshold_for(z.get('name', ''))
+                    if threshold is not None and z.get('threshold') != threshold:
+                        z = dict(z, threshold=threshold) # Don't mutate the shared state's dicts
+                synced.append(z)
+            return synced
+
+        if isinstance(zones, list):
+            return sync(zones)
+        if isinstance(zones, dict):
+            return {cam_id: sync(z_list) for cam_id, z_list in zones.items()}
+        return zones
+
+    # --- Payload ---
+    def build(self):
+        """Live data dict (shared state + alert count + active cameras + DB thresholds)"""
+        version = self.state.version
+        alert_count = self.alert_count()
+        with self.lock:
+            key = (version, alert_count, self.thresholds_gen)
+            if key != self.key:
+                data = self.state.get_data()
+                data['alert_count'] = alert_count
+                data['active_cameras'] = len(data.get('cameras', {}))
+                data['zones'] = self._sync_thresholds(data.get('zones', []))
+                self.key, self.data = key, data
+                self.body = self.etag = None
+            return self.data
+
+    def serialized(self):
+        """(JSON body, ETag) of build(); serialized once per change"""
+        self.build()
+        with self.lock:
+            if self.body is None:
+                self.body = json.dumps(self.data)
+                self.etag = hashlib.md5(json.dumps(self._rendered(self.data)).encode()).hexdigest()
+            return self.body, self.etag
+
+    @staticmethod
+    def _rendered(data):
+        """The part of the payload the dashboard pages show"""
+        rendered = {k: v for k, v in data.items() if k not in ETAG_SKIPPED_KEYS}
+        cameras = data.get('cameras')
+        if isinstance(cameras, dict):
+            rendered['cameras'] = {cam_id: {f: status.get(f) for f in ETAG_CAMERA_FIELDS}
+                                   if isinstance(status, dict) else status
+                                   for cam_id, status in cameras.items()}
+        return rendered
+
+
+# Global Singleton (for the shared SystemState)
+live_view = LiveView(state)
@@ -31,3 +31,28 @@ class AnalyticsData(db.Model):
     timestamp = db.Column(db.DateTime, default=db.func.now())
     zone_name = db.Column(db.String(50))
     count = db.Column(db.Integer)
+
+    # Covering: reports filter on (zone_name, timestamp) and read count from the index only
+    __table_args__ = (db.Index('ix_analytics_zone_time_count', 'zone_name', 'timestamp', 'count'),)
+
+class ZoneSample(db.Model):
+    # One row per zone per sample interval (backend.persistence), written in bulk
+    id = db.Column(db.Integer, primary_key=True)
+    timestamp = db.Column(db.DateTime, nullable=False)
+    camera_id = db.Column(db.String(20))
+    zone_name = db.Column(db.String(50), nullable=False)
+    count = db.Column(db.Integer)        # Occupancy at sample time
+    entries = db.Column(db.Integer)      # Entries since the previous sample
+    exits = db.Column(db.Integer)        # Exits since the previous sample
+    dwell = db.Column(db.Float)          # Mean dwell (s) of those exits, None if no exits
+    dwell_hist = db.Column(db.Text)      # Their durations, DwellHistogram JSON; None if no exits
+
+    __table_args__ = (
+        # One zone over time (covering for its occupancy)
+        db.Index('ix_zone_sample_zone_time_count', 'zone_name', 'timestamp', 'count'),
+        # All zones in a time range, grouped by zone (covering for the per-zone report)
+        db.Index('ix_zone_sample_time_cover', 'timestamp', 'zone_name', 'count', 'entries', 'exits', 'dwell'),
+        # Dwell histograms in a time range (covering; partial: only rows with exits hold one)
+        db.Index('ix_zone_sample_dwell_hist', 'timestamp', 'zone_name', 'dwell_hist',
+                 sqlite_where=db.text('dwell_hist IS NOT NULL')),
+    )
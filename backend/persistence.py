@@ -1,22 +1,108 @@
 import time
+import json
 import threading
 import datetime
+from dwell import DwellHistogram # Repo root (shared with counting.py)
 from .state import state
 from .extensions import db
-from .models import AnalyticsData
+from .models import AnalyticsData, ZoneSample, Alert
+from .live_view import live_view
+from .timeseries import timeseries, GLOBAL_SERIES, camera_series, zone_series
+from .reports import report_cache
 
-def start_persistence_thread(app, interval=60):
+# Zones are sampled every ZONE_SAMPLE_INTERVAL seconds into memory and the
+# buffer is written to the DB every flush interval, in one transaction
+ZONE_SAMPLE_INTERVAL = 1.0
+MAX_BUFFERED_SAMPLES = 100000   # Dropped beyond this if the DB stays unwritable
+
+def _zone_lists(data):
+    """{camera id: [zone dicts]} from the live data (zones may be a flat list)"""
+    zones = data.get('zones', {})
+    return zones if isinstance(zones, dict) else {None: zones}
+
+class ZoneSampler:
+    """
+    Turns live data into ZoneSample rows buffered in memory.
+
+    Zones report cumulative entries / exits / dwell_total / dwell_hist; a row
+    holds the difference since that zone's previous sample (a restarted
+    detection loop resets the counters, then the new value itself is the
+    difference). The dwell histogram of a row is the sketch of the visits
+    that ended in its interval, so any range of rows merges into the range's.
+    """
+
+    def __init__(self):
+        self.buffer = []
+        self.last = {} # zone name -> (entries, exits, dwell_total) at its previous sample
+        self.last_hist = {} # zone name -> DwellHistogram at its previous sample
+
+    def sample(self, data, now):
+        for cam_id, z_list in _zone_lists(data).items():
+            for z in z_list:
+                name = z.get('name')
+                if not name:
+                    continue
+                current = (z.get('entries', 0), z.get('exits', 0), z.get('dwell_total', 0.0))
+                hist = DwellHistogram.from_json(z.get('dwell_hist'))
+                prev = self.last.get(name, current)
+                prev_hist = self.last_hist.get(name, hist)
+                if any(c < p for c, p in zip(current, prev)) or (hist.counts < prev_hist.counts).any():
+                    prev, prev_hist = (0, 0, 0.0), DwellHistogram()
+                self.last[name], self.last_hist[name] = current, hist
+
+                entries, exits = current[0] - prev[0], current[1] - prev[1]
+                dwell = (current[2] - prev[2]) / exits if exits else None
+                visits = DwellHistogram(hist.counts - prev_hist.counts)
+                self.buffer.append({
+                    "timestamp": now,
+                    "camera_id": cam_id,
+                    "zone_name": name,
+                    "count": z.get('count', 0),
+                    "entries": entries,
+                    "exits": exits,
+                    "dwell": dwell,
+                    "dwell_hist": json.dumps(visits.to_json()) if visits.total else None
+                })
+
+    def drain(self):
+        rows, self.buffer = self.buffer, []
+        return rows
+
+    def requeue(self, rows):
+        """Put back rows a failed write did not store (oldest dropped past the cap)"""
+        self.buffer = (rows + self.buffer)[-MAX_BUFFERED_SAMPLES:]
+
+def write_batch(zone_rows, live_count, now, alerts):
+    """
+    One transaction: buffered zone samples (a single executemany INSERT), the
+    global occupancy row and pending alerts. Needs an app context.
+    """
+    if zone_rows:
+        db.session.execute(ZoneSample.__table__.insert(), zone_rows)
+    db.session.add(AnalyticsData(zone_name=GLOBAL_SERIES, count=live_count, timestamp=now))
+    for a in alerts:
+        db.session.add(Alert(
+            zone_name=a['zone_name'],
+            message=a['message'],
+            # timestamp=a['timestamp'] # Use DB server time or convert
+        ))
+    db.session.commit()
+
+def start_persistence_thread(app, interval=60, sample_interval=ZONE_SAMPLE_INTERVAL):
     """
     Starts a background thread to save analytics data to the database.
     Requires the Flask 'app' object to create an application context.
+    Samples every `sample_interval` s, writes every `interval` s.
     """
+    sampler = ZoneSampler()
+
     def persistence_loop():
         print("DEBUG: Persistence Thread Started.")
+        next_flush = time.time() + interval
         while True:
             try:
-                # Sleep first (or specific interval)
-                time.sleep(interval)
-                
+                time.sleep(sample_interval)
+
                 # Check stop signal
                 if state.stop_event.is_set():
                     print("DEBUG: Persistence Thread Stopping...")
@@ -25,40 +111,41 @@ def start_persistence_thread(app, interval=60):
                 # Get Current Data
                 data = state.get_data()
                 live_count = data.get('people_count', 0)
-                
-                # Create DB Record
+                now = datetime.datetime.now()
+
+                # Zone samples (DB, buffered) + time-series store: global,
+                # per-camera and per-zone occupancy
+                sampler.sample(data, now)
+                samples = {GLOBAL_SERIES: live_count}
+                for cam_id, cam in data.get('cameras', {}).items():
+                    samples[camera_series(cam_id)] = cam.get('people_count', 0)
+                for z_list in _zone_lists(data).values():
+                    for z in z_list:
+                        samples[zone_series(z['name'])] = z.get('count', 0)
+                timeseries.record(samples, now.timestamp())
+
+                if time.time() < next_flush:
+                    continue
+                next_flush = time.time() + interval
+                timeseries.flush()
+
+                # Write everything buffered since the last flush
+                rows = sampler.drain()
+                alerts = state.get_and_clear_alerts()
                 with app.app_context():
-                    record = AnalyticsData(
-                        zone_name='_GLOBAL_OCCUPANCY_',
-                        count=live_count,
-                        timestamp=datetime.datetime.now()
-                    )
-                    db.session.add(record)
-                    
-                    # Optional: Save per-zone stats if needed
-                    # zones = data.get('zones', {})
-                    # ... logic to iterate zones ...
-                    
-                    db.session.commit()
-                    # print(f"DEBUG: Saved Analytics Snapshot: {live_count}")
-                    
-                # Save Alerts
-                pending = state.get_and_clear_alerts()
-                if pending:
-                    from .models import Alert
-                    count_saved = 0
-                    for a in pending:
-                         new_alert = Alert(
-                             zone_name=a['zone_name'],
-                             message=a['message'],
-                             # timestamp=a['timestamp'] # Use DB server time or convert
-                         )
-                         db.session.add(new_alert)
-                         count_saved += 1
-                    
-                    if count_saved > 0:
-                        db.session.commit()
-                        print(f"DEBUG: Saved {count_saved} alerts to DB.")
+                    try:
+                        write_batch(rows, live_count, now, alerts)
+                    except Exception:
+                        db.session.rollback()
+                        sampler.requeue(rows)
+                        for a in alerts:
+                            state.add_alert(a['zone_name'], a['message'])
+                        raise
+                # Cached reports covering the new samples are stale now
+                report_cache.invalidate_since(rows[0]["timestamp"] if rows else now)
+                if alerts:
+                    live_view.record_alerts(len(alerts)) # Live 24h alert counter
+                    print(f"DEBUG: Saved {len(alerts)} alerts to DB.")
 
             except Exception as e:
                 print(f"ERROR: Persistence Loop Failed: {e}")
@@ -0,0 +1,225 @@
+import collections
+import datetime
+import threading
+
+import numpy as np
+from sqlalchemy import func
+
+from dwell import DwellHistogram # Repo root (shared with counting.py)
+from .extensions import db
+from .models import AnalyticsData, ZoneSample
+from .timeseries import timeseries, GLOBAL_SERIES, COUNT, SUM, MAX
+
+# Per-day report aggregates kept in memory (a year of one series = 365 entries)
+REPORT_CACHE_SIZE = 8192
+
+
+class ReportCache:
+    """
+    Per-day report aggregates keyed by (kind, series, date).
+
+    Finished days never change, so they stay cached; the persistence thread
+    calls invalidate_since() after each write, which drops only the days the
+    new samples belong to ("today").
+    """
+
+    def __init__(self, size=REPORT_CACHE_SIZE):
+        self.size = size
+        self.lock = threading.Lock()
+        self.entries = collections.OrderedDict() # key -> (end of the day, value)
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, end_dt, value):
+        with self.lock:
+            self.entries[key] = (end_dt, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def invalidate_since(self, since):
+        """New samples at/after `since` were written: drop entries covering that time"""
+        with self.lock:
+            for key in [k for k, (end_dt, _) in self.entries.items() if end_dt > since]:
+                del self.entries[key]
+
+
+# Global Singleton
+report_cache = ReportCache()
+
+
+def _days(start_dt, end_dt):
+    """Dates of the whole days in [start_dt, end_dt) (reports cover whole days)"""
+    day, last = start_dt.date(), (end_dt - datetime.timedelta(microseconds=1)).date()
+    days = []
+    while day <= last:
+        days.append(day)
+        day += datetime.timedelta(days=1)
+    return days
+
+
+def _cached_days(kind, series, days, query, cache):
+    """
+    {date: value} for every day; days missing from the cache are computed by
+    ONE grouped query over the span they cover (query(lo, hi) -> {date: value})
+    and cached (including empty days).
+    """
+    found = {d: cache.get((kind, series, d)) for d in days}
+    missing = [d for d, v in found.items() if v is None]
+    if missing:
+        lo = datetime.datetime.combine(missing[0], datetime.time())
+        hi = datetime.datetime.combine(missing[-1] + datetime.timedelta(days=1), datetime.time())
+        computed = query(lo, hi)
+        for d in missing:
+            found[d] = computed.get(d, [])
+            cache.put((kind, series, d), datetime.datetime.combine(d + datetime.timedelta(days=1), datetime.time()), found[d])
+    return found
+
+
+def _hourly(rows):
+    """(peak, avg, 24 hour-of-day averages) from (hour, max, sum, count) groups"""
+    sums, counts, peaks = [0] * 24, [0] * 24, [None] * 24
+    for hour, peak, total, n in rows:
+        sums[hour] += total
+        counts[hour] += n
+        peaks[hour] = peak if peaks[hour] is None else max(peaks[hour], peak)
+    samples = sum(counts)
+    hourly_data = [round(sums[h] / counts[h]) if counts[h] else 0 for h in range(24)]
+    return max(p for p in peaks if p is not None), sum(sums) / samples, hourly_data
+
+
+def _timeseries_rows(series, start_dt, end_dt):
+    """(hour, max, sum, count) groups from the time-series store's hour rollups"""
+    times, r = timeseries.rollup(series, start_dt, end_dt, "hour")
+    return [(t.hour, float(r[i, MAX]), float(r[i, SUM]), int(r[i, COUNT]))
+            for i, t in enumerate(times) if r[i, COUNT]]
+
+
+def _db_rows(series, start_dt, end_dt, cache):
+    """
+    Same groups from the DB: one GROUP BY over the covering (zone_name,
+    timestamp, count) index, cached per day. The global series lives in
+    AnalyticsData, zones in ZoneSample.
+    """
+    model = AnalyticsData if series == GLOBAL_SERIES else ZoneSample
+
+    def query(lo, hi):
+        bucket = func.substr(model.timestamp, 1, 13) # 'YYYY-MM-DD HH' (SQLite DateTime text)
+        rows = db.session.query(
+            bucket, func.max(model.count), func.sum(model.count), func.count(model.count)
+        ).filter(
+            model.zone_name == series,
+            model.timestamp >= lo,
+            model.timestamp < hi
+        ).group_by(bucket).all()
+        per_day = {}
+        for b, peak, total, n in rows:
+            per_day.setdefault(datetime.date.fromisoformat(b[:10]), []).append((int(b[11:13]), peak, total, n))
+        return per_day
+
+    per_day = _cached_days("hours", series, _days(start_dt, end_dt), query, cache)
+    return [row for day_rows in per_day.values() for row in day_rows]
+
+
+def summary_from_timeseries(series, start_dt, end_dt):
+    """(peak, avg, hourly trend) from the time-series store's hour rollups; None if it has no samples"""
+    rows = _timeseries_rows(series, start_dt, end_dt)
+    if not rows:
+        return None
+    peak_val, avg_val, hourly_data = _hourly(rows)
+    return round(peak_val), avg_val, hourly_data
+
+
+def summary_from_db(series, start_dt, end_dt, cache=report_cache):
+    """Same report from the DB (grouped SQL, cached per day); None if there are no rows"""
+    rows = _db_rows(series, start_dt, end_dt, cache)
+    return _hourly(rows) if rows else None
+
+
+def summary(series, start_dt, end_dt, cache=report_cache):
+    """
+    (peak, avg, hourly trend) of [start_dt, end_dt): days from the store's
+    first day on come from the time-series store, earlier days (history
+    recorded before it) from the DB. None if neither has samples.
+    """
+    first = timeseries.first_sample_time()
+    split = end_dt
+    if first is not None:
+        split = min(max(datetime.datetime.combine(datetime.date.fromtimestamp(first), datetime.time()), start_dt), end_dt)
+    rows = []
+    if start_dt < split:
+        rows += _db_rows(series, start_dt, split, cache)
+    if split < end_dt:
+        rows += _timeseries_rows(series, split, end_dt)
+    if not rows:
+        return None
+    peak_val, avg_val, hourly_data = _hourly(rows)
+    return round(peak_val), avg_val, hourly_data
+
+
+def _rounded(seconds):
+    return None if seconds is None else round(seconds, 1)
+
+def zone_breakdown(start_dt, end_dt, cache=report_cache):
+    """
+    Per-zone peak / avg occupancy, entries, exits, mean and p50 / p90 dwell
+    from ZoneSample (grouped, cached per day). Dwell quantiles come from the
+    rows' histograms merged per day (only rows with exits hold one, read
+    through the partial ix_zone_sample_dwell_hist index).
+    """
+    def query(lo, hi):
+        day = func.substr(ZoneSample.timestamp, 1, 10)
+        rows = db.session.query(
+            day,
+            ZoneSample.zone_name,
+            func.max(ZoneSample.count),
+            func.sum(ZoneSample.count),
+            func.count(ZoneSample.count),
+            func.sum(ZoneSample.entries),
+            func.sum(ZoneSample.exits),
+            func.sum(ZoneSample.dwell * ZoneSample.exits)
+        ).filter(
+            ZoneSample.timestamp >= lo,
+            ZoneSample.timestamp < hi
+        ).group_by(day, ZoneSample.zone_name).all()
+        hists = {}
+        for d, name, hist in db.session.query(day, ZoneSample.zone_name, ZoneSample.dwell_hist).filter(
+            ZoneSample.timestamp >= lo,
+            ZoneSample.timestamp < hi,
+            ZoneSample.dwell_hist.isnot(None) # Matches the partial covering index
+        ):
+            hists.setdefault((d, name), DwellHistogram()).merge(DwellHistogram.from_json(hist))
+        per_day = {}
+        for d, *row in rows:
+            per_day.setdefault(datetime.date.fromisoformat(d), []).append(tuple(row) + (hists.get((d, row[0])),))
+        return per_day
+
+    zones = {}
+    for day_rows in _cached_days("zones", None, _days(start_dt, end_dt), query, cache).values():
+        for name, peak, total, n, entries, exits, dwell_sum, hist in day_rows:
+            z = zones.setdefault(name, [0, 0, 0, 0, 0, 0.0, DwellHistogram()])
+            z[0] = max(z[0], peak or 0)
+            z[1] += total or 0
+            z[2] += n
+            z[3] += entries or 0
+            z[4] += exits or 0
+            z[5] += dwell_sum or 0.0
+            if hist is not None:
+                z[6].merge(hist)
+
+    return [{
+        "name": name,
+        "peak": peak,
+        "avg": round(total / n, 1) if n else 0,
+        "entries": entries,
+        "exits": exits,
+        "avg_dwell": round(dwell_sum / exits, 1) if exits and dwell_sum else None,
+        "p50_dwell": _rounded(hist.quantile(0.5)),
+        "p90_dwell": _rounded(hist.quantile(0.9))
+    } for name, (peak, total, n, entries, exits, dwell_sum, hist) in sorted(zones.items())]
@@ -12,7 +12,12 @@ def update_count():
 def get_live_data():
     return DashboardController.get_live_data()
 
+@dashboard_bp.route('/stream/live', methods=['GET'])
+def stream_live_data():
+    return DashboardController.stream_live_data()
+
 @dashboard_bp.route('/analytics/data', methods=['GET'])
+@dashboard_bp.route('/analytics/trend', methods=['GET'])
 def get_analytics():
     return DashboardController.get_analytics()
 
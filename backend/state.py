@@ -1,4 +1,7 @@
 import threading
+import time
+
+from .broadcaster import FrameBroadcaster, DEFAULT_STREAM_QUALITY, DEFAULT_STREAM_FPS
 
 class SystemState:
     def __init__(self):
@@ -10,6 +13,7 @@ class SystemState:
             "people_count": 0,
             "total_visitors": 0,
             "zones": {},
+            "tripwires": {},
             "cameras": {},
             "alert_count": 0,
             "active_cameras": 0
@@ -26,6 +30,12 @@ class SystemState:
         
         self.pending_alerts = [] # Queue for new alerts to be saved to DB
 
+        self.broadcasters = {} # cam_id -> FrameBroadcaster for /video_feed viewers
+
+        # Bumped on every update(); /stream/live waits on this (own lock)
+        self.version = 0
+        self.version_cond = threading.Condition()
+
     def add_alert(self, zone_name, message):
         with self.lock:
              # Add simple duplication check or max size check if needed
@@ -60,6 +70,16 @@ class SystemState:
             # Inject alert count into live data for immediate frontend feedback
             # Note: This is transient "new" alerts, total alert count is separate
             self.live_data['new_alerts'] = len(self.pending_alerts)
+
+        with self.version_cond:
+            self.version += 1
+            self.version_cond.notify_all()
+
+    def wait_for_update(self, after_version, timeout=15.0):
+        """Block until update() ran after `after_version`; returns the current version"""
+        with self.version_cond:
+            self.version_cond.wait_for(lambda: self.version > after_version, timeout)
+            return self.version
             
     def get_data(self):
         with self.lock:
@@ -80,41 +100,27 @@ class SystemState:
             return list(self.history)
 
     # Frame Buffer Methods
-    def update_frame(self, cam_id, frame_bytes):
-        with self.lock:
-            if not hasattr(self, 'frame_buffer'):
-                self.frame_buffer = {}
-            if not hasattr(self, 'frame_events'):
-                self.frame_events = {}
-            
-            self.frame_buffer[str(cam_id)] = frame_bytes
-            
-            # Notify waiters
-            if str(cam_id) not in self.frame_events:
-                self.frame_events[str(cam_id)] = threading.Condition(self.lock)
-            
-            self.frame_events[str(cam_id)].notify_all()
+    # Frames go through one FrameBroadcaster per camera with its own lock;
+    # self.lock is only taken to create it the first time a camera is seen.
+    def broadcaster(self, cam_id):
+        b = self.broadcasters.get(str(cam_id))
+        if b is None:
+            with self.lock:
+                b = self.broadcasters.setdefault(str(cam_id), FrameBroadcaster())
+        return b
 
-    def get_frame(self, cam_id):
-        with self.lock:
-            if not hasattr(self, 'frame_buffer'):
-                return None
-            return self.frame_buffer.get(str(cam_id))
+    def subscribe_stream(self, cam_id, max_fps=DEFAULT_STREAM_FPS, quality=DEFAULT_STREAM_QUALITY):
+        return self.broadcaster(cam_id).subscribe(max_fps, quality)
 
-    def wait_for_frame(self, cam_id, timeout=1.0):
-        with self.lock:
-            if not hasattr(self, 'frame_events'):
-                self.frame_events = {}
-            
-            if str(cam_id) not in self.frame_events:
-                self.frame_events[str(cam_id)] = threading.Condition(self.lock)
-            
-            # Wait for notification
-            self.frame_events[str(cam_id)].wait(timeout)
-            
-            if hasattr(self, 'frame_buffer'):
-                return self.frame_buffer.get(str(cam_id))
-            return None
+    def unsubscribe_stream(self, cam_id, client):
+        self.broadcaster(cam_id).unsubscribe(client)
+
+    def stream_demand(self, cam_id):
+        """{jpeg quality: max fps} requested by the viewers of a camera"""
+        return self.broadcaster(cam_id).demand()
+
+    def update_frame(self, cam_id, frame_bytes, quality=DEFAULT_STREAM_QUALITY):
+        self.broadcaster(cam_id).publish(frame_bytes, quality)
 
 # Global Singleton
 state = SystemState()
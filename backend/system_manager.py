@@ -31,7 +31,12 @@ def start_unified_detection(source="0"):
         sys.path.append(root_path)
 
     try:
-        from main import run_detection_headless
+        from re_id import Config
+        if Config.DETECTION_MODE == "process":
+            # Cameras in worker processes; this thread only aggregates
+            from camera_pool import run_detection_pool as run_detection
+        else:
+            from main import run_detection_headless as run_detection
     except ImportError as e:
         return f"Failed to import main detection process: {e}"
 
@@ -39,7 +44,7 @@ def start_unified_detection(source="0"):
     try:
         # Pass state_manager so main.py uses shared memory
         t = threading.Thread(
-            target=run_detection_headless, 
+            target=run_detection, 
             kwargs={
                 "args_source": source, 
                 "state_manager": state, 
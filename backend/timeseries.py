@@ -0,0 +1,317 @@
+import datetime
+import os
+import threading
+import time
+import urllib.parse
+
+import numpy as np
+
+# Where the store lives (next to the Re-ID gallery files)
+TIMESERIES_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'timeseries'))
+
+# Series names (same convention as AnalyticsData.zone_name)
+GLOBAL_SERIES = '_GLOBAL_OCCUPANCY_'
+
+def camera_series(cam_id):
+    return f"_CAMERA_{cam_id}_"
+
+def zone_series(zone_name):
+    return zone_name # e.g. "C1: Entrance" (already camera-prefixed)
+
+# Rollup columns
+COUNT, SUM, MIN, MAX = range(4)
+RESOLUTIONS = {"minute": 60, "hour": 3600}
+
+
+def _empty_rollup(buckets):
+    r = np.zeros((buckets, 4))
+    r[:, MIN] = np.inf
+    r[:, MAX] = -np.inf
+    return r
+
+
+def _rollup(seconds, values, width):
+    """(86400 // width, 4) rollup of one day's samples (seconds since midnight)"""
+    r = _empty_rollup(86400 // width)
+    if len(seconds):
+        idx = (seconds // width).astype(np.int64)
+        np.add.at(r[:, COUNT], idx, 1)
+        np.add.at(r[:, SUM], idx, values)
+        np.minimum.at(r[:, MIN], idx, values)
+        np.maximum.at(r[:, MAX], idx, values)
+    return r
+
+
+def _coarsen(r, factor):
+    """Merge `factor` consecutive buckets (minute -> hour rollup)"""
+    r = r.reshape(-1, factor, 4)
+    out = np.empty((r.shape[0], 4))
+    out[:, COUNT] = r[:, :, COUNT].sum(axis=1)
+    out[:, SUM] = r[:, :, SUM].sum(axis=1)
+    out[:, MIN] = r[:, :, MIN].min(axis=1)
+    out[:, MAX] = r[:, :, MAX].max(axis=1)
+    return out
+
+
+class TimeSeriesStore:
+    """
+    Append-only, columnar occupancy store (global, per-camera, per-zone).
+
+    The analytics endpoints read pre-aggregated rollups instead of scanning
+    AnalyticsData rows: a 90-day report is 90 small .npy loads (cached once a
+    day is over), not millions of ORM objects.
+    """
+
+    # Layout (<root>/<YYYY-MM-DD>/<quoted series name>.*), one directory per local day:
+    #   .t.f8        sample times, seconds since local midnight (float64), append-only
+    #   .v.f4        sample values (float32), append-only, same length as .t.f8
+    #   .minute.npy  (1440, 4) rollup: count, sum, min, max per minute
+    #   .hour.npy    (24, 4) rollup, same columns
+    # Rollups are rewritten on flush; they are derived data and are rebuilt
+    # from the raw columns if missing (e.g. after a crash between the two).
+
+    def __init__(self, root=TIMESERIES_DIR):
+        self.root = root
+        self.lock = threading.Lock()
+        self.pending = {}       # (day, series) -> ([seconds], [values]) not yet on disk
+        self.open_days = {}     # (day, series) -> minute rollup being accumulated
+        self.closed = {}        # (day, series, "hour") -> rollup of a finished day (immutable)
+        self.first_time = None  # Epoch seconds of the oldest sample (cached once known)
+
+    # ---------------- Paths ----------------
+    def _day_dir(self, day):
+        return os.path.join(self.root, day.isoformat())
+
+    def _prefix(self, day, series):
+        return os.path.join(self._day_dir(day), urllib.parse.quote(series, safe=''))
+
+    # ---------------- Writing ----------------
+    def append(self, series, value, ts=None):
+        self.record({series: value}, ts)
+
+    def record(self, values, ts=None):
+        """One sample for each {series: value} at time `ts` (epoch seconds)"""
+        ts = time.time() if ts is None else ts
+        dt = datetime.datetime.fromtimestamp(ts)
+        day = dt.date()
+        midnight = datetime.datetime.combine(day, datetime.time())
+        seconds = (dt - midnight).total_seconds()
+        minute = int(seconds // 60)
+        with self.lock:
+            for series, value in values.items():
+                key = (day, series)
+                t_list, v_list = self.pending.setdefault(key, ([], []))
+                t_list.append(seconds)
+                v_list.append(value)
+
+                r = self.open_days.get(key)
+                if r is None:
+                    r = self.open_days[key] = self._load_minute(day, series)
+                r[minute, COUNT] += 1
+                r[minute, SUM] += value
+                r[minute, MIN] = min(r[minute, MIN], value)
+                r[minute, MAX] = max(r[minute, MAX], value)
+
+    def extend(self, series, ts, values):
+        """Bulk append (e.g. backfilling history): arrays of epoch seconds and values, written immediately"""
+        order = np.argsort(ts, kind="stable")
+        ts = np.asarray(ts, dtype=np.float64)[order]
+        values = np.asarray(values, dtype=np.float64)[order]
+        if not len(ts):
+            return
+        self.flush()
+        with self.lock:
+            self.first_time = None # Backfilled history may start earlier
+            day = datetime.date.fromtimestamp(ts[0])
+            while True:
+                midnight = datetime.datetime.combine(day, datetime.time()).timestamp()
+                next_midnight = datetime.datetime.combine(day + datetime.timedelta(days=1), datetime.time()).timestamp()
+                lo, hi = np.searchsorted(ts, [midnight, next_midnight])
+                if lo == len(ts):
+                    break
+                day, this_day = day + datetime.timedelta(days=1), day
+                if lo == hi:
+                    continue
+                mask = slice(lo, hi)
+                seconds = ts[mask] - midnight
+                day_values = values[mask]
+                os.makedirs(self._day_dir(this_day), exist_ok=True)
+                prefix = self._prefix(this_day, series)
+                minute = self.open_days.get((this_day, series))
+                if minute is None:
+                    minute = self._load_minute(this_day, series)
+                with open(prefix + ".t.f8", "ab") as f:
+                    seconds.tofile(f)
+                with open(prefix + ".v.f4", "ab") as f:
+                    day_values.astype(np.float32).tofile(f)
+
+                # Merge into the day's rollup (in place: also updates an open day)
+                added = _rollup(seconds, day_values, 60)
+                minute[:, COUNT] += added[:, COUNT]
+                minute[:, SUM] += added[:, SUM]
+                minute[:, MIN] = np.minimum(minute[:, MIN], added[:, MIN])
+                minute[:, MAX] = np.maximum(minute[:, MAX], added[:, MAX])
+                self._save(prefix + ".minute.npy", minute)
+                self._save(prefix + ".hour.npy", _coarsen(minute, 60))
+                self.closed.pop((this_day, series, "hour"), None)
+
+    def flush(self):
+        """Append pending samples to disk and rewrite the open days' rollups"""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            for (day, series), (t_list, v_list) in pending.items():
+                os.makedirs(self._day_dir(day), exist_ok=True)
+                prefix = self._prefix(day, series)
+                with open(prefix + ".t.f8", "ab") as f:
+                    np.asarray(t_list, dtype=np.float64).tofile(f)
+                with open(prefix + ".v.f4", "ab") as f:
+                    np.asarray(v_list, dtype=np.float32).tofile(f)
+
+                minute = self.open_days[(day, series)]
+                self._save(prefix + ".minute.npy", minute)
+                self._save(prefix + ".hour.npy", _coarsen(minute, 60))
+
+            # Days before today will not get new samples: stop holding them
+            today = datetime.date.today()
+            for key in [k for k in self.open_days if k[0] < today and k not in self.pending]:
+                del self.open_days[key]
+
+    @staticmethod
+    def _save(path, array):
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp, path) # Readers never see a half-written rollup
+
+    # ---------------- Reading ----------------
+    def _load_raw(self, day, series):
+        prefix = self._prefix(day, series)
+        if not os.path.exists(prefix + ".t.f8"):
+            return np.empty(0), np.empty(0, dtype=np.float32)
+        t = np.fromfile(prefix + ".t.f8", dtype=np.float64)
+        v = np.fromfile(prefix + ".v.f4", dtype=np.float32)
+        n = min(len(t), len(v)) # A crash mid-append can leave one column longer
+        return t[:n], v[:n]
+
+    def _load_minute(self, day, series):
+        path = self._prefix(day, series) + ".minute.npy"
+        t, v = self._load_raw(day, series)
+        if os.path.exists(path):
+            r = np.load(path)
+            if int(r[:, COUNT].sum()) == len(t):
+                return r
+        return _rollup(t, v.astype(np.float64), 60)
+
+    def _day_rollup(self, day, series, resolution):
+        """Rollup of one day (None if the series has no data that day); caller holds the lock"""
+        if (day, series) in self.open_days:
+            minute = self.open_days[(day, series)]
+            return minute.copy() if resolution == "minute" else _coarsen(minute, 60)
+
+        key = (day, series, resolution)
+        if key in self.closed:
+            return self.closed[key]
+        path = self._prefix(day, series) + f".{resolution}.npy"
+        if os.path.exists(path):
+            r = np.load(path)
+        elif os.path.exists(self._prefix(day, series) + ".t.f8"):
+            minute = self._load_minute(day, series)
+            r = minute if resolution == "minute" else _coarsen(minute, 60)
+        else:
+            r = None
+        if day < datetime.date.today() and resolution == "hour":
+            self.closed[key] = r # Finished days never change (minute rollups: too big to keep them all)
+        return r
+
+    def rollup(self, series, start, end, resolution="hour"):
+        """
+        Buckets of `series` between two datetimes (start inclusive, end exclusive).
+        Returns (bucket start datetimes, (N, 4) array of count/sum/min/max);
+        empty buckets have count 0.
+        """
+        width = RESOLUTIONS[resolution]
+        per_day = 86400 // width
+        times, parts = [], []
+        day = start.date()
+        with self.lock:
+            while datetime.datetime.combine(day, datetime.time()) < end:
+                midnight = datetime.datetime.combine(day, datetime.time())
+                lo = max(0, int((start - midnight).total_seconds() // width))
+                hi = min(per_day, int(-(-(end - midnight).total_seconds() // width)))
+                r = self._day_rollup(day, series, resolution)
+                parts.append(r[lo:hi] if r is not None else _empty_rollup(hi - lo))
+                times.extend(midnight + datetime.timedelta(seconds=i * width) for i in range(lo, hi))
+                day += datetime.timedelta(days=1)
+        if not parts:
+            return [], _empty_rollup(0)
+        return times, np.concatenate(parts)
+
+    def aggregate(self, series, start, end):
+        """{"samples", "peak", "avg"} of `series` over [start, end)"""
+        _, r = self.rollup(series, start, end, "hour")
+        samples = int(r[:, COUNT].sum())
+        if samples == 0:
+            return {"samples": 0, "peak": 0, "avg": 0}
+        return {"samples": samples, "peak": float(r[:, MAX].max()), "avg": float(r[:, SUM].sum() / samples)}
+
+    def raw(self, series, start, end):
+        """(epoch seconds, values) of every sample of `series` in [start, end)"""
+        ts, vs = [], []
+        day = start.date()
+        with self.lock:
+            while datetime.datetime.combine(day, datetime.time()) < end:
+                midnight = datetime.datetime.combine(day, datetime.time())
+                t, v = self._load_raw(day, series)
+                pending = self.pending.get((day, series))
+                if pending:
+                    t = np.concatenate([t, pending[0]])
+                    v = np.concatenate([v, np.asarray(pending[1], dtype=np.float32)])
+                t = t + midnight.timestamp()
+                mask = (t >= start.timestamp()) & (t < end.timestamp())
+                ts.append(t[mask])
+                vs.append(v[mask])
+                day += datetime.timedelta(days=1)
+        if not ts:
+            return np.empty(0), np.empty(0, dtype=np.float32)
+        return np.concatenate(ts), np.concatenate(vs)
+
+    def first_sample_time(self):
+        """
+        Epoch seconds of the oldest sample of any series, None if the store is
+        empty. Older history only exists in the DB.
+        """
+        with self.lock:
+            if self.first_time is not None:
+                return self.first_time
+            days = [k[0] for k in self.pending]
+            if os.path.isdir(self.root):
+                for name in os.listdir(self.root):
+                    try:
+                        days.append(datetime.date.fromisoformat(name))
+                    except ValueError:
+                        continue
+            for day in sorted(set(days)):
+                seconds = [t[0] for (d, _), (t, _) in self.pending.items() if d == day and t]
+                folder = self._day_dir(day)
+                if os.path.isdir(folder):
+                    for f in os.listdir(folder):
+                        if f.endswith(".t.f8"):
+                            first = np.fromfile(os.path.join(folder, f), dtype=np.float64, count=1)
+                            seconds.extend(first.tolist())
+                if seconds:
+                    midnight = datetime.datetime.combine(day, datetime.time()).timestamp()
+                    self.first_time = midnight + min(seconds)
+                    return self.first_time
+            return None
+
+    def series_names(self, day):
+        """Series with data on `day`"""
+        names = {s for (d, s) in self.open_days if d == day}
+        folder = self._day_dir(day)
+        if os.path.isdir(folder):
+            names.update(urllib.parse.unquote(f[:-len(".t.f8")]) for f in os.listdir(folder) if f.endswith(".t.f8"))
+        return sorted(names)
+
+
+# Global Singleton
+timeseries = TimeSeriesStore()
@@ -0,0 +1,119 @@
+import datetime
+
+import numpy as np
+from sqlalchemy import func
+
+from .extensions import db
+from .models import AnalyticsData, ZoneSample
+from .timeseries import timeseries, GLOBAL_SERIES, COUNT, SUM
+
+# Point budget of a trend response (Chart.js stays smooth up to a few hundred)
+TREND_POINTS = 300
+TREND_MAX_POINTS = 1000
+
+# Finest data read for a range, before decimation: raw 1 Hz samples up to a
+# day (86k points), minute averages up to 90 days (130k), hour averages beyond
+RAW_MAX_SPAN = 86400
+MINUTE_MAX_SPAN = 90 * 86400
+
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets: indices of `threshold` points of (x, y)
+    that keep the visual shape (spikes and dips survive, unlike averaging
+    or striding). First and last points are always kept.
+    """
+    n = len(x)
+    threshold = max(threshold, 3)
+    if threshold >= n:
+        return np.arange(n)
+
+    # Inner points split into threshold - 2 buckets
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Third vertex: average of the next bucket (the last point for the final one)
+        if i + 2 < len(edges):
+            nlo, nhi = edges[i + 1], edges[i + 2]
+            cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+        # Twice the triangle area (a, b, c) for every candidate b of this bucket
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def _resolution(span):
+    """Finest resolution read for a range of `span` seconds"""
+    if span <= RAW_MAX_SPAN:
+        return "raw"
+    return "minute" if span <= MINUTE_MAX_SPAN else "hour"
+
+
+def _from_timeseries(series, start_dt, end_dt, resolution):
+    """(epoch seconds, values) from the time-series store"""
+    if resolution == "raw":
+        t, v = timeseries.raw(series, start_dt, end_dt)
+        return t, v.astype(np.float64)
+    times, r = timeseries.rollup(series, start_dt, end_dt, resolution)
+    keep = np.flatnonzero(r[:, COUNT])
+    t = np.array([times[i].timestamp() for i in keep])
+    return t, r[keep, SUM] / r[keep, COUNT]
+
+
+def _from_db(series, start_dt, end_dt, resolution):
+    """
+    Same from the DB (history recorded before the time-series store): raw
+    rows, or averages grouped by minute / hour of the timestamp text.
+    The global series lives in AnalyticsData, zones in ZoneSample.
+    """
+    model = AnalyticsData if series == GLOBAL_SERIES else ZoneSample
+    filters = (model.zone_name == series, model.timestamp >= start_dt, model.timestamp < end_dt)
+    if resolution == "raw":
+        rows = db.session.query(model.timestamp, model.count).filter(*filters).order_by(model.timestamp).all()
+        t = np.array([ts.timestamp() for ts, _ in rows])
+        return t, np.array([c for _, c in rows], dtype=np.float64)
+
+    length, fmt = (16, "%Y-%m-%d %H:%M") if resolution == "minute" else (13, "%Y-%m-%d %H")
+    bucket = func.substr(model.timestamp, 1, length)
+    rows = db.session.query(bucket, func.avg(model.count)).filter(*filters).group_by(bucket).order_by(bucket).all()
+    t = np.array([datetime.datetime.strptime(b, fmt).timestamp() for b, _ in rows])
+    return t, np.array([avg for _, avg in rows], dtype=np.float64)
+
+
+def trend(series, start_dt, end_dt, points=TREND_POINTS):
+    """
+    Occupancy of `series` over [start_dt, end_dt), at most `points` points
+    (LTTB-decimated). Returns {"timestamps", "data", "resolution", "source_points"}.
+    The part of the range before the store's first sample comes from the DB,
+    at the same resolution.
+    """
+    resolution = _resolution((end_dt - start_dt).total_seconds())
+    first = timeseries.first_sample_time()
+    split = end_dt if first is None else min(max(datetime.datetime.fromtimestamp(first), start_dt), end_dt)
+    if resolution != "raw" and split < end_dt:
+        # Whole buckets on each side (the DB groups by bucket start)
+        bucket = split.replace(second=0, microsecond=0)
+        split = max(bucket.replace(minute=0) if resolution == "hour" else bucket, start_dt)
+    ts, vs = [np.empty(0)], [np.empty(0)]
+    if start_dt < split:
+        t, v = _from_db(series, start_dt, split, resolution)
+        ts.append(t)
+        vs.append(v)
+    if split < end_dt:
+        t, v = _from_timeseries(series, split, end_dt, resolution)
+        ts.append(t)
+        vs.append(v)
+    t, v = np.concatenate(ts).astype(np.float64), np.concatenate(vs).astype(np.float64)
+    keep = lttb(t, v, points)
+    return {
+        "timestamps": t[keep].tolist(),
+        "data": np.round(v[keep], 1).tolist(),
+        "resolution": resolution,
+        "source_points": len(t)
+    }
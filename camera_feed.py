@@ -1,5 +1,7 @@
 import cv2
 
+import os
+import threading
 import time
 
 
@@ -68,3 +70,121 @@ def read_frame(cap):
 
 def stop_camera(cap):
     cap.release()
+
+
+class CameraReader:
+    """
+    Decodes one source on its own thread and keeps only the newest frame.
+
+    The processing loop calls read() and never waits for a camera: a stalled
+    RTSP stream or a slow file only affects its own reader. Frames decoded
+    faster than they are consumed overwrite each other (counted as drops).
+    Files are paced to their native FPS and loop at the end, like the old
+    rewind in main.py.
+    """
+
+    MAX_FAILURES = 20       # Consecutive failed reads before a live source is reopened
+    RETRY_DELAY = 0.1
+
+    def __init__(self, source=0, cap=None):
+        self.source = source
+        self.cap = cap if cap is not None else start_camera(source)
+        self.is_file = isinstance(source, str) and os.path.isfile(source)
+
+        fps = self.cap.get(cv2.CAP_PROP_FPS) if self.cap.isOpened() else 0
+        self.frame_interval = 1.0 / fps if self.is_file and 0 < fps <= 120 else 0.0
+
+        self.lock = threading.Lock()
+        self.frame = None
+        self.seq = 0              # Number of frames decoded so far
+        self.frame_time = 0.0
+        self.consumed = True      # Latest frame already handed out
+
+        # Metrics
+        self.decode_fps = 0.0
+        self.dropped = 0
+        self.failures = 0         # Failed reads (total)
+        self.staleness = 0.0      # Age of frames when handed out, seconds (EMA)
+
+        self.stop_event = threading.Event()
+        self.thread = None
+        if self.cap.isOpened():
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self, last_seq=None):
+        """
+        Newest frame as (frame, seq), without blocking.
+        frame is None if nothing was decoded yet, or nothing newer than last_seq.
+        """
+        with self.lock:
+            if self.frame is None or self.seq == last_seq:
+                return None, self.seq
+            age = time.time() - self.frame_time
+            self.staleness = age if self.staleness == 0 else 0.9 * self.staleness + 0.1 * age
+            self.consumed = True
+            return self.frame, self.seq
+
+    def metrics(self):
+        with self.lock:
+            return {
+                "decode_fps": round(self.decode_fps, 1),
+                "dropped_frames": self.dropped,
+                "read_failures": self.failures,
+                "staleness_ms": round(self.staleness * 1000, 1)
+            }
+
+    def stop(self, timeout=2.0):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+        stop_camera(self.cap)
+
+    def _reopen(self):
+        print(f"DEBUG: Reopening source {self.source} after {self.MAX_FAILURES} failed reads")
+        stop_camera(self.cap)
+        self.cap = start_camera(self.source)
+
+    def _run(self):
+        consecutive = 0
+        next_due = time.time()
+        last_decode = 0.0
+        while not self.stop_event.is_set():
+            ret, frame = self.cap.read()
+            if not ret or frame is None:
+                if self.is_file and consecutive == 0:
+                    # End of file: loop
+                    self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    consecutive += 1
+                    continue
+                consecutive += 1
+                with self.lock:
+                    self.failures += 1
+                if consecutive >= self.MAX_FAILURES and not self.is_file:
+                    self._reopen()
+                    consecutive = 0
+                self.stop_event.wait(self.RETRY_DELAY)
+                continue
+            consecutive = 0
+
+            now = time.time()
+            with self.lock:
+                if not self.consumed:
+                    self.dropped += 1
+                self.frame = frame
+                self.seq += 1
+                self.frame_time = now
+                self.consumed = False
+                if last_decode > 0:
+                    dt = now - last_decode
+                    if dt > 0:
+                        self.decode_fps = 1.0 / dt if self.decode_fps == 0 else 0.9 * self.decode_fps + 0.1 / dt
+            last_decode = now
+
+            if self.frame_interval:
+                # Play files at their native rate instead of as fast as they decode
+                next_due = max(next_due + self.frame_interval, now)
+                self.stop_event.wait(max(0.0, next_due - time.time()))
@@ -0,0 +1,410 @@
+import multiprocessing as mp
+import os
+import sys
+import time
+from multiprocessing.connection import wait
+
+from re_id import Config
+from backend.broadcaster import DEFAULT_STREAM_QUALITY
+
+# Worker-local DeepSORT track ids are unique per worker only; the parent's
+# gallery sees worker_index * TRACK_KEY_SPAN + track_id instead
+TRACK_KEY_SPAN = 10 ** 9
+
+
+# ======================================================================
+# Worker process side
+# ======================================================================
+class GalleryClient:
+    """
+    Stand-in for ReIDGallery + ReIDWorker inside a camera worker process.
+
+    New tracks are sent to the parent, which resolves them against the one
+    shared gallery; until the answer comes back the track shows the usual
+    provisional -track_id. Persistence is the parent's job, so checkpoint()
+    and save_compact() do nothing here.
+    A track is sent once, not every frame; only if no answer came within
+    REID_RESEND_INTERVAL (queue full, no features, still buffering) is its
+    latest crop sent again.
+    """
+
+    def __init__(self, link):
+        self.link = link
+        link.gallery = self
+        self.track_to_global = {}
+        self.next_global_id = 1
+        self.feature_extractor = None
+        self.sent = {}  # track_id -> time its crop was last sent to the parent
+
+    def apply(self, resolved, next_global_id):
+        self.track_to_global.update(resolved)
+        self.next_global_id = max(self.next_global_id, next_global_id)
+        for tid in resolved:
+            self.sent.pop(tid, None)
+
+    def get_global_id(self, track_id, image_crop):
+        return self.track_to_global.get(track_id, -int(track_id))
+
+    def get_global_ids(self, track_ids, image_crops, features=None):
+        self.link.poll()
+        now = time.time()
+        global_ids = []
+        unresolved = []
+        for i, tid in enumerate(track_ids):
+            if tid in self.track_to_global:
+                global_ids.append(self.track_to_global[tid])
+                continue
+            global_ids.append(-int(tid))
+            if tid in self.sent and now - self.sent[tid] < Config.REID_RESEND_INTERVAL:
+                continue  # Already with the parent
+            feat = features[i] if features is not None else None
+            crop = image_crops[i] if feat is None else None
+            unresolved.append((tid, crop, feat))
+            self.sent[tid] = now
+        if unresolved:
+            self.link.send(("reid", unresolved))
+        return global_ids
+
+    def forget(self, track_ids):
+        if track_ids:
+            for tid in track_ids:
+                self.sent.pop(tid, None)
+            self.link.send(("forget", list(track_ids)))
+
+    def metrics(self):
+        return {}  # Reported by the parent's ReIDWorker
+
+    def stop(self):
+        pass
+
+    def checkpoint(self):
+        pass
+
+    def save_compact(self, out_prefix=None):
+        pass
+
+
+class ParentLink:
+    """state_manager for run_detection_headless in a worker: forwards to the parent over a pipe"""
+
+    def __init__(self, conn, stop_event):
+        self.conn = conn
+        self.stop_event = stop_event
+        self.gallery = None
+        self.commands = []
+        self.streams = {}   # cam_id -> viewer demand, as last sent by the parent
+
+    def send(self, msg):
+        try:
+            self.conn.send(msg)
+        except (BrokenPipeError, EOFError, OSError):
+            self.stop_event.set()  # Parent is gone
+
+    def poll(self):
+        """Apply everything the parent sent since the last call"""
+        try:
+            while self.conn.poll():
+                msg = self.conn.recv()
+                if msg[0] == "ids" and self.gallery is not None:
+                    self.gallery.apply(msg[1], msg[2])
+                elif msg[0] == "command":
+                    self.commands.append(msg[1])
+                elif msg[0] == "streams":
+                    self.streams = msg[1]
+        except (EOFError, OSError):
+            self.stop_event.set()
+
+    def update(self, data):
+        # process_frame raises alerts on this process's own SystemState; hand them over
+        from backend.state import state
+        alerts = state.get_and_clear_alerts()
+        if alerts:
+            self.send(("alerts", alerts))
+        self.send(("update", data))
+
+    def update_frame(self, cam_id, frame_bytes, quality=DEFAULT_STREAM_QUALITY):
+        self.send(("frame", cam_id, frame_bytes, quality))
+
+    def stream_demand(self, cam_id):
+        return self.streams.get(str(cam_id), {})
+
+    def get_and_clear_commands(self):
+        self.poll()
+        cmds = self.commands
+        self.commands = []
+        return cmds
+
+
+def _worker_main(conn, sources, camera_offset, stop_event, config):
+    """Entry point of a camera worker process"""
+    root = os.path.dirname(os.path.abspath(__file__))
+    if root not in sys.path:
+        sys.path.append(root)
+    for key, value in config.items():
+        setattr(Config, key, value)  # Spawned children start from the defaults
+
+    link = ParentLink(conn, stop_event)
+    client = GalleryClient(link)
+
+    from main import run_detection_headless
+    try:
+        run_detection_headless(sources, stop_event=stop_event, headless=True, state_manager=link,
+                               reid_gallery=client, reid_worker=client, camera_offset=camera_offset)
+    finally:
+        conn.close()
+
+
+# ======================================================================
+# Parent side
+# ======================================================================
+class CameraWorker:
+    """Parent's handle on one worker process and its cameras"""
+
+    def __init__(self, ctx, index, sources, camera_offset, stop_event, config):
+        self.index = index
+        self.sources = sources
+        self.camera_offset = camera_offset
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, sources, camera_offset, stop_event, config),
+            name=f"camera-worker-{index}",
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+        self.payload = None    # Latest update from the worker
+        self.pending = {}      # gallery key -> worker track_id, awaiting Re-ID
+        self.closed = False
+
+    def key(self, track_id):
+        return self.index * TRACK_KEY_SPAN + int(track_id)
+
+    def send(self, msg):
+        if self.closed:
+            return
+        try:
+            self.conn.send(msg)
+        except (BrokenPipeError, EOFError, OSError):
+            self.closed = True
+
+    def push_resolved(self, gallery):
+        """Send global IDs of pending tracks the gallery has resolved since last time"""
+        resolved = {}
+        for key, tid in list(self.pending.items()):
+            gid = gallery.track_to_global.get(key)
+            if gid is not None:
+                resolved[tid] = gid
+                del self.pending[key]
+        if resolved:
+            self.send(("ids", resolved, gallery.next_global_id))
+
+
+def _split(sources, per_worker):
+    return [sources[i:i + per_worker] for i in range(0, len(sources), per_worker)]
+
+
+def run_detection_pool(args_source=None, stop_event=None, headless=True, state_manager=None,
+                       cameras_per_worker=None):
+    """
+    Process-mode counterpart of main.run_detection_headless.
+
+    Cameras are split into groups of cameras_per_worker; each group runs the
+    normal detection loop (YOLO, DeepSORT, counting, JPEG encoding) in its own
+    process, so cameras no longer share one GIL. This process owns the Re-ID
+    gallery and the SystemState: workers send payloads, encoded frames, alerts
+    and Re-ID requests over a pipe, and get global IDs and commands back.
+    """
+    from main import resolve_sources
+    from re_id import FeatureExtractor, ReIDGallery
+    import requests as http
+
+    sources = resolve_sources(args_source)
+    per_worker = max(1, cameras_per_worker or Config.CAMERAS_PER_WORKER)
+
+    # ---------- SHARED RE-ID (one gallery for all workers) ----------
+    try:
+        feature_extractor = None
+        if Config.REID_FEATURE_SOURCE != "tracker":
+            feature_extractor = FeatureExtractor()
+        gallery = ReIDGallery(feature_extractor)
+        reid_worker = None
+        if Config.REID_ASYNC:
+            from reid_worker import ReIDWorker
+            reid_worker = ReIDWorker(gallery)
+    except Exception as e:
+        print(f"Model Init Error: {e}")
+        return
+
+    # ---------- START WORKERS ----------
+    ctx = mp.get_context("spawn")  # fork + torch/OpenCV threads is not safe
+    worker_stop = ctx.Event()
+    config = {k: getattr(Config, k) for k in dir(Config) if k.isupper()}
+    workers = []
+    offset = 0
+    for index, group in enumerate(_split(sources, per_worker)):
+        workers.append(CameraWorker(ctx, index, group, offset, worker_stop, config))
+        offset += len(group)
+    by_conn = {w.conn: w for w in workers}
+    print(f"DEBUG: Started {len(workers)} camera worker process(es) for {len(sources)} source(s)")
+
+    def handle(w, msg):
+        kind = msg[0]
+        if kind == "update":
+            w.payload = msg[1]
+        elif kind == "frame":
+            if state_manager:
+                state_manager.update_frame(msg[1], msg[2], msg[3])
+        elif kind == "alerts":
+            if state_manager:
+                for alert in msg[1]:
+                    state_manager.add_alert(alert["zone_name"], alert["message"])
+        elif kind == "reid":
+            keys, crops, feats = [], [], []
+            for tid, crop, feat in msg[1]:
+                key = w.key(tid)
+                w.pending[key] = tid
+                keys.append(key)
+                crops.append(crop)
+                feats.append(feat)
+            if reid_worker:
+                for key, crop, feat in zip(keys, crops, feats):
+                    reid_worker.submit(key, crop, feat)
+            else:
+                use_feats = feats if Config.REID_FEATURE_SOURCE == "tracker" else None
+                gallery.get_global_ids(keys, crops, features=use_feats)
+        elif kind == "forget":
+            keys = [w.key(tid) for tid in msg[1]]
+            for key in keys:
+                w.pending.pop(key, None)
+            if reid_worker:
+                reid_worker.forget(keys)
+
+    def drain(timeout):
+        live = [w.conn for w in workers if not w.closed]
+        if not live:
+            return
+        for conn in wait(live, timeout=timeout):
+            w = by_conn[conn]
+            try:
+                while conn.poll():
+                    handle(w, conn.recv())
+            except (EOFError, OSError):
+                w.closed = True
+
+    max_reported_visitors = 0
+    last_update = time.time()
+    last_checkpoint = time.time()
+
+    # MAIN LOOP (light: the heavy work is in the workers)
+    while True:
+        if stop_event and stop_event.is_set():
+            print("DEBUG: Stop signal received (Direct Event). Stopping camera workers.")
+            break
+        if state_manager and state_manager.stop_event.is_set():
+            print("DEBUG: Stop signal received (State Manager). Stopping camera workers.")
+            break
+        if all(w.closed or not w.process.is_alive() for w in workers):
+            print("DEBUG: All camera workers exited.")
+            break
+
+        try:
+            drain(0.05)
+            for w in workers:
+                w.push_resolved(gallery)
+
+            if time.time() - last_update > 0.5: # 2 FPS update
+                last_update = time.time()
+                total_live = 0
+                aggregated_zones_by_cam = {}
+                aggregated_tripwires_by_cam = {}
+                cam_status = {}
+                for w in workers:
+                    if not w.payload:
+                        continue
+                    total_live += w.payload.get("live_count", 0)
+                    aggregated_zones_by_cam.update(w.payload.get("zones", {}))
+                    aggregated_tripwires_by_cam.update(w.payload.get("tripwires", {}))
+                    for cam_id, status in w.payload.get("cameras", {}).items():
+                        cam_status[cam_id] = dict(status, worker=w.index, worker_pid=w.process.pid)
+
+                current_total = max(gallery.next_global_id - 1, total_live)
+                if current_total > max_reported_visitors:
+                    max_reported_visitors = current_total
+
+                payload = {
+                    "live_count": total_live,
+                    "people_count": total_live,
+                    "total_visitors": max_reported_visitors,
+                    "zones": aggregated_zones_by_cam,
+                    "tripwires": aggregated_tripwires_by_cam,
+                    "cameras": cam_status
+                }
+                if reid_worker:
+                    payload["reid"] = reid_worker.metrics()
+
+                cmds = []
+                if state_manager:
+                    state_manager.update(payload)
+                    cmds = state_manager.get_and_clear_commands()
+                else:
+                    try:
+                        # Legacy HTTP Fallback
+                        resp = http.post("http://127.0.0.1:5001/update_count", json=payload, timeout=0.05)
+                        if resp.status_code == 200:
+                            cmds = resp.json().get("commands", [])
+                    except Exception:
+                        pass
+
+                # Workers filter camera-specific commands themselves (cam_id)
+                for cmd in cmds:
+                    for w in workers:
+                        w.send(("command", cmd))
+
+                # Which JPEG qualities / rates the viewers of each camera want
+                if state_manager:
+                    for w in workers:
+                        w.send(("streams", {
+                            str(cam_id): state_manager.stream_demand(cam_id)
+                            for cam_id in range(w.camera_offset, w.camera_offset + len(w.sources))
+                        }))
+
+            if time.time() - last_checkpoint > Config.REID_CHECKPOINT_INTERVAL:
+                last_checkpoint = time.time()
+                try:
+                    gallery.checkpoint()
+                except Exception as e:
+                    print(f"Gallery Checkpoint Error: {e}")
+
+        except KeyboardInterrupt:
+            break
+        except Exception as e:
+            print(f"Error in Camera Pool Loop: {e}")
+            time.sleep(1)
+
+    # Cleanup: keep draining so no worker blocks on a full pipe while exiting
+    worker_stop.set()
+    deadline = time.time() + 15
+    while time.time() < deadline and any(w.process.is_alive() for w in workers):
+        drain(0.1)
+    for w in workers:
+        if w.process.is_alive():
+            print(f"DEBUG: Camera worker {w.index} did not exit, terminating")
+            w.process.terminate()
+        w.process.join(1)
+        w.conn.close()
+
+    if reid_worker: reid_worker.stop()
+    gallery.save_compact()
+
+    if state_manager:
+        print("DEBUG: Clearing System State")
+        state_manager.update({
+            "cameras": {},
+            "active_cameras": 0,
+            "live_count": 0,
+            "people_count": 0,
+            "zones": {},
+            "tripwires": {}
+        })
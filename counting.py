@@ -1,5 +1,8 @@
+import time
 import cv2
+import numpy as np
 from re_id import Config
+from dwell import DwellHistogram
 
 def calculate_centroid(x1,y1,x2,y2):
     return int((x1+x2)/2), int((y1+y2)/2)
@@ -8,78 +11,168 @@ def point_inside_rectangle(p, r):
     px,py = p; x1,y1,x2,y2 = r
     return x1<=px<=x2 and y1<=py<=y2
 
+def rasterize_polygon(pts):
+    """(x0, y0, bool mask of the polygon's bounding box); the pixels cv2.fillPoly paints, border included"""
+    pts = np.asarray(pts, dtype=np.int32)
+    x0, y0 = pts.min(axis=0)
+    x1, y1 = pts.max(axis=0)
+    raster = np.zeros((y1 - y0 + 1, x1 - x0 + 1), dtype=np.uint8)
+    cv2.fillPoly(raster, [pts - (x0, y0)], 1)
+    return int(x0), int(y0), raster.astype(bool)
+
+def point_inside_raster(p, raster):
+    x0, y0, mask = raster
+    px, py = int(p[0]) - x0, int(p[1]) - y0
+    return 0 <= py < mask.shape[0] and 0 <= px < mask.shape[1] and bool(mask[py, px])
+
+def normalize_coords(coords):
+    """Zone coords from the zones JSON: [x1,y1,x2,y2] (rectangle) or [[x,y], ...] (polygon)"""
+    if len(coords) and isinstance(coords[0], (list, tuple)):
+        return tuple((int(x), int(y)) for x, y in coords)
+    return tuple(int(c) for c in coords)
+
+def is_polygon(coords):
+    return len(coords) > 0 and isinstance(coords[0], tuple)
+
 class Zone:
     def __init__(self,id,coords,color,threshold=10):
         self.id=id
-        self.coords=coords
+        self.coords=normalize_coords(coords)
+        self.polygon=is_polygon(self.coords)
+        # Polygons are tested against their rasterization, so is_inside and
+        # ZoneMask agree pixel for pixel
+        self.raster=rasterize_polygon(self.coords) if self.polygon else None
         self.color=color
         self.threshold=threshold
         self.last_alert_time=0 # Timestamp of last alert
         self.total_count=0 # Renamed cumulative
         self.counted_ids=set()
         self.active_ids=set()
-        self.prev={}
+        # Provisional (negative, Re-ID pending) IDs seen inside; counted
+        # retroactively once resolved (see resolve_provisional)
+        self.provisional_inside=set()
+
+        # Visit timing (analytics): when each active ID entered, exits and
+        # completed dwell so far (cumulative, sampled by backend.persistence);
+        # dwell_hist holds every completed visit's duration (p50 / p90)
+        self.entry_times={}
+        self.exit_count=0
+        self.dwell_total=0.0
+        self.dwell_hist=DwellHistogram()
 
-        # Hysteresis: Track how long an ID has been outside after being counted
-        self.frames_outside={}
-        self.HYSTERESIS_THRESHOLD = 30  # Frames to wait before allowing re-count
+        # Hysteresis (wall time): when each counted ID left (or was lost).
+        # HYSTERESIS_SECONDS later it may be counted again and is forgotten,
+        # so state only holds active and recently departed IDs. Insertion
+        # order is time order: expire() only looks at the oldest entries.
+        self.left_at={}
+        self.HYSTERESIS_SECONDS = 3.0  # ~30 frames at 10 fps
+        self.expired_at=None # Frame time of the last expire()
 
     @property
     def count(self):
         return len(self.active_ids)
 
     def is_inside(self,p):
+        if self.polygon:
+            return point_inside_raster(p,self.raster)
         return point_inside_rectangle(p,self.coords)
 
-    def count_entry(self,gid,centroid):
-        # Ignore unconfirmed (negative) IDs
+    def count_entry(self,gid,centroid,inside=None,now=None):
+        # `inside`: membership already known (ZoneMask lookup), skips the test
+        if inside is None:
+            inside=self.is_inside(centroid)
+        now=time.time() if now is None else now
+        if now!=self.expired_at: # Once per frame, not per track
+            self.expire(now)
+
+        # Unconfirmed (negative) IDs are not counted yet, only remembered
         if gid < 0:
+            if inside:
+                self.provisional_inside.add(gid)
             return
-
-        inside=self.is_inside(centroid)
         
         # 1. Handle Entry
         if inside:
-            # Reset outside counter since they are inside
-            if gid in self.frames_outside:
-                self.frames_outside.pop(gid)
+            # Back inside: the hysteresis timer stops
+            self.left_at.pop(gid,None)
             
             # Count if not already counted for this session
             if gid not in self.active_ids:
-                self.active_ids.add(gid)
-                # Only increment total if never counted (or re-allowed)
-                if gid not in self.counted_ids:
-                    self.total_count+=1
-                    self.counted_ids.add(gid)
-                
-                print(f"✓ ID {gid} ENTERED {self.id} → Live: {self.count}")
+                self._enter(gid,now)
         
         # 2. Handle Exit / Debounce
         else: # Outside
             if gid in self.active_ids:
-                self.active_ids.discard(gid)
-                print(f"× ID {gid} LEFT {self.id} → Live: {self.count}")
+                self._leave(gid,now)
             
-            # Only track exit duration if they were previously counted
-            if gid in self.counted_ids:
-                curr_frames = self.frames_outside.get(gid, 0)
-                self.frames_outside[gid] = curr_frames + 1
-                
-                # If outside long enough, forget them (allow re-count)
-                if self.frames_outside[gid] > self.HYSTERESIS_THRESHOLD:
-                    self.counted_ids.discard(gid)
-                    self.frames_outside.pop(gid)
-
-        self.prev[gid]=inside
-
-    def remove_id(self,gid):
+            # Only time the absence if they were previously counted
+            if gid in self.counted_ids and gid not in self.left_at:
+                self.left_at[gid]=now
+
+    def expire(self,now=None):
+        """Forget counted IDs gone for more than HYSTERESIS_SECONDS (re-countable, memory freed)"""
+        now=time.time() if now is None else now
+        self.expired_at=now
+        expired=[]
+        for gid,left in self.left_at.items():
+            if now-left<=self.HYSTERESIS_SECONDS:
+                break
+            expired.append(gid)
+        for gid in expired:
+            del self.left_at[gid]
+            self.counted_ids.discard(gid)
+        return expired
+
+    def _enter(self,gid,now=None):
+        self.active_ids.add(gid)
+        self.entry_times[gid]=time.time() if now is None else now
+        # Only increment total if never counted (or re-allowed)
+        if gid not in self.counted_ids:
+            self.total_count+=1
+            self.counted_ids.add(gid)
+
+        print(f"✓ ID {gid} ENTERED {self.id} → Live: {self.count}")
+
+    def _leave(self,gid,now=None):
         self.active_ids.discard(gid)
-        self.prev.pop(gid,None)
+        self._record_exit(gid,now)
+        print(f"× ID {gid} LEFT {self.id} → Live: {self.count}")
+
+    def resolve_provisional(self,provisional_id,gid,now=None):
+        """Re-ID resolved a provisional ID: count the visit it made while pending"""
+        if provisional_id not in self.provisional_inside:
+            return
+        self.provisional_inside.discard(provisional_id)
+        if gid >= 0 and gid not in self.counted_ids:
+            self.total_count+=1
+            self.counted_ids.add(gid)
+            if gid not in self.active_ids:
+                self.left_at[gid]=time.time() if now is None else now
+
+    def _record_exit(self,gid,now=None):
+        entered=self.entry_times.pop(gid,None)
+        self.exit_count+=1
+        if entered is not None:
+            dwell=(time.time() if now is None else now)-entered
+            self.dwell_total+=dwell
+            self.dwell_hist.add(dwell)
+
+    def remove_id(self,gid,now=None):
+        """Track lost: counts as an exit, and the hysteresis timer starts"""
+        if gid in self.active_ids:
+            self.active_ids.discard(gid)
+            self._record_exit(gid,now)
+        if gid in self.counted_ids and gid not in self.left_at:
+            self.left_at[gid]=time.time() if now is None else now
 
     def draw(self,frame):
-        # Ensure coords are ints
-        x1, y1, x2, y2 = map(int, self.coords)
-        cv2.rectangle(frame,(x1,y1),(x2,y2),self.color,2)
+        if self.polygon:
+            cv2.polylines(frame,[np.asarray(self.coords,dtype=np.int32)],True,self.color,2)
+            x1 = min(x for x, _ in self.coords)
+            y1 = min(y for _, y in self.coords)
+        else:
+            x1, y1, x2, y2 = self.coords
+            cv2.rectangle(frame,(x1,y1),(x2,y2),self.color,2)
         
         # Format: "ZoneName: 5/10"
         label = f"{self.id}: {self.count}/{self.threshold}"
@@ -93,3 +186,343 @@ class Zone:
         cv2.putText(frame, label, (x1, text_y), Config.FONT, 0.7, (0,0,0), 4)
         # Draw Colored Text
         cv2.putText(frame, label, (x1, text_y), Config.FONT, 0.7, self.color, 2)
+
+
+class ZoneMask:
+    """
+    Membership of points in every zone of a camera from one array lookup.
+
+    Zones are rasterized once into a (height, width) label image: each pixel
+    holds the index of the combination of zones covering it (0 = none), and
+    `members[label]` is that combination as a boolean row over the zones.
+    Overlapping zones just create more combinations, so any number of zones
+    fits (uint16: up to 65535 distinct overlaps).
+
+    Points outside the image fall back to the exact per-zone test.
+    """
+
+    def __init__(self, zones, width, height):
+        self.zones = list(zones)
+        self.width, self.height = width, height
+        self.labels = np.zeros((height, width), dtype=np.uint16)
+        combos = {(): 0}       # sorted zone indices -> label
+        rows = [()]            # label -> sorted zone indices
+        shape = np.zeros((height, width), dtype=np.uint8)
+        for i, zone in enumerate(self.zones):
+            shape[:] = 0
+            if zone.polygon:
+                x0, y0, raster = zone.raster
+                x1, y1 = x0 + raster.shape[1] - 1, y0 + raster.shape[0] - 1
+            else:
+                x0, y0, x1, y1 = zone.coords # Inclusive borders, like point_inside_rectangle
+            # Clip to the image
+            cx0, cy0 = max(x0, 0), max(y0, 0)
+            cx1, cy1 = min(x1, width - 1), min(y1, height - 1)
+            if cx0 <= cx1 and cy0 <= cy1:
+                if zone.polygon:
+                    shape[cy0:cy1 + 1, cx0:cx1 + 1] = raster[cy0 - y0:cy1 - y0 + 1, cx0 - x0:cx1 - x0 + 1]
+                else:
+                    shape[cy0:cy1 + 1, cx0:cx1 + 1] = 1
+            covered = shape.astype(bool)
+            old, inverse = np.unique(self.labels[covered], return_inverse=True)
+            new = np.empty(len(old), dtype=np.uint16)
+            for j, label in enumerate(old):
+                combo = rows[label] + (i,)
+                if combo not in combos:
+                    if len(rows) > np.iinfo(np.uint16).max:
+                        raise ValueError("Too many overlapping zone combinations for a uint16 mask")
+                    combos[combo] = len(rows)
+                    rows.append(combo)
+                new[j] = combos[combo]
+            self.labels[covered] = new[inverse]
+
+        self.members = np.zeros((len(rows), len(self.zones)), dtype=bool)
+        for label, combo in enumerate(rows):
+            self.members[label, list(combo)] = True
+
+    def lookup(self, points):
+        """(N, len(zones)) bool matrix: points[n] inside zones[z]"""
+        points = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+        xs, ys = points[:, 0], points[:, 1]
+        in_image = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        result = np.zeros((len(points), len(self.zones)), dtype=bool)
+        result[in_image] = self.members[self.labels[ys[in_image], xs[in_image]]]
+        for n in np.flatnonzero(~in_image):
+            p = (int(xs[n]), int(ys[n]))
+            result[n] = [zone.is_inside(p) for zone in self.zones]
+        return result
+
+
+class ZoneSet:
+    """
+    Zone counting for all tracks of a frame at once.
+
+    Same semantics as calling Zone.count_entry for every (track, zone) pair,
+    but membership comes from NumPy broadcasting against every zone's bounds
+    and the entry / exit / hysteresis transitions are computed as (N, Z)
+    arrays. Python only runs for the pairs whose state changes.
+
+    Per-(global ID, zone) state is mirrored in arrays (one row per global
+    ID), and the Zone objects are updated on every transition, so their
+    counts, sets and the rest of the pipeline (alerts, payload, drawing)
+    are unchanged. Rows are only held by IDs that are active or counted
+    somewhere; expire() frees the others for reuse, so memory is bounded
+    by active + recently departed tracks.
+    Once a ZoneSet drives the zones, go through it (update, remove_missing,
+    resolve_provisional) rather than the Zone methods.
+    """
+
+    def __init__(self, zones):
+        self.zones = list(zones)
+        self.rect_index = np.array([i for i, z in enumerate(self.zones) if not z.polygon], dtype=np.int64)
+        self.rect_bounds = np.array([self.zones[i].coords for i in self.rect_index], dtype=np.int64).reshape(-1, 4)
+        self.polygon_index = [i for i, z in enumerate(self.zones) if z.polygon]
+        self.hysteresis = np.array([z.HYSTERESIS_SECONDS for z in self.zones], dtype=np.float64)
+
+        # Row per global ID holding state (grown by doubling, freed rows reused)
+        self.rows = {}
+        self.free = []
+        self.n_rows = 0 # High-water mark
+        self.row_gids = np.zeros(0, dtype=np.int64)
+        self.active = np.zeros((0, len(self.zones)), dtype=bool)
+        self.counted = np.zeros((0, len(self.zones)), dtype=bool)
+        self.left_at = np.zeros((0, len(self.zones))) # inf: not timing an absence
+
+        # Zones may already hold state (e.g. rebuilt after a zone edit)
+        # (rows allocated before indexing: allocating may replace the arrays)
+        for z, zone in enumerate(self.zones):
+            for gid in zone.active_ids:
+                row = self._rows([gid])[0]
+                self.active[row, z] = True
+            for gid in zone.counted_ids:
+                row = self._rows([gid])[0]
+                self.counted[row, z] = True
+            for gid, left in zone.left_at.items():
+                row = self._rows([gid])[0]
+                self.left_at[row, z] = left
+
+    def _rows(self, gids):
+        rows = np.empty(len(gids), dtype=np.int64)
+        for i, gid in enumerate(gids):
+            row = self.rows.get(gid)
+            if row is None:
+                if self.free:
+                    row = self.free.pop()
+                else:
+                    if self.n_rows == len(self.row_gids):
+                        self._grow(max(64, 2 * self.n_rows))
+                    row = self.n_rows
+                    self.n_rows += 1
+                self.rows[gid] = row
+                self.row_gids[row] = gid
+            rows[i] = row
+        return rows
+
+    def _grow(self, capacity):
+        extra = capacity - len(self.row_gids)
+        self.row_gids = np.concatenate([self.row_gids, np.zeros(extra, dtype=np.int64)])
+        self.active = np.vstack([self.active, np.zeros((extra, len(self.zones)), dtype=bool)])
+        self.counted = np.vstack([self.counted, np.zeros((extra, len(self.zones)), dtype=bool)])
+        self.left_at = np.vstack([self.left_at, np.full((extra, len(self.zones)), np.inf)])
+
+    def membership(self, points):
+        """(N, len(zones)) bool matrix: points[n] inside zones[z] (same test as Zone.is_inside)"""
+        points = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+        result = np.zeros((len(points), len(self.zones)), dtype=bool)
+        x, y = points[:, 0:1], points[:, 1:2]
+        if len(self.rect_index):
+            b = self.rect_bounds
+            result[:, self.rect_index] = (x >= b[:, 0]) & (x <= b[:, 2]) & (y >= b[:, 1]) & (y <= b[:, 3])
+        for z in self.polygon_index:
+            x0, y0, raster = self.zones[z].raster
+            px, py = points[:, 0] - x0, points[:, 1] - y0
+            ok = (px >= 0) & (px < raster.shape[1]) & (py >= 0) & (py < raster.shape[0])
+            result[ok, z] = raster[py[ok], px[ok]]
+        return result
+
+    def update(self, gids, points, membership=None, now=None):
+        """
+        count_entry for every track (global IDs, centroids) and every zone.
+        `membership`: precomputed (N, Z) matrix (e.g. ZoneMask.lookup).
+        """
+        now = time.time() if now is None else now
+        self.expire(now)
+        gids = np.asarray(gids, dtype=np.int64).reshape(-1)
+        if not len(gids) or not len(self.zones):
+            return
+        inside = self.membership(points) if membership is None else np.asarray(membership, dtype=bool)
+
+        # Unconfirmed (negative) IDs are not counted yet, only remembered
+        for n, z in zip(*np.nonzero(inside & (gids < 0)[:, None])):
+            self.zones[z].provisional_inside.add(int(gids[n]))
+
+        # IDs outside every zone (on all their tracks) and without state change nothing
+        seen = set(gids[inside.any(axis=1)].tolist()) | self.rows.keys()
+        confirmed = np.flatnonzero((gids >= 0) & np.array([g in seen for g in gids.tolist()], dtype=bool))
+
+        # A global ID on several tracks is applied track by track, in order,
+        # like the per-track loop; every other ID in one vectorised step
+        unique, first, counts = np.unique(gids[confirmed], return_index=True, return_counts=True)
+        single = confirmed[first[counts == 1]]
+        self._apply(gids[single], inside[single], now)
+        if (counts > 1).any():
+            for n in confirmed[np.isin(gids[confirmed], unique[counts > 1])]:
+                self._apply(gids[n:n + 1], inside[n:n + 1], now)
+
+    def _apply(self, gids, inside, now):
+        if not len(gids):
+            return
+        rows = self._rows(gids.tolist())
+        active, counted, left_at = self.active[rows], self.counted[rows], self.left_at[rows]
+
+        # Back inside: the hysteresis timer stops
+        for n, z in zip(*np.nonzero(inside & (left_at < np.inf))):
+            self.zones[z].left_at.pop(int(gids[n]), None)
+        left_at[inside] = np.inf
+
+        entered = inside & ~active
+        for n, z in zip(*np.nonzero(entered)):
+            self.zones[z]._enter(int(gids[n]), now)
+        active |= entered
+        counted |= entered
+
+        left = ~inside & active
+        for n, z in zip(*np.nonzero(left)):
+            self.zones[z]._leave(int(gids[n]), now)
+        active &= ~left
+
+        # Counted and outside: time the absence (expire() forgets them)
+        started = ~inside & counted & (left_at == np.inf)
+        for n, z in zip(*np.nonzero(started)):
+            self.zones[z].left_at[int(gids[n])] = now
+        left_at[started] = now
+
+        self.active[rows], self.counted[rows], self.left_at[rows] = active, counted, left_at
+
+    def expire(self, now=None):
+        """
+        Zone.expire for every zone: counted IDs gone for longer than the
+        hysteresis are forgotten, then rows with no state left are freed
+        """
+        now = time.time() if now is None else now
+        n = self.n_rows
+        if not n:
+            return
+        expired = self.counted[:n] & ~self.active[:n] & (now - self.left_at[:n] > self.hysteresis)
+        for row, z in zip(*np.nonzero(expired)):
+            gid = int(self.row_gids[row])
+            self.zones[z].left_at.pop(gid, None)
+            self.zones[z].counted_ids.discard(gid)
+        self.counted[:n] &= ~expired
+        self.left_at[:n][expired] = np.inf
+
+        in_use = np.zeros(n, dtype=bool)
+        in_use[list(self.rows.values())] = True
+        idle = in_use & ~self.active[:n].any(axis=1) & ~self.counted[:n].any(axis=1)
+        for row in np.flatnonzero(idle):
+            del self.rows[int(self.row_gids[row])]
+            self.left_at[row] = np.inf
+            self.free.append(int(row))
+
+    def remove_missing(self, present_gids, now=None):
+        """Zone.remove_id for every active global ID not in `present_gids` (tracks gone)"""
+        now = time.time() if now is None else now
+        n = self.n_rows
+        if not n:
+            return
+        present = np.isin(self.row_gids[:n], np.fromiter(present_gids, dtype=np.int64))
+        gone = self.active[:n] & ~present[:, None]
+        for row, z in zip(*np.nonzero(gone)):
+            self.zones[z].remove_id(int(self.row_gids[row]), now)
+        self.active[:n] &= ~gone
+        self.left_at[:n][gone] = now # Active IDs are counted: the absence is timed
+
+    def resolve_provisional(self, provisional_id, gid, now=None):
+        now = time.time() if now is None else now
+        for z, zone in enumerate(self.zones):
+            if provisional_id in zone.provisional_inside:
+                zone.resolve_provisional(provisional_id, gid, now)
+                if gid >= 0:
+                    row = self._rows([gid])[0]
+                    self.counted[row, z] = gid in zone.counted_ids
+                    self.left_at[row, z] = zone.left_at.get(gid, np.inf)
+
+
+class Tripwire:
+    """
+    Directed counting line from p1 to p2. A centroid moving from the left
+    of p1 -> p2 (as seen on screen, y pointing down) to its right is an
+    "in" crossing, the opposite an "out"; swap the points to flip.
+    """
+
+    def __init__(self,id,p1,p2,color):
+        self.id=id
+        self.p1=(int(p1[0]),int(p1[1]))
+        self.p2=(int(p2[0]),int(p2[1]))
+        self.color=color
+        self.in_count=0
+        self.out_count=0
+
+    def draw(self,frame):
+        cv2.line(frame,self.p1,self.p2,self.color,2)
+        cv2.circle(frame,self.p2,4,self.color,-1) # Marks the direction
+        label=f"{self.id}: in {self.in_count} / out {self.out_count}"
+        cv2.putText(frame, label, self.p1, Config.FONT, 0.6, (0,0,0), 4)
+        cv2.putText(frame, label, self.p1, Config.FONT, 0.6, self.color, 2)
+
+
+class TripwireSet:
+    """
+    Crossings of all tripwires of a camera by all tracks, per frame.
+
+    Each global ID's movement since the previous frame is a segment; one
+    vectorised orientation test intersects all N segments with all T lines.
+    Only the previous centroid of IDs seen in the last frame is kept, so
+    state is O(active tracks).
+    """
+
+    def __init__(self, tripwires):
+        self.tripwires = list(tripwires)
+        self.starts = np.array([t.p1 for t in self.tripwires], dtype=np.int64).reshape(-1, 2)
+        self.ends = np.array([t.p2 for t in self.tripwires], dtype=np.int64).reshape(-1, 2)
+        self.prev = {} # global ID -> centroid in the previous frame
+
+    @staticmethod
+    def _cross(o, a, b):
+        """z of (a - o) x (b - o), broadcast over leading axes"""
+        return (a[..., 0] - o[..., 0]) * (b[..., 1] - o[..., 1]) - (a[..., 1] - o[..., 1]) * (b[..., 0] - o[..., 0])
+
+    def crossings(self, before, after):
+        """
+        (N, T) int matrix: +1 where before[n] -> after[n] crosses tripwire t
+        in its "in" direction, -1 "out", 0 none. A point exactly on a line
+        counts as its right side, so touching it is not a crossing.
+        """
+        a = np.asarray(before, dtype=np.int64).reshape(-1, 1, 2)
+        b = np.asarray(after, dtype=np.int64).reshape(-1, 1, 2)
+        p, q = self.starts[None], self.ends[None]
+        side_before = self._cross(p, q, a) >= 0
+        side_after = self._cross(p, q, b) >= 0
+        # The tripwire's endpoints must not both lie on one side of the movement
+        within = self._cross(a, b, p) * self._cross(a, b, q) <= 0
+        crossed = (side_before != side_after) & within
+        return np.where(crossed, np.where(side_after, 1, -1), 0)
+
+    def update(self, gids, points):
+        """Count this frame's crossings (global IDs, centroids)"""
+        gids = [int(g) for g in gids]
+        points = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+        known = [n for n, g in enumerate(gids) if g in self.prev]
+        if known and self.tripwires:
+            before = [self.prev[gids[n]] for n in known]
+            result = self.crossings(before, points[known])
+            ins, outs = (result > 0).sum(axis=0), (result < 0).sum(axis=0)
+            for t, tripwire in enumerate(self.tripwires):
+                tripwire.in_count += int(ins[t])
+                tripwire.out_count += int(outs[t])
+        self.prev = {g: tuple(p) for g, p in zip(gids, points.tolist())}
+
+    def resolve_provisional(self, provisional_id, gid):
+        """Re-ID resolved a provisional ID: its last centroid now belongs to gid"""
+        if gid >= 0 and provisional_id in self.prev:
+            self.prev.setdefault(gid, self.prev.pop(provisional_id))
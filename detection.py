@@ -1,6 +1,7 @@
 import cv2
 import time
 import time
+import numpy as np
 
 from ultralytics import YOLO
 from deep_sort_realtime.deepsort_tracker import DeepSort
@@ -8,10 +9,47 @@ from deep_sort_realtime.deepsort_tracker import DeepSort
 from re_id import Config, FeatureExtractor, ReIDGallery
 from camera_feed import start_camera
 from zones import load_zones, zones as loaded_zones
-from counting import calculate_centroid, Zone
+from counting import calculate_centroid, Zone, ZoneMask, ZoneSet, Tripwire, TripwireSet
 from heatmap import HeatmapGenerator
 
 
+def _boxes_to_detections(result):
+    """Convert one ultralytics result into DeepSort's ([l, t, w, h], conf, cls) tuples"""
+    detections = []
+    if result is None or result.boxes is None:
+        return detections
+
+    for box in result.boxes:
+        x1, y1, x2, y2 = map(int, box.xyxy[0])
+        w = x2 - x1
+        h = y2 - y1
+        conf = float(box.conf[0])
+        # DeepSort expects [left, top, w, h]
+        detections.append(([x1, y1, w, h], conf, "person"))
+    return detections
+
+
+def detect_people_batch(yolo_model, frames):
+    """
+    YOLOv8 person detection for several frames in a single forward pass.
+    Returns one detection list per input frame (same order).
+    """
+    if not frames:
+        return []
+
+    results = yolo_model(
+        frames,
+        conf=Config.YOLO_CONF,
+        classes=Config.YOLO_CLASSES,
+        verbose=False
+    )
+
+    detections = [[] for _ in frames]
+    for i, result in enumerate(results or []):
+        detections[i] = _boxes_to_detections(result)
+    return detections
+
+
 class PeopleCountingSystem:
     """
     Handles:
@@ -21,7 +59,7 @@ class PeopleCountingSystem:
     - Zone-based counting
     """
 
-    def __init__(self, yolo_model=None, reid_gallery=None):
+    def __init__(self, yolo_model=None, reid_gallery=None, reid_worker=None):
         print("Initializing PeopleCountingSystem...")
 
         # ---------------- YOLO ----------------
@@ -41,13 +79,24 @@ class PeopleCountingSystem:
         # ---------------- Re-ID ----------------
         if reid_gallery:
             self.reid_gallery = reid_gallery
+        elif Config.REID_FEATURE_SOURCE == "tracker":
+            # DeepSORT already embeds every detection; no second MobileNetV2
+            self.reid_gallery = ReIDGallery(None)
         else:
             feature_extractor = FeatureExtractor()
             self.reid_gallery = ReIDGallery(feature_extractor)
 
+        # Optional async Re-ID (reid_worker.ReIDWorker on the same gallery)
+        self.reid_worker = reid_worker
+        self.provisional_tracks = set() # track_ids shown with a provisional ID last frame
+
         # ---------------- Zones ----------------
         load_zones()  # loads zones.csv into zones.zones
         self.zones = self._convert_zones(loaded_zones)
+        self.zone_mask = None # Rasterized zone lookup + vectorised counting,
+        self.zone_set = None  # rebuilt when zones / frame size change
+        self.tripwires = []   # Directed counting lines (zones JSON "line" entries)
+        self.tripwire_set = None
 
         # ---------------- Camera ----------------
         # Camera is handled by main.py
@@ -60,6 +109,12 @@ class PeopleCountingSystem:
         self.last_time = time.time()
         self.fps = 0
 
+        # Scene activity for the inference scheduler
+        self.last_centroids = {}  # track_id -> (cx, cy) of the previous frame
+        self.motion = 0.0         # Mean track displacement this frame (px)
+        self.track_count = 0
+        self.active_tracks = 0    # Tracks updated recently (= live_count)
+
     def _convert_zones(self, loaded_zones):
         """Convert zone dictionaries to Zone objects"""
         colors = [
@@ -77,29 +132,47 @@ class PeopleCountingSystem:
             )
         return zone_objects
 
+    def _convert_tripwires(self, loaded_tripwires):
+        """Convert tripwire dictionaries to Tripwire objects"""
+        return [Tripwire(t["id"], t["line"][0], t["line"][1], (0, 0, 255)) for t in loaded_tripwires]
+
+    def _tripwire_engine(self):
+        """TripwireSet of the current tripwires (rebuilt when they change; crossings in progress restart)"""
+        key = tuple(id(t) for t in self.tripwires)
+        if self.tripwire_set is None or self.tripwire_key != key:
+            self.tripwire_set = TripwireSet(self.tripwires)
+            self.tripwire_key = key
+        return self.tripwire_set
+
+    def _zone_engine(self):
+        """(ZoneMask, ZoneSet) of the current zones, rebuilt if zones or frame size changed"""
+        key = (self.imW, self.imH, tuple((id(z), z.coords) for z in self.zones))
+        if self.zone_mask is None or self.zone_mask_key != key:
+            self.zone_mask = ZoneMask(self.zones, self.imW, self.imH)
+            self.zone_set = ZoneSet(self.zones)
+            self.zone_mask_key = key
+        return self.zone_mask, self.zone_set
+
     def detect_people(self, frame):
         """YOLOv8 person detection"""
-        results = self.yolo(
-            frame,
-            conf=Config.YOLO_CONF,
-            classes=Config.YOLO_CLASSES,
-            verbose=False
-        )
+        return detect_people_batch(self.yolo, [frame])[0]
 
-        detections = []
-        if results and results[0].boxes is not None:
-            for box in results[0].boxes:
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
-                w = x2 - x1
-                h = y2 - y1
-                conf = float(box.conf[0])
-                # DeepSort expects [left, top, w, h]
-                detections.append(([x1, y1, w, h], conf, "person"))
+    @staticmethod
+    def _track_embedding(track):
+        """Latest DeepSORT appearance embedding of a track (None if it has none)"""
+        if not getattr(track, 'features', None):
+            return None
+        return track.get_feature()
 
-        return detections
+    def process_frame(self, frame, run_inference=True, detections=None, draw=True):
+        """
+        Detection + Tracking + Re-ID + Zone counting
 
-    def process_frame(self, frame, run_inference=True):
-        """Detection + Tracking + Re-ID + Zone counting"""
+        detections: optional pre-computed YOLO output for this frame (e.g. from
+        detect_people_batch). When given, the per-camera YOLO call is skipped.
+        draw: render boxes, labels, zones and heatmap onto the frame. main.py
+        turns it off when nobody is watching the camera.
+        """
         current_time = time.time()
         
         # FPS Calculation
@@ -113,9 +186,12 @@ class PeopleCountingSystem:
         
         self.imH, self.imW = frame.shape[:2]
         
-        detections = []
-        if run_inference:
+        if detections is not None:
+            pass # Batched upstream (main.py)
+        elif run_inference:
             detections = self.detect_people(frame)
+        else:
+            detections = []
             
             # DEBUG: Draw RAW YOLO Detections (Yellow)
             # for det in detections:
@@ -130,29 +206,64 @@ class PeopleCountingSystem:
         tracks = self.tracker.update_tracks(detections, frame=frame)
         # print(f"DEBUG: Tracker returned {len(tracks)} tracks")
 
-        heatmap_points = []
+        # Pass 1: visible tracks + crops, so every track that still needs Re-ID
+        # is embedded in one batched forward pass instead of one pass each
+        visible = []
         for track in tracks:
             # Show tracks that are confirmed OR have at least 1 hit (immediate feedback)
             if not track.is_confirmed() and (not hasattr(track, 'hits') or track.hits < 1):
                 continue
-
-            track_id = track.track_id
             x1, y1, x2, y2 = map(int, track.to_ltrb())
+            visible.append((track, (x1, y1, x2, y2)))
+
+        # Crops for Re-ID (clamped: predicted boxes can leave the frame)
+        crops = []
+        for _, (x1, y1, x2, y2) in visible:
+            crops.append(frame[max(y1, 0):max(y2, 0), max(x1, 0):max(x2, 0)])
+
+        track_features = None
+        if Config.REID_FEATURE_SOURCE == "tracker":
+            track_features = [self._track_embedding(t) for t, _ in visible]
+        track_ids = [t.track_id for t, _ in visible]
+        if self.reid_worker is not None:
+            # Non-blocking: unresolved tracks keep -track_id until the worker is done
+            global_ids = self.reid_worker.get_global_ids(track_ids, crops, features=track_features)
+        else:
+            global_ids = self.reid_gallery.get_global_ids(track_ids, crops, features=track_features)
 
-            # Crop for Re-ID
-            crop = frame[y1:y2, x1:x2]
-            global_id = self.reid_gallery.get_global_id(track_id, crop)
+        zone_mask, zone_set = self._zone_engine()
+        tripwire_set = self._tripwire_engine()
 
-            # Centroid
-            cx, cy = calculate_centroid(x1, y1, x2, y2)
+        # Tracks resolved since last frame: zones count their provisional visit,
+        # tripwires carry on from its last centroid
+        provisional_now = set()
+        for tid, global_id in zip(track_ids, global_ids):
+            if global_id < 0:
+                provisional_now.add(tid)
+            elif tid in self.provisional_tracks:
+                zone_set.resolve_provisional(-int(tid), global_id, current_time)
+                tripwire_set.resolve_provisional(-int(tid), global_id)
+
+        # Pass 2: counting + drawing
+        heatmap_points = []
+        centroids = {}
+        points = [calculate_centroid(*box) for _, box in visible]
+        # Every zone containing every centroid: one mask lookup per track,
+        # then all entries / exits of the frame in one vectorised step
+        membership = zone_mask.lookup(points)
+        zone_set.update(global_ids, points, membership, current_time)
+        # Directed line crossings since the previous frame
+        tripwire_set.update(global_ids, points)
+        for (track, (x1, y1, x2, y2)), global_id, (cx, cy), inside in zip(visible, global_ids, points, membership):
+            centroids[track.track_id] = (cx, cy)
 
             heatmap_points.append({'centroid': (cx, cy)})
 
-            current_zone = None
-            for zone in self.zones:
-                zone.count_entry(global_id, (cx, cy))
-                if zone.is_inside((cx, cy)):
-                    current_zone = zone.id
+            if not draw:
+                continue
+
+            inside_zones = np.flatnonzero(inside)
+            current_zone = self.zones[inside_zones[-1]].id if len(inside_zones) else None
 
             color = Config.COLOR_GREEN if current_zone else Config.COLOR_BLUE
             cv2.rectangle(frame, (x1, y1), (x2, y2), color, Config.BOX_THICKNESS)
@@ -181,28 +292,40 @@ class PeopleCountingSystem:
             for t in tracks if t.is_confirmed()
         }
         
-        # Check all zones for stale IDs
-        for zone in self.zones:
-            # Safe copy to iterate
-            active_ids_copy = list(zone.active_ids)
-            for gid in active_ids_copy:
-                # If gid is valid (>=0) and NOT in current tracks, they are gone
-                if gid >= 0 and gid not in current_frame_ids:
-                    # Double check if we can easily map global ID back to verify?
-                    # Since we only store global IDs in zone, this simple check works
-                    # providing get_global_id returns the same consistent ID.
-                    zone.remove_id(gid)
+        # Check all zones for stale IDs: valid (>=0) IDs NOT in current tracks are gone
+        zone_set.remove_missing(current_frame_ids, current_time)
             
+        # Scene activity (mean displacement of tracks seen in both frames)
+        moves = [
+            abs(cx - self.last_centroids[tid][0]) + abs(cy - self.last_centroids[tid][1])
+            for tid, (cx, cy) in centroids.items() if tid in self.last_centroids
+        ]
+        self.motion = sum(moves) / len(moves) if moves else 0.0
+        self.track_count = len(centroids)
+        self.last_centroids = centroids
+
+        # Provisional IDs of tracks that are gone (or resolved) can be dropped
+        current_track_ids = {t.track_id for t in tracks}
+        provisional_ids = {-int(tid) for tid in provisional_now}
+        for zone in self.zones:
+            zone.provisional_inside &= provisional_ids
+        if self.reid_worker is not None:
+            self.reid_worker.forget(self.provisional_tracks - current_track_ids)
+        self.provisional_tracks = provisional_now
+
         # Update Heatmap (Batch)
         self.heatmap.update(heatmap_points)
 
         # Draw zones with counts
-        for zone in self.zones:
-            zone.draw(frame)
+        if draw:
+            for zone in self.zones:
+                zone.draw(frame)
+            for tripwire in self.tripwires:
+                tripwire.draw(frame)
 
         # ---------------- HEATMAP ----------------
         # ---------------- HEATMAP ----------------
-        if self.show_heatmap:
+        if self.show_heatmap and draw:
             frame = self.heatmap.apply_overlay(frame)
             
             # Save Heatmap Frame for Dashboard (Every ~0.5s)
@@ -224,6 +347,7 @@ class PeopleCountingSystem:
              # Relax check: since we skip frames, time_since_update might be 1 or 2
              if (track.is_confirmed() or (hasattr(track, 'hits') and track.hits >= 1)) and track.time_since_update <= 5:
                  live_count += 1
+        self.active_tracks = live_count
         
         # DEBUG LOGGING (Enabled)
         print(f"DEBUG: Inf={run_inference} Dets={len(detections)} Tracks={len(tracks)} Live={live_count} FPS={self.fps:.1f}")
@@ -246,18 +370,34 @@ class PeopleCountingSystem:
                      state.add_alert(z.id, msg)
                      z.last_alert_time = current_time
             
+            # Median / p90 visit length (s), None until someone has left
+            dwell_p50, dwell_p90 = [None if d is None else round(d, 1)
+                                    for d in (z.dwell_hist.quantile(0.5), z.dwell_hist.quantile(0.9))]
             zone_data.append({
                 "name": z.id,
                 "count": z.count,
                 "coords": z.coords,
-                "threshold": z.threshold
+                "threshold": z.threshold,
+                # Cumulative, for the zone samples (backend.persistence)
+                "entries": z.total_count,
+                "exits": z.exit_count,
+                "dwell_total": round(z.dwell_total, 2),
+                "dwell_hist": z.dwell_hist.to_json(),
+                "dwell_p50": dwell_p50,
+                "dwell_p90": dwell_p90
             })
 
         self.latest_stats = {
             "live_count": live_count,
             "people_count": live_count,
             "total_visitors": self.reid_gallery.next_global_id - 1,
-            "zones": zone_data
+            "zones": zone_data,
+            "tripwires": [{
+                "name": t.id,
+                "line": [t.p1, t.p2],
+                "in": t.in_count,
+                "out": t.out_count
+            } for t in self.tripwires]
         }
         
         # REMOVED: Direct requests.post call
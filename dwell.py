@@ -0,0 +1,69 @@
+import json
+
+import numpy as np
+
+# Dwell time sketch: fixed log-spaced buckets. DWELL_EDGES[i - 1] <= dwell <
+# DWELL_EDGES[i] lands in bucket i (bucket 0: under DWELL_MIN, the last one:
+# DWELL_MAX and above). Each bucket is ~17% wider than the previous one, so a
+# quantile read from the counts is within a few % of the exact value, whatever
+# the number of visits.
+DWELL_BUCKETS = 64
+DWELL_MIN = 1.0          # s
+DWELL_MAX = 4 * 3600.0   # s
+DWELL_EDGES = np.geomspace(DWELL_MIN, DWELL_MAX, DWELL_BUCKETS - 1)
+
+
+class DwellHistogram:
+    """
+    Completed visit durations of a zone as bucket counts (a streaming quantile
+    sketch): constant size, and histograms of any set of intervals / zones
+    merge by adding their counts.
+    """
+
+    def __init__(self, counts=None):
+        self.counts = np.zeros(DWELL_BUCKETS, dtype=np.int64)
+        if counts is not None:
+            self.counts += counts
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    def add(self, seconds):
+        self.counts[np.searchsorted(DWELL_EDGES, seconds, side='right')] += 1
+
+    def merge(self, other):
+        self.counts += other.counts
+        return self
+
+    def quantile(self, q):
+        """Dwell (s) below which a fraction q of the visits fall; None without visits"""
+        total = self.total
+        if not total:
+            return None
+        cum = np.cumsum(self.counts)
+        rank = q * total
+        i = min(int(np.searchsorted(cum, rank, side='left')), DWELL_BUCKETS - 1)
+        if i == DWELL_BUCKETS - 1:
+            return float(DWELL_EDGES[-1])
+        # Interpolate inside the bucket (linearly in bucket 0, geometrically above)
+        frac = (rank - (cum[i - 1] if i else 0)) / self.counts[i]
+        hi = DWELL_EDGES[i]
+        if i == 0:
+            return float(frac * hi)
+        lo = DWELL_EDGES[i - 1]
+        return float(lo * (hi / lo) ** frac)
+
+    def to_json(self):
+        """Sparse {bucket: count} (JSON keys are strings), for the payload / DB"""
+        return {str(i): int(self.counts[i]) for i in np.flatnonzero(self.counts)}
+
+    @classmethod
+    def from_json(cls, data):
+        """From to_json() output, or its JSON text (ZoneSample.dwell_hist); None -> empty"""
+        hist = cls()
+        if isinstance(data, str):
+            data = json.loads(data)
+        for i, n in (data or {}).items():
+            hist.counts[int(i)] += n
+        return hist
@@ -3,10 +3,13 @@ import time
 
 # ===== Milestone 1 imports =====
 import zones
-from camera_feed import start_camera, read_frame, stop_camera
+from camera_feed import CameraReader
 
 # ===== Milestone 2 imports =====
-from detection import PeopleCountingSystem
+from detection import PeopleCountingSystem, detect_people_batch
+from scheduler import InferenceScheduler
+from motion import MotionGate
+from backend.broadcaster import rate_limit
 import requests
 
 print("""
@@ -41,11 +44,10 @@ def parse_arguments():
     parser.add_argument("--headless", action="store_true", help="Run without UI windows")
     return parser.parse_args()
 
-# Headless Main Loop for Background Thread
-def run_detection_headless(args_source=None, stop_event=None, headless=True, state_manager=None):
-    # Parse args if not provided path
-    # If called from app.py, args_source is expected (or default)
-    # If state_manager is provided, use it instead of HTTP requests
+def resolve_sources(args_source=None):
+    """Turn the --source string (index, file, url or comma list) into a list of sources"""
+    if isinstance(args_source, (list, tuple)):
+        return list(args_source) # Already resolved (camera_pool workers)
 
     # Determine source
     raw_source = args_source
@@ -111,6 +113,19 @@ def run_detection_headless(args_source=None, stop_event=None, headless=True, sta
         sources = [0]
 
     print(f"DEBUG: Final Resolved Sources: {sources}")
+    return sources
+
+# Headless Main Loop for Background Thread
+def run_detection_headless(args_source=None, stop_event=None, headless=True, state_manager=None,
+                           reid_gallery=None, reid_worker=None, camera_offset=0):
+    # Parse args if not provided path
+    # If called from app.py, args_source is expected (or default)
+    # If state_manager is provided, use it instead of HTTP requests
+    # reid_gallery / reid_worker: use these instead of building them (camera_pool
+    # workers pass a client of the parent's gallery). camera_offset: index of the
+    # first camera here among all cameras (zone files, labels, payload keys).
+
+    sources = resolve_sources(args_source)
     
     # ---------- LOAD ZONES ----------
     zones.load_zones()
@@ -122,31 +137,43 @@ def run_detection_headless(args_source=None, stop_event=None, headless=True, sta
     # Simple retry/lock prevention
     try:
         shared_yolo = YOLO(Config.YOLO_MODEL)
-        feature_extractor = FeatureExtractor()
-        shared_gallery = ReIDGallery(feature_extractor)
+        shared_gallery = reid_gallery
+        if shared_gallery is None:
+            feature_extractor = None
+            if Config.REID_FEATURE_SOURCE != "tracker":
+                feature_extractor = FeatureExtractor()
+            shared_gallery = ReIDGallery(feature_extractor)
+        if reid_worker is None and reid_gallery is None and Config.REID_ASYNC:
+            from reid_worker import ReIDWorker
+            reid_worker = ReIDWorker(shared_gallery)
     except Exception as e:
         print(f"Model Init Error: {e}")
         return
 
     # ---------- OPEN CAMERAS ----------
     from zones import ZoneManager
-    caps = []
+    readers = []
     systems = []
     zone_managers = []
+    schedulers = []
+    gates = []
 
     for i, src in enumerate(sources):
-        cap = start_camera(src)
-        if cap.isOpened():
-            caps.append(cap)
-            pcs = PeopleCountingSystem(yolo_model=shared_yolo, reid_gallery=shared_gallery)
-            zm = ZoneManager(f"zones/zones_source_{i}.json")
+        reader = CameraReader(src) # Decodes on its own thread
+        if reader.isOpened():
+            readers.append(reader)
+            pcs = PeopleCountingSystem(yolo_model=shared_yolo, reid_gallery=shared_gallery, reid_worker=reid_worker)
+            zm = ZoneManager(f"zones/zones_source_{camera_offset + i}.json")
             zone_managers.append(zm)
             pcs.zones = pcs._convert_zones(zm.zones)
+            pcs.tripwires = pcs._convert_tripwires(zm.tripwires)
             systems.append(pcs)
+            schedulers.append(InferenceScheduler())
+            gates.append(MotionGate())
         else:
             print(f"Failed to open source: {src}")
 
-    if not caps:
+    if not readers:
         print("No cameras available.")
         return
 
@@ -157,8 +184,12 @@ def run_detection_headless(args_source=None, stop_event=None, headless=True, sta
     import numpy as np
     
     last_update = time.time() # Initialize timer
+    last_checkpoint = time.time()
     last_frame_write = 0
     frame_count = 0
+    last_seqs = [None] * len(readers)      # Last frame seq processed per camera
+    last_outputs = [None] * len(readers)   # Last annotated frame per camera
+    next_encode = {}                       # (camera, quality) -> next due time (viewer max fps)
 
 
     # MAIN LOOP
@@ -178,41 +209,92 @@ def run_detection_headless(args_source=None, stop_event=None, headless=True, sta
             
             # Use 'active' flag to stop safely if needed? For now Infinite.
             
-            for i, cap in enumerate(caps):
-                frame = read_frame(cap)
+            # 1. GRAB the newest frame from every camera (non-blocking).
+            # None = no new frame since last time: that camera is not re-processed.
+            raw_frames = []
+            for i, reader in enumerate(readers):
+                frame, last_seqs[i] = reader.read(last_seqs[i])
+                
+                # Enforce standard resolution for web consistency & zone mapping
+                if frame is not None and (frame.shape[1] != 640 or frame.shape[0] != 360):
+                    frame = cv2.resize(frame, (640, 360))
+                raw_frames.append(frame)
+            fresh = [frame is not None for frame in raw_frames]
+            if not any(fresh):
+                time.sleep(0.005) # Every camera is behind the loop; wait for the decoders
+
+            # 2. SMART FRAME SKIPPING
+            # Each camera runs YOLO every `stride` frames, chosen from its measured
+            # cost, motion and track count (scheduler.InferenceScheduler).
+            # DeepSort PREDICTS positions on the skipped frames.
+            due_flags = [fresh[i] and sched.should_run() for i, sched in enumerate(schedulers)]
+
+            # MOTION GATE: no change in the scene and nobody tracked -> no YOLO at all
+            # (process_frame still runs so DeepSort ages out old tracks)
+            if Config.MOTION_GATE:
+                open_flags = [fresh[i] and gates[i].is_open(raw_frames[i], systems[i].active_tracks) for i in range(len(raw_frames))]
+            else:
+                open_flags = [True] * len(raw_frames)
+            run_flags = [due and is_open for due, is_open in zip(due_flags, open_flags)]
+
+            # 3. BATCHED INFERENCE: one YOLO pass over the cameras due this iteration
+            # (shared_yolo is shared anyway; batch size N instead of N x batch size 1)
+            batch_detections = [None] * len(raw_frames)
+            batch_share = 0.0
+            due = [i for i, run in enumerate(run_flags) if run]
+            if Config.BATCHED_INFERENCE and len(due) > 1:
+                t0 = time.time()
+                for i, dets in zip(due, detect_people_batch(shared_yolo, [raw_frames[i] for i in due])):
+                    batch_detections[i] = dets
+                batch_share = (time.time() - t0) / len(due)
+
+            # 4. WHO WATCHES: encode (and draw) only for cameras with /video_feed viewers,
+            # once per JPEG quality they asked for and no faster than they asked for
+            now = time.time()
+            encode_qualities = []
+            for i in range(len(raw_frames)):
+                due_qualities = []
+                if state_manager and fresh[i]:
+                    for quality, max_fps in state_manager.stream_demand(camera_offset + i).items():
+                        if max_fps:
+                            due, next_encode[(i, quality)] = rate_limit(next_encode.get((i, quality), 0.0), now, max_fps)
+                            if not due:
+                                continue
+                        due_qualities.append(quality)
+                encode_qualities.append(due_qualities)
+
+            # 5. TRACK + COUNT per camera with its own detections
+            for i, frame in enumerate(raw_frames):
                 if frame is None:
-                    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                    frame = read_frame(cap)
-                    if frame is None:
-                         frame = np.zeros((360, 640, 3), dtype=np.uint8)
+                    # Nothing new from this camera: show its last output again
+                    if last_outputs[i] is None:
+                        last_outputs[i] = np.zeros((360, 640, 3), dtype=np.uint8)
+                    frames.append(last_outputs[i])
+                    active_sources += 1
+                    continue
+
+                t0 = time.time()
+                draw = not headless or bool(encode_qualities[i])
+                frame = systems[i].process_frame(frame, run_inference=run_flags[i], detections=batch_detections[i], draw=draw)
+                elapsed = time.time() - t0
+                if batch_detections[i] is not None:
+                    elapsed += batch_share
+                schedulers[i].record(run_flags[i], elapsed, systems[i].track_count, systems[i].motion)
+                gates[i].record(due_flags[i] and not open_flags[i], elapsed, schedulers[i].inference_cost)
+                # print(f"Processing time: {elapsed:.4f}s | Inference: {run_flags[i]}")
                 
-                if frame is not None:
-                    # Enforce standard resolution for web consistency & zone mapping
-                    if frame.shape[1] != 640 or frame.shape[0] != 360:
-                        frame = cv2.resize(frame, (640, 360))
-                        
-                    # t0 = time.time()
-                    
-                    # SMART FRAME SKIPPING
-                    # Run YOLO every 2nd frame. 
-                    # This doubles FPS while keeping high accuracy.
-                    # DeepSort PREDICTS positions on the skipped frame.
-                    # run_inference = (frame_count % 2 == 0)
-                    run_inference = True
-                    
-                    frame = systems[i].process_frame(frame, run_inference=run_inference)
-                    # print(f"Processing time: {time.time()-t0:.4f}s | Inference: {run_inference}")
-                    
-                    # Draw Zones? Yes, for the web view.
-                    # We can use the PeopleCountingSystem's internal drawing or ZM
-                    # ZM draw_preview is handy
+                # Draw Zones? Yes, for the web view.
+                # We can use the PeopleCountingSystem's internal drawing or ZM
+                # ZM draw_preview is handy
+                if draw:
                     if zone_managers[i].preview_mode:
                         zone_managers[i].draw_preview(frame)
                         # Existing zones are drawn by process_frame usually if configured
                     
-                    cv2.putText(frame, f"CAM {i+1}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255,255,0), 2)
-                    frames.append(frame)
-                    active_sources += 1
+                    cv2.putText(frame, f"CAM {camera_offset + i + 1}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255,255,0), 2)
+                frames.append(frame)
+                last_outputs[i] = frame
+                active_sources += 1
             
             frame_count += 1
             
@@ -222,6 +304,7 @@ def run_detection_headless(args_source=None, stop_event=None, headless=True, sta
             # AGGREGATE & SEND
             total_live = 0
             aggregated_zones_by_cam = {}
+            aggregated_tripwires_by_cam = {}
 
             # Collect stats
             for i, sys in enumerate(systems):
@@ -231,9 +314,12 @@ def run_detection_headless(args_source=None, stop_event=None, headless=True, sta
                  cam_zones = []
                  for z in stats.get("zones", []):
                      nz = z.copy()
-                     nz['name'] = f"C{i+1}: {z['name']}"
+                     nz['name'] = f"C{camera_offset + i + 1}: {z['name']}"
                      cam_zones.append(nz)
-                 aggregated_zones_by_cam[str(i)] = cam_zones
+                 aggregated_zones_by_cam[str(camera_offset + i)] = cam_zones
+                 aggregated_tripwires_by_cam[str(camera_offset + i)] = [
+                     {**t, "name": f"C{camera_offset + i + 1}: {t['name']}"} for t in stats.get("tripwires", [])
+                 ]
 
             max_global_id = shared_gallery.next_global_id - 1
             current_total = max(max_global_id, total_live)
@@ -245,10 +331,14 @@ def run_detection_headless(args_source=None, stop_event=None, headless=True, sta
             if time.time() - last_update > 0.5: # 2 FPS update
                 last_update = time.time() # Reset timer
                 cam_status = {
-                    str(i): {
+                    str(camera_offset + i): {
                         "source": str(src),
                         "resolution": f"{systems[i].imW}x{systems[i].imH}",
-                        "fps": int(systems[i].fps)
+                        "fps": int(systems[i].fps),
+                        "people_count": systems[i].latest_stats.get("people_count", 0),
+                        **schedulers[i].status(), # stride, detect_fps, latency_ms
+                        **gates[i].status(), # motion_skip_ratio, cpu_saved_pct
+                        **readers[i].metrics() # decode_fps, dropped_frames, read_failures, staleness_ms
                     } for i, src in enumerate(sources)
                 }
                 
@@ -257,8 +347,11 @@ def run_detection_headless(args_source=None, stop_event=None, headless=True, sta
                    "people_count": total_live,
                    "total_visitors": max_reported_visitors,
                    "zones": aggregated_zones_by_cam, 
+                   "tripwires": aggregated_tripwires_by_cam, # Directed in / out totals per line
                    "cameras": cam_status
                 }
+                if reid_worker:
+                    payload["reid"] = reid_worker.metrics()
                 
                 cmds = []
                 if state_manager:
@@ -289,7 +382,7 @@ def run_detection_headless(args_source=None, stop_event=None, headless=True, sta
 
                         for i, zm in enumerate(zone_managers):
                             # If cam_id is provided, only update specific index. C1 -> 0
-                            current_id_str = f"C{i+1}"
+                            current_id_str = f"C{camera_offset + i + 1}"
                             if target_cam and target_cam != current_id_str:
                                 continue
                                 
@@ -299,6 +392,14 @@ def run_detection_headless(args_source=None, stop_event=None, headless=True, sta
                             zm.save_zones()
                             systems[i].zones = systems[i]._convert_zones(zm.zones)
 
+            # Incremental Re-ID gallery checkpoint (appends changed identities only)
+            if time.time() - last_checkpoint > Config.REID_CHECKPOINT_INTERVAL:
+                last_checkpoint = time.time()
+                try:
+                    shared_gallery.checkpoint()
+                except Exception as e:
+                    print(f"Gallery Checkpoint Error: {e}")
+
              # SAVE FRAMES TO DISK (For Web Feed)
             # Save to Project Root where app.py expects them
             
@@ -310,18 +411,23 @@ def run_detection_headless(args_source=None, stop_event=None, headless=True, sta
             # No longer writing to disk. Encoding to RAM and updating State Manager.
             if state_manager:
                  for i, frame in enumerate(frames):
+                     if not fresh[i]:
+                         continue # Unchanged since the last encode
                      try:
-                         # Encode to JPG in memory
-                         ret, buffer = cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), 70])
-                         if ret:
-                             state_manager.update_frame(i, buffer.tobytes())
+                         # Encode to JPG in memory, once per quality due for this camera
+                         # (none when nobody watches); each encoded frame is fanned out
+                         # to all its viewers (FrameBroadcaster)
+                         for quality in encode_qualities[i]:
+                             ret, buffer = cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+                             if ret:
+                                 state_manager.update_frame(camera_offset + i, buffer.tobytes(), quality)
                      except Exception as e:
                          print(f"Frame Encoding Error: {e}")
 
              # --- SHOW LOCAL WINDOW IF NOT HEADLESS ---
             if not headless:
                 for i, frame in enumerate(frames):
-                    cv2.imshow(f"Camera {i+1}", frame)
+                    cv2.imshow(f"Camera {camera_offset + i + 1}", frame)
                 
                 if cv2.waitKey(1) & 0xFF == ord('q'):
                     break
@@ -341,8 +447,9 @@ def run_detection_headless(args_source=None, stop_event=None, headless=True, sta
             time.sleep(1)
 
     # Cleanup
-    for cap in caps: stop_camera(cap)
+    for reader in readers: reader.stop()
     for zm in zone_managers: zm.save_zones()
+    if reid_worker: reid_worker.stop()
     shared_gallery.save_compact()
     
     if state_manager:
@@ -352,7 +459,8 @@ def run_detection_headless(args_source=None, stop_event=None, headless=True, sta
             "active_cameras": 0,
             "live_count": 0,
             "people_count": 0,
-            "zones": {} # Optional: clear zones or keep them? better to clear/reset live usage
+            "zones": {}, # Optional: clear zones or keep them? better to clear/reset live usage
+            "tripwires": {}
         })
 
 # Legacy Entry Point (Optional)
@@ -0,0 +1,83 @@
+import time
+
+import cv2
+import numpy as np
+
+from re_id import Config
+
+
+class MotionGate:
+    """
+    Per-camera gate in front of YOLO: skip detection while the scene is static.
+
+    Each frame is downscaled to grayscale and compared with a running-average
+    background (cv2.accumulateWeighted, so slow lighting changes are absorbed).
+    The gate is open when enough pixels changed, when the camera still has
+    active tracks, or when the last detection is older than MOTION_GATE_REFRESH
+    (catches someone who walked in slower than the background adapts).
+
+    Closed frames still go through process_frame(run_inference=False), so
+    DeepSORT keeps predicting and ages lost tracks out as usual.
+    """
+
+    def __init__(self, pixel_delta=None, min_area=None, refresh=None):
+        self.pixel_delta = pixel_delta or Config.MOTION_GATE_PIXEL_DELTA
+        self.min_area = min_area or Config.MOTION_GATE_MIN_AREA
+        self.refresh = refresh or Config.MOTION_GATE_REFRESH
+
+        self.background = None    # float32 running average, MOTION_GATE_SIZE
+        self.changed = 0.0        # Fraction of changed pixels, last frame
+        self.last_open = 0.0
+
+        # Metrics
+        self.frames = 0
+        self.skipped = 0
+        self.busy = 0.0           # Seconds spent on this camera's frames (incl. the gate)
+        self.saved = 0.0          # Estimated seconds of detection avoided
+
+    def has_motion(self, frame):
+        """True if the frame differs from the background; updates the background"""
+        small = cv2.resize(frame, Config.MOTION_GATE_SIZE, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        gray = cv2.GaussianBlur(gray, (5, 5), 0).astype(np.float32)
+
+        if self.background is None:
+            self.background = gray
+            self.changed = 1.0
+            return True
+
+        diff = cv2.absdiff(gray, self.background)
+        self.changed = float(np.count_nonzero(diff > self.pixel_delta)) / diff.size
+        cv2.accumulateWeighted(gray, self.background, Config.MOTION_GATE_LEARNING_RATE)
+        return self.changed >= self.min_area
+
+    def is_open(self, frame, active_tracks=0):
+        """True if detection may run on this frame"""
+        start = time.perf_counter()
+        now = time.time()
+        is_open = self.has_motion(frame) or active_tracks > 0 or now - self.last_open > self.refresh
+        if is_open:
+            self.last_open = now
+        self.busy += time.perf_counter() - start  # Gate overhead counts against the savings
+        return is_open
+
+    def record(self, gated, elapsed, inference_cost=0.0):
+        """
+        Feed back one processed frame.
+
+        gated: detection was due but the gate skipped it
+        inference_cost: typical seconds of a frame with detection (scheduler EMA)
+        """
+        self.frames += 1
+        self.busy += elapsed
+        if gated:
+            self.skipped += 1
+            self.saved += max(0.0, inference_cost - elapsed)
+
+    def status(self):
+        frames = max(self.frames, 1)
+        total = self.busy + self.saved
+        return {
+            "motion_skip_ratio": round(self.skipped / frames, 3),
+            "cpu_saved_pct": round(100.0 * self.saved / total, 1) if total > 0 else 0.0
+        }
@@ -1,6 +1,8 @@
 import os
 import time
 import json
+import functools
+import threading
 from collections import deque
 
 import cv2
@@ -14,6 +16,31 @@ class Config:
     YOLO_CONF = 0.25 # Lowered from 0.5 to catch more people
     YOLO_CLASSES = [0]
 
+    # Where the per-camera detection loops run (backend.system_manager):
+    #   "thread" : one thread in the Flask process (main.run_detection_headless)
+    #   "process": worker processes, CAMERAS_PER_WORKER cameras each (camera_pool)
+    DETECTION_MODE = "thread"
+    CAMERAS_PER_WORKER = 1
+
+    # Run YOLO once per loop over the latest frame of every camera
+    # instead of once per camera (main.run_detection_headless)
+    BATCHED_INFERENCE = True
+
+    # Adaptive detection stride per camera (scheduler.InferenceScheduler)
+    INFERENCE_TARGET_LATENCY = 0.1    # Seconds of processing budget per frame per camera
+    INFERENCE_MAX_STRIDE = 4          # Never predict-only for more than 3 frames in a row
+    INFERENCE_MOTION_TOLERANCE = 40   # Max px a track may drift between detections
+    INFERENCE_CROWD_TRACKS = 25       # Track count considered "dense"
+
+    # Motion gate in front of YOLO (motion.MotionGate): skip detection on static
+    # scenes with no active tracks
+    MOTION_GATE = True
+    MOTION_GATE_SIZE = (160, 90)      # Downscaled (w, h) for frame differencing
+    MOTION_GATE_PIXEL_DELTA = 25      # Gray-level change that counts as "changed"
+    MOTION_GATE_MIN_AREA = 0.002      # Fraction of changed pixels that opens the gate
+    MOTION_GATE_LEARNING_RATE = 0.05  # Background running-average weight
+    MOTION_GATE_REFRESH = 5.0         # Seconds; detect at least this often anyway
+
     MAX_AGE = 90
     N_INIT = 1  # Lowered from 3 to 1 to speed up confirmation with frame skipping
     MAX_IOU_DISTANCE = 0.95 # Relaxed from 0.7 to 0.95 to handle low FPS jumps
@@ -24,6 +51,27 @@ class Config:
     # REID_MEMORY_TIME = 300
     REID_MEMORY_TIME = 63072000  # 2 Years
     REID_CONFIRM_FRAMES = 1 # Lowered from 3 to 1
+    REID_CHECKPOINT_INTERVAL = 60  # Seconds between incremental gallery checkpoints
+
+    # Where Re-ID features come from:
+    #   "extractor": separate MobileNetV2 pass per new track (FeatureExtractor)
+    #   "tracker"  : reuse DeepSORT's own per-detection embedding (no extra CNN pass)
+    # The two embedding spaces differ, so each keeps its own persisted gallery.
+    REID_FEATURE_SOURCE = "extractor"
+
+    # Resolve new tracks on a background ReIDWorker; tracks keep their
+    # provisional negative ID until resolved
+    REID_ASYNC = True
+    REID_QUEUE_SIZE = 64          # Bounded: submissions beyond this are dropped (retried next frame)
+    REID_WORKER_BATCH = 16        # Max crops embedded per worker forward pass
+    REID_RESEND_INTERVAL = 1.0    # Seconds before a camera worker process resends an unanswered track
+
+    # Gallery search: "exact" (full matrix scan) or "lsh" (reid_index.LSHIndex)
+    REID_INDEX = "exact"
+    REID_INDEX_MIN_SIZE = 5000   # Below this many stored features, scan exactly anyway
+    REID_LSH_TABLES = 24
+    REID_LSH_BITS = 14
+    REID_LSH_PROBE_RADIUS = 1
 
     # ---------------- Drawing ----------------
     FONT = cv2.FONT_HERSHEY_SIMPLEX
@@ -42,43 +90,68 @@ class Config:
 class FeatureExtractor:
     """Extracts appearance features using MobileNetV2"""
 
-    def __init__(self):
-        import torchvision.models as models
-        import torchvision.transforms as transforms
+    INPUT_SIZE = (224, 224)
+    # Global-average-pooled MobileNetV2 map: 1280 values per crop, same size
+    # as DeepSORT's mobilenet embedder. Galleries saved before pooling hold the
+    # flattened (1280, 7, 7) map (FLAT_DIM) and are pooled on load.
+    FEATURE_DIM = 1280
+    FLAT_DIM = 1280 * 7 * 7
+    MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+    STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
 
+    def __init__(self):
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
-        mobilenet = models.mobilenet_v2(pretrained=True)
-        self.model = torch.nn.Sequential(*list(mobilenet.children())[:-1])
+        mobilenet = self._backbone()
+        self.model = torch.nn.Sequential(*list(mobilenet.children())[:-1], torch.nn.AdaptiveAvgPool2d(1))
         self.model = self.model.to(self.device)
         self.model.eval()
 
-        self.transform = transforms.Compose([
-            transforms.ToPILImage(),
-            transforms.Resize((224, 224)),
-            transforms.ToTensor(),
-            transforms.Normalize(
-                mean=[0.485, 0.456, 0.406],
-                std=[0.229, 0.224, 0.225]
-            )
-        ])
+    def _backbone(self):
+        import torchvision.models as models
+        return models.mobilenet_v2(pretrained=True)
+
+    def _preprocess(self, image_crop):
+        """BGR crop -> normalised CHW float32 (same maths as the old PIL transforms)"""
+        rgb = cv2.cvtColor(image_crop, cv2.COLOR_BGR2RGB)
+        # INTER_AREA when shrinking approximates PIL's antialiased bilinear resize
+        h, w = rgb.shape[:2]
+        shrink = w > self.INPUT_SIZE[0] or h > self.INPUT_SIZE[1]
+        rgb = cv2.resize(rgb, self.INPUT_SIZE,
+                         interpolation=cv2.INTER_AREA if shrink else cv2.INTER_LINEAR)
+        arr = rgb.astype(np.float32) / 255.0
+        arr = (arr - self.MEAN) / self.STD
+        return arr.transpose(2, 0, 1)
 
     def extract(self, image_crop):
-        if image_crop is None or image_crop.size == 0:
-            return None
+        return self.extract_batch([image_crop])[0]
+
+    def extract_batch(self, image_crops):
+        """
+        Embed several crops in one forward pass.
+        Returns a list aligned with `image_crops`; None for empty/failed crops.
+        """
+        features = [None] * len(image_crops)
+        valid = [i for i, crop in enumerate(image_crops)
+                 if crop is not None and crop.size != 0]
+        if not valid:
+            return features
+
         try:
-            rgb = cv2.cvtColor(image_crop, cv2.COLOR_BGR2RGB)
-            img_tensor = self.transform(rgb).unsqueeze(0).to(self.device)
+            batch = np.stack([self._preprocess(image_crops[i]) for i in valid])
+            batch = torch.from_numpy(batch).to(self.device)
             with torch.no_grad():
-                features = self.model(img_tensor)
-
-            features = features.squeeze().cpu().numpy().flatten()
-            norm = np.linalg.norm(features)
-            if norm > 0:
-                features = features / norm
-            return features
+                out = self.model(batch)
+
+            out = out.cpu().numpy().reshape(len(valid), -1)
+            norms = np.linalg.norm(out, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            out = out / norms
+            for k, i in enumerate(valid):
+                features[i] = out[k]
         except Exception:
-            return None
+            pass
+        return features
 
 
 def cosine_similarity(feat1, feat2):
@@ -101,36 +174,263 @@ def cosine_similarity(feat1, feat2):
     return float(dot_product / (norm1 * norm2))
 
 
+# Sidecar record of the binary gallery (see ReIDGallery persistence)
+_RECORD_DTYPE = np.dtype([("gid", "<i8"), ("row", "<i8"), ("last_seen", "<f8")])
+
+
+class EmbeddingMatrix:
+    """
+    Contiguous, L2-normalised float32 store for gallery features.
+
+    Row i of `vectors` holds one stored feature and `row_to_gid[i]` its global ID
+    (-1 for free rows), so matching a query is one matrix-vector product + argmax.
+    Capacity doubles when full; rows released on eviction are reused first.
+    """
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.dim = None
+        self.vectors = None
+        self.row_to_gid = np.full(capacity, -1, dtype=np.int64)
+        self.size = 0            # Rows [0, size) have been handed out at least once
+        self.free_rows = []
+
+    def __len__(self):
+        return self.size - len(self.free_rows)
+
+    @staticmethod
+    def _normalize(vec):
+        vec = np.asarray(vec, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vec)
+        if norm > 0:
+            vec = vec / norm
+        return vec
+
+    def _grow(self, min_capacity=0):
+        new_capacity = self.capacity * 2
+        while new_capacity < min_capacity:
+            new_capacity *= 2
+        vectors = np.zeros((new_capacity, self.dim), dtype=np.float32)
+        vectors[:self.size] = self.vectors[:self.size]
+        row_to_gid = np.full(new_capacity, -1, dtype=np.int64)
+        row_to_gid[:self.size] = self.row_to_gid[:self.size]
+        self.vectors, self.row_to_gid, self.capacity = vectors, row_to_gid, new_capacity
+
+    def add(self, gid, vec):
+        """Store `vec` for `gid`; returns the row index or None on dimension mismatch"""
+        vec = self._normalize(vec)
+        if self.dim is None:
+            self.dim = vec.size
+            self.vectors = np.zeros((self.capacity, self.dim), dtype=np.float32)
+        elif vec.size != self.dim:
+            return None
+
+        if self.free_rows:
+            row = self.free_rows.pop()
+        else:
+            if self.size >= self.capacity:
+                self._grow()
+            row = self.size
+            self.size += 1
+
+        self.vectors[row] = vec
+        self.row_to_gid[row] = gid
+        return row
+
+    def extend(self, gids, vecs):
+        """Bulk-append rows (persisted gallery load); returns their row indices"""
+        vecs = np.asarray(vecs, dtype=np.float32)
+        if vecs.ndim != 2 or len(vecs) == 0:
+            return None
+        if self.dim is None:
+            self.dim = vecs.shape[1]
+            self.vectors = np.zeros((self.capacity, self.dim), dtype=np.float32)
+        elif vecs.shape[1] != self.dim:
+            return None
+
+        if self.size + len(vecs) > self.capacity:
+            self._grow(self.size + len(vecs)) # One copy, not one per doubling
+
+        # Copy once into the matrix, then normalise in place
+        rows = np.arange(self.size, self.size + len(vecs))
+        block = self.vectors[self.size:self.size + len(vecs)]
+        block[:] = vecs
+        norms = np.linalg.norm(block, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        block /= norms
+        self.row_to_gid[rows] = gids
+        self.size += len(vecs)
+        return rows
+
+    def replace(self, row, vec):
+        """Overwrite an existing row in place (oldest feature of a full identity)"""
+        vec = self._normalize(vec)
+        if vec.size != self.dim:
+            return False
+        self.vectors[row] = vec
+        return True
+
+    def release(self, row):
+        # Zeroed rows score 0.0, which can never pass the similarity threshold
+        self.vectors[row] = 0.0
+        self.row_to_gid[row] = -1
+        self.free_rows.append(row)
+
+    def search(self, query, rows=None):
+        """
+        Best row for `query` by cosine similarity -> (row, similarity) or (None, 0.0).
+        `rows` restricts the scan to a candidate subset (ANN re-ranking).
+        """
+        if self.size == 0 or query is None:
+            return None, 0.0
+        query = self._normalize(query)
+        if query.size != self.dim:
+            return None, 0.0
+
+        if rows is None:
+            sims = self.vectors[:self.size] @ query
+            row = int(np.argmax(sims))
+            return row, float(sims[row])
+
+        if len(rows) == 0:
+            return None, 0.0
+        sims = self.vectors[rows] @ query
+        best = int(np.argmax(sims))
+        return int(rows[best]), float(sims[best])
+
+
+def _locked(method):
+    """Serialise gallery access (frame loops of several cameras + ReIDWorker)"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
 class ReIDGallery:
     """
     Maintains global identity consistency using appearance features.
     """
 
-    def __init__(self, feature_extractor: FeatureExtractor):
+    def __init__(self, feature_extractor: FeatureExtractor = None):
+        # None when features are supplied by the caller (REID_FEATURE_SOURCE = "tracker")
         self.feature_extractor = feature_extractor
-        self.gallery = {}              # global_id -> {features, last_seen}
+        self.lock = threading.RLock()
+        if Config.REID_FEATURE_SOURCE == "tracker":
+            self.persist_name = "reid_gallery_tracker"
+        self.gallery = {}              # global_id -> {rows, last_seen}
+        self.matrix = EmbeddingMatrix()  # rows referenced by gallery[gid]["rows"]
+        self.index = None                # Optional ANN index over matrix rows
+        if Config.REID_INDEX == "lsh":
+            from reid_index import LSHIndex
+            self.index = LSHIndex(
+                tables=Config.REID_LSH_TABLES,
+                bits=Config.REID_LSH_BITS,
+                probe_radius=Config.REID_LSH_PROBE_RADIUS
+            )
         self.track_to_global = {}      # track_id -> global_id
         self.next_global_id = 1
         self.track_feature_buffers = {}
 
+        # Incremental checkpoint bookkeeping
+        self._persisted_rows = 0       # Rows currently in the .f32 file
+        self._persisted_row = {}       # gid -> its latest row in the .f32 file
+        self._dirty_features = set()
+        self._dirty_seen = set()
+        self._evicted = set()
+
         try:
             self._load_persistent_gallery()
         except Exception:
             pass
 
     # ---------------- Persistence ----------------
-    def _persistent_paths(self):
+    # Binary layout (data/<persist_name>.*):
+    #   .f32        raw float32 identity vectors, append-only; read through np.memmap
+    #               and copied once into the EmbeddingMatrix (load is O(file size))
+    #   .idx        append-only (gid, row, last_seen) records; the last record per
+    #               gid wins, row = -1 marks an evicted identity
+    #   .meta.json  {"version", "dim"}
+    # Checkpoints append only new/changed identities; save_compact rewrites all.
+    persist_name = "reid_gallery"
+
+    def _persistent_dir(self):
         root = os.path.dirname(os.path.abspath(__file__))
-        data_dir = os.path.join(root, "data")
-        json_path = os.path.join(data_dir, "reid_gallery.json")
-        return json_path
+        return os.path.join(root, "data")
+
+    def _persistent_paths(self, prefix=None):
+        if prefix is None:
+            prefix = os.path.join(self._persistent_dir(), self.persist_name)
+        return {
+            "json": prefix + ".json",   # Legacy format, migrated once
+            "features": prefix + ".f32",
+            "records": prefix + ".idx",
+            "meta": prefix + ".meta.json"
+        }
 
     def _load_persistent_gallery(self):
-        json_path = self._persistent_paths()
-        if not os.path.exists(json_path):
+        paths = self._persistent_paths()
+        if not os.path.exists(paths["meta"]) and os.path.exists(paths["json"]):
+            self._migrate_json_gallery(paths)
+            return
+        if not os.path.exists(paths["meta"]):
             return
 
-        with open(json_path, "r", encoding="utf-8") as f:
+        with open(paths["meta"], "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        dim = meta.get("dim")
+        if not dim:
+            return
+
+        feat_bytes = os.path.getsize(paths["features"]) if os.path.exists(paths["features"]) else 0
+        rec_bytes = os.path.getsize(paths["records"]) if os.path.exists(paths["records"]) else 0
+        n_rows = feat_bytes // (4 * dim)
+        n_recs = rec_bytes // _RECORD_DTYPE.itemsize
+        if n_rows == 0 or n_recs == 0:
+            return
+
+        # Whole rows/records only: a crash mid-append leaves a partial tail
+        feats = np.memmap(paths["features"], dtype=np.float32, mode="r", shape=(n_rows, dim))
+        records = np.memmap(paths["records"], dtype=_RECORD_DTYPE, mode="r", shape=(n_recs,))
+
+        # Last record per gid wins
+        newest_first = np.asarray(records[::-1])
+        _, first = np.unique(newest_first["gid"], return_index=True)
+        latest = newest_first[first]
+        latest = latest[(latest["row"] >= 0) & (latest["row"] < n_rows)]
+
+        self._persisted_rows = n_rows
+        latest = latest[np.argsort(latest["row"], kind="stable")]
+        # Compacted file: every row is live and in order, copy straight from the map
+        compact = len(latest) == n_rows and np.array_equal(latest["row"], np.arange(n_rows))
+        vecs = feats if compact else feats[latest["row"]]
+        pooled = dim == FeatureExtractor.FLAT_DIM
+        if pooled:
+            # Saved from unpooled features: average each channel's 7x7 cells
+            # (what the extractor does now; exact for single-feature identities)
+            vecs = vecs.reshape(len(vecs), FeatureExtractor.FEATURE_DIM, -1).mean(axis=2)
+        if len(latest):
+            rows = self.matrix.extend(latest["gid"], vecs)
+            if rows is not None:
+                for gid, row, file_row, last_seen in zip(latest["gid"].tolist(), rows.tolist(),
+                                                         latest["row"].tolist(), latest["last_seen"].tolist()):
+                    self.gallery[gid] = {"rows": deque([row]), "last_seen": last_seen}
+                    self._persisted_row[gid] = file_row
+                    if self.index is not None:
+                        self.index.add(row, self.matrix.vectors[row])
+        del feats, records
+
+        # CRITICAL FIX: Update next_global_id to avoid ID conflict/reset
+        self.next_global_id = max(int(meta.get("next_global_id", 1)),
+                                  max(self.gallery.keys(), default=0) + 1)
+        if pooled:
+            self.save_compact() # Checkpoints must not append pooled rows to the old file
+            print(f"DEBUG: Pooled {len(self.gallery)} gallery identities to dim {self.matrix.dim}.")
+
+    def _migrate_json_gallery(self, paths):
+        """One-time import of the legacy indented-JSON gallery into the binary format"""
+        with open(paths["json"], "r", encoding="utf-8") as f:
             try:
                 raw = json.load(f)
             except Exception:
@@ -149,14 +449,16 @@ class ReIDGallery:
 
             arr = np.asarray(feats, dtype=np.float32)
             vec = arr if arr.ndim == 1 else np.mean(arr, axis=0)
+            if vec.size == FeatureExtractor.FLAT_DIM:
+                # Unpooled feature: pool like the binary load (add() re-normalizes)
+                vec = vec.reshape(FeatureExtractor.FEATURE_DIM, -1).mean(axis=1)
 
-            norm = np.linalg.norm(vec)
-            if norm > 0:
-                vec = vec / norm
+            row = self._add_row(gid, vec)
+            if row is None:
+                continue
 
             self.gallery[gid] = {
-                "features": deque([vec.astype(np.float32)],
-                                  maxlen=Config.REID_GALLERY_SIZE),
+                "rows": deque([row]),
                 "last_seen": float(last_seen)
             }
 
@@ -166,79 +468,180 @@ class ReIDGallery:
         else:
             self.next_global_id = 1
 
-    def save_compact(self, out_path=None):
-        json_path = self._persistent_paths()
-        if out_path is None:
-            out_path = json_path
+        self.save_compact()
+        os.replace(paths["json"], paths["json"] + ".migrated")
+        print(f"DEBUG: Migrated {len(self.gallery)} identities from {paths['json']} to binary gallery.")
 
-        if not self.gallery:
-            print("DEBUG: Gallery is empty at save time!") # DEBUG
-            with open(out_path, "w", encoding="utf-8") as f:
-                json.dump({}, f)
-            return out_path
+    def _identity_vector(self, gid):
+        """Persisted form of an identity: L2-normalised mean of its stored features"""
+        arr = self._features_of(gid)
+        if arr.size == 0:
+            return None
+        vec = np.mean(arr, axis=0)
+        norm = np.linalg.norm(vec)
+        if norm > 0:
+            vec = vec / norm
+        return vec.astype(np.float32)
+
+    def _write_meta(self, paths):
+        tmp = paths["meta"] + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "dim": self.matrix.dim, "next_global_id": self.next_global_id}, f)
+        os.replace(tmp, paths["meta"])
+
+    @_locked
+    def save_compact(self, out_prefix=None):
+        """Rewrite the binary gallery with exactly one row per live identity"""
+        paths = self._persistent_paths(out_prefix)
+        out_dir = os.path.dirname(paths["features"])
+        if out_dir and not os.path.exists(out_dir):
+            os.makedirs(out_dir, exist_ok=True)
 
         print(f"DEBUG: Saving {len(self.gallery)} identities to gallery.") # DEBUG
 
-        out = {}
+        gids, vecs, seen = [], [], []
         for gid, data in self.gallery.items():
-            last = float(data.get("last_seen", time.time()))
-            arr = np.asarray(list(data.get("features", [])), dtype=np.float32)
-
-            if arr.size == 0:
-                vec = np.zeros(128, dtype=np.float32)
-            elif arr.ndim == 1:
-                vec = arr
-            else:
-                vec = np.mean(arr, axis=0)
-
-            norm = np.linalg.norm(vec)
-            if norm > 0:
-                vec = vec / norm
-
-            out[str(gid)] = {
-                "last_seen": last,
-                "feature": vec.astype(float).tolist()
-            }
-
-        json_dir = os.path.dirname(out_path)
-        if json_dir and not os.path.exists(json_dir):
-            os.makedirs(json_dir, exist_ok=True)
-
-        with open(out_path, "w", encoding="utf-8") as f:
-            json.dump(out, f, indent=2)
-
-        return out_path
+            vec = self._identity_vector(gid)
+            if vec is None:
+                continue
+            gids.append(gid)
+            vecs.append(vec)
+            seen.append(float(data.get("last_seen", time.time())))
+
+        records = np.zeros(len(gids), dtype=_RECORD_DTYPE)
+        records["gid"] = gids
+        records["row"] = np.arange(len(gids))
+        records["last_seen"] = seen
+        matrix = np.stack(vecs) if vecs else np.zeros((0, self.matrix.dim or 0), dtype=np.float32)
+
+        # Write to temp files then swap, so a crash never leaves a half gallery
+        for key, arr in (("features", matrix), ("records", records)):
+            with open(paths[key] + ".tmp", "wb") as f:
+                arr.tofile(f)
+            os.replace(paths[key] + ".tmp", paths[key])
+        self._write_meta(paths)
+
+        if out_prefix is None:
+            self._persisted_rows = len(gids)
+            self._persisted_row = dict(zip(gids, range(len(gids))))
+            self._dirty_features.clear()
+            self._dirty_seen.clear()
+            self._evicted.clear()
+
+        return paths["features"]
+
+    @_locked
+    def checkpoint(self):
+        """Append only identities changed since the last checkpoint/save"""
+        paths = self._persistent_paths()
+        if not os.path.exists(paths["meta"]):
+            return self.save_compact()
+
+        # Too many superseded rows on disk -> compact instead of appending
+        if self._persisted_rows > 2 * len(self.gallery) + 1000:
+            return self.save_compact()
+
+        new_vecs, records = [], []
+        row = self._persisted_rows
+        for gid in self._dirty_features:
+            if gid not in self.gallery:
+                continue
+            vec = self._identity_vector(gid)
+            if vec is None or vec.size != self.matrix.dim:
+                continue
+            new_vecs.append(vec)
+            records.append((gid, row, self.gallery[gid]["last_seen"]))
+            self._persisted_row[gid] = row
+            row += 1
+
+        # last_seen only changed: point the new record at the existing row
+        for gid in self._dirty_seen - self._dirty_features:
+            if gid in self.gallery and gid in self._persisted_row:
+                records.append((gid, self._persisted_row[gid], self.gallery[gid]["last_seen"]))
+
+        for gid in self._evicted - set(self.gallery):
+            if self._persisted_row.pop(gid, None) is not None:
+                records.append((gid, -1, time.time()))
+
+        if new_vecs:
+            with open(paths["features"], "ab") as f:
+                np.stack(new_vecs).astype(np.float32).tofile(f)
+        if records:
+            with open(paths["records"], "ab") as f:
+                np.array(records, dtype=_RECORD_DTYPE).tofile(f)
+        self._write_meta(paths)
+
+        self._persisted_rows = row
+        self._dirty_features.clear()
+        self._dirty_seen.clear()
+        self._evicted.clear()
+        return paths["features"]
 
     # ---------------- Matching ----------------
-    def _find_best_match(self, features):
-        best_id = None
-        best_similarity = 0.0
+    def _features_of(self, global_id):
+        """Stored feature rows of one identity as an (n, dim) array"""
+        rows = list(self.gallery[global_id]["rows"])
+        if not rows:
+            return np.zeros((0, self.matrix.dim or 0), dtype=np.float32)
+        return self.matrix.vectors[rows]
+
+    def _add_row(self, global_id, features):
+        row = self.matrix.add(global_id, features)
+        if row is not None and self.index is not None:
+            self.index.add(row, self.matrix.vectors[row])
+        return row
+
+    def _replace_row(self, row, features):
+        if not self.matrix.replace(row, features):
+            return False
+        if self.index is not None:
+            self.index.update(row, self.matrix.vectors[row])
+        return True
+
+    def _release_row(self, row):
+        self.matrix.release(row)
+        if self.index is not None:
+            self.index.remove(row)
 
-        for global_id, data in self.gallery.items():
-            for stored_features in data["features"]:
-                sim = cosine_similarity(features, stored_features)
-                if sim > best_similarity:
-                    best_similarity = sim
-                    best_id = global_id
+    def _find_best_match(self, features):
+        if self.index is not None and len(self.matrix) >= Config.REID_INDEX_MIN_SIZE:
+            # Approximate: exact re-rank of the LSH candidates only
+            row, best_similarity = self.matrix.search(features, self.index.candidates(features))
+        else:
+            row, best_similarity = self.matrix.search(features)
+        if row is None:
+            return None, 0.0
 
         if best_similarity >= Config.REID_SIMILARITY_THRESHOLD:
-            return best_id, best_similarity
+            return int(self.matrix.row_to_gid[row]), best_similarity
 
         return None, 0.0
 
-    def _update_gallery(self, global_id, image_crop):
-        features = self.feature_extractor.extract(image_crop)
+    def _update_gallery(self, global_id, features):
         if features is None:
             return
 
         if global_id not in self.gallery:
             self.gallery[global_id] = {
-                "features": deque(maxlen=Config.REID_GALLERY_SIZE),
+                "rows": deque(),
                 "last_seen": time.time()
             }
 
-        self.gallery[global_id]["features"].append(features)
+        rows = self.gallery[global_id]["rows"]
+        if len(rows) >= Config.REID_GALLERY_SIZE:
+            # Gallery full for this identity: recycle its oldest row in place
+            row = rows.popleft()
+            if self._replace_row(row, features):
+                rows.append(row)
+            else:
+                self._release_row(row)
+        else:
+            row = self._add_row(global_id, features)
+            if row is not None:
+                rows.append(row)
+
         self.gallery[global_id]["last_seen"] = time.time()
+        self._dirty_features.add(global_id)
 
     def _create_new_id(self):
         gid = self.next_global_id
@@ -246,6 +649,7 @@ class ReIDGallery:
         return gid
 
     # ---------------- Public API ----------------
+    @_locked
     def get_global_id(self, track_id, image_crop):
         if track_id in self.track_to_global:
             gid = self.track_to_global[track_id]
@@ -253,10 +657,48 @@ class ReIDGallery:
             # Just update timestamp if needed, but skip heavy feature extraction.
             if gid in self.gallery:
                  self.gallery[gid]["last_seen"] = time.time()
-            # self._update_gallery(gid, image_crop) # DISABLED for FPS
+                 self._dirty_seen.add(gid)
+            # self._update_gallery(gid, features) # DISABLED for FPS
             return gid
 
-        features = self.feature_extractor.extract(image_crop)
+        features = None
+        if self.feature_extractor is not None:
+            features = self.feature_extractor.extract(image_crop)
+        return self._resolve_track(track_id, features)
+
+    @_locked
+    def get_global_ids(self, track_ids, image_crops, features=None):
+        """
+        Batched get_global_id for all tracks of a frame: crops of tracks that
+        still need Re-ID are embedded in a single extract_batch pass.
+
+        features: optional per-track embeddings (e.g. DeepSORT's), used instead
+        of running the FeatureExtractor.
+        """
+        pending = [i for i, tid in enumerate(track_ids) if tid not in self.track_to_global]
+        if features is not None:
+            features = {i: features[i] for i in pending}
+        elif pending and self.feature_extractor is not None:
+            batch = self.feature_extractor.extract_batch([image_crops[i] for i in pending])
+            features = dict(zip(pending, batch))
+        else:
+            features = dict.fromkeys(pending)
+
+        global_ids = []
+        for i, tid in enumerate(track_ids):
+            if i in features:
+                global_ids.append(self._resolve_track(tid, features[i]))
+            else:
+                # Known track, or same track_id resolved earlier in this batch
+                global_ids.append(self.get_global_id(tid, None))
+        return global_ids
+
+    @_locked
+    def _resolve_track(self, track_id, features):
+        """Match / buffer / create an identity for an unmapped track"""
+        if track_id in self.track_to_global:
+            return self.get_global_id(track_id, None)
+
         if features is None:
             # print(f"DEBUG: Feature extraction failed for track {track_id}")
             return -int(track_id)
@@ -266,7 +708,7 @@ class ReIDGallery:
         if matched_id is not None:
             print(f"DEBUG: Matched track {track_id} to global {matched_id} (sim: {similarity:.2f})")
             self.track_to_global[track_id] = matched_id
-            self._update_gallery(matched_id, image_crop)
+            self._update_gallery(matched_id, features)
             self.track_feature_buffers.pop(track_id, None)
             return matched_id
 
@@ -293,24 +735,27 @@ class ReIDGallery:
         if matched_id is not None:
             print(f"DEBUG: Matched track {track_id} (avg) to global {matched_id} (sim: {similarity:.2f})")
             self.track_to_global[track_id] = matched_id
-            self._update_gallery(matched_id, image_crop)
+            self._update_gallery(matched_id, features)
             del self.track_feature_buffers[track_id]
             return matched_id
 
         gid = self._create_new_id()
         print(f"DEBUG: Creating NEW identity {gid} for track {track_id}")
         self.track_to_global[track_id] = gid
-        self._update_gallery(gid, image_crop)
+        self._update_gallery(gid, features)
         self.track_feature_buffers.pop(track_id, None)
         return gid
 
+    @_locked
     def remove_track(self, track_id):
         if track_id in self.track_to_global:
             gid = self.track_to_global[track_id]
             if gid in self.gallery:
                 self.gallery[gid]["last_seen"] = time.time()
+                self._dirty_seen.add(gid)
             del self.track_to_global[track_id]
 
+    @_locked
     def cleanup_old_entries(self):
         now = time.time()
         to_remove = []
@@ -320,7 +765,10 @@ class ReIDGallery:
                 to_remove.append(gid)
 
         for gid in to_remove:
+            for row in self.gallery[gid]["rows"]:
+                self._release_row(row)
             del self.gallery[gid]
+            self._evicted.add(gid)
 
         if to_remove:
             print(f"Cleaned up {len(to_remove)} old gallery entries")
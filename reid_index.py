@@ -0,0 +1,88 @@
+import numpy as np
+
+
+class LSHIndex:
+    """
+    Approximate nearest-neighbour index over EmbeddingMatrix rows (pure NumPy).
+
+    Random-hyperplane LSH (SimHash) for cosine similarity:
+    - `tables` hash tables, each keyed by `bits` hyperplane signs
+    - a query also probes every key at Hamming distance 1 when probe_radius=1
+    - candidates are re-ranked exactly against the matrix by the gallery
+
+    Rows are added / replaced / removed one at a time, so the index follows
+    ReIDGallery._update_gallery and cleanup_old_entries incrementally.
+    """
+
+    def __init__(self, tables=16, bits=10, probe_radius=1, seed=0):
+        self.tables = tables
+        self.bits = bits
+        self.probe_radius = probe_radius
+        self.rng = np.random.default_rng(seed)
+
+        self.planes = None  # (tables * bits, dim), created on first add
+        self.weights = (1 << np.arange(bits)).astype(np.int64)
+        self.buckets = [{} for _ in range(tables)]  # key -> [row, ...]
+        self.row_keys = {}                          # row -> keys per table
+
+        self.flips = [0]
+        if probe_radius >= 1:
+            self.flips += [1 << b for b in range(bits)]
+
+    def __len__(self):
+        return len(self.row_keys)
+
+    def _keys(self, vec):
+        vec = np.asarray(vec, dtype=np.float32).reshape(-1)
+        if self.planes is None:
+            self.planes = self.rng.standard_normal(
+                (self.tables * self.bits, vec.size)).astype(np.float32)
+        if vec.size != self.planes.shape[1]:
+            return None
+
+        signs = (self.planes @ vec > 0).reshape(self.tables, self.bits)
+        return signs.astype(np.int64) @ self.weights
+
+    def add(self, row, vec):
+        keys = self._keys(vec)
+        if keys is None:
+            return
+        for table, key in zip(self.buckets, keys.tolist()):
+            table.setdefault(key, []).append(row)
+        self.row_keys[row] = keys
+
+    def remove(self, row):
+        keys = self.row_keys.pop(row, None)
+        if keys is None:
+            return
+        for table, key in zip(self.buckets, keys.tolist()):
+            bucket = table.get(key)
+            if bucket is None:
+                continue
+            try:
+                bucket.remove(row)
+            except ValueError:
+                pass
+            if not bucket:
+                del table[key]
+
+    def update(self, row, vec):
+        self.remove(row)
+        self.add(row, vec)
+
+    def candidates(self, query):
+        """Row indices sharing a (probed) bucket with `query` in any table"""
+        keys = self._keys(query)
+        if keys is None:
+            return np.zeros(0, dtype=np.int64)
+
+        rows = []
+        for table, key in zip(self.buckets, keys.tolist()):
+            for flip in self.flips:
+                bucket = table.get(key ^ flip)
+                if bucket:
+                    rows.extend(bucket)
+
+        if not rows:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.asarray(rows, dtype=np.int64))
@@ -0,0 +1,148 @@
+import queue
+import threading
+import time
+
+from re_id import Config
+
+
+class ReIDWorker:
+    """
+    Resolves global IDs for new tracks off the frame loop.
+
+    process_frame submits crops (or DeepSORT embeddings) of unmapped tracks to a
+    bounded queue and keeps drawing/counting with the provisional negative ID
+    (-track_id, same convention as ReIDGallery.get_global_id). The worker thread
+    embeds queued crops in batches and resolves them against the shared gallery;
+    the next frame picks the resolved ID up from gallery.track_to_global.
+    """
+
+    def __init__(self, gallery, max_queue=None, batch_size=None):
+        self.gallery = gallery
+        self.queue = queue.Queue(maxsize=max_queue or Config.REID_QUEUE_SIZE)
+        self.batch_size = batch_size or Config.REID_WORKER_BATCH
+
+        self.lock = threading.Lock()
+        self.in_queue = set()     # track_ids currently queued
+        self.first_submit = {}    # track_id -> time of first submission (latency)
+        self.forgotten = set()    # track_ids forgotten while queued, dropped once processed
+
+        # Metrics
+        self.submitted = 0
+        self.dropped = 0
+        self.resolved = 0
+        self.latency_avg = 0.0    # Seconds, exponential moving average
+        self.latency_max = 0.0
+
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    # ---------------- Frame loop side ----------------
+    def get_global_ids(self, track_ids, image_crops, features=None):
+        """Non-blocking counterpart of ReIDGallery.get_global_ids"""
+        global_ids = []
+        for i, tid in enumerate(track_ids):
+            if tid in self.gallery.track_to_global:
+                global_ids.append(self.gallery.get_global_id(tid, None))
+                continue
+
+            feat = features[i] if features is not None else None
+            crop = image_crops[i] if feat is None else None
+            self.submit(tid, crop, feat)
+            global_ids.append(-int(tid))
+        return global_ids
+
+    def submit(self, track_id, image_crop=None, features=None):
+        """Queue a track for Re-ID. Returns False if the queue is full (dropped)."""
+        with self.lock:
+            if track_id in self.in_queue:
+                return True
+            now = time.time()
+            # Crop must outlive the frame, which gets drawn on right after
+            item = (track_id, None if image_crop is None else image_crop.copy(), features)
+            try:
+                self.queue.put_nowait(item)
+            except queue.Full:
+                self.dropped += 1
+                return False
+            self.in_queue.add(track_id)
+            self.first_submit.setdefault(track_id, now)
+            self.submitted += 1
+            return True
+
+    def forget(self, track_ids):
+        """Drop latency bookkeeping for tracks that disappeared unresolved"""
+        with self.lock:
+            for tid in track_ids:
+                if tid in self.in_queue:
+                    self.forgotten.add(tid)
+                else:
+                    self.first_submit.pop(tid, None)
+
+    def metrics(self):
+        with self.lock:
+            return {
+                "queue_depth": self.queue.qsize(),
+                "pending_tracks": len(self.first_submit),
+                "submitted": self.submitted,
+                "dropped": self.dropped,
+                "resolved": self.resolved,
+                "latency_ms_avg": round(self.latency_avg * 1000, 1),
+                "latency_ms_max": round(self.latency_max * 1000, 1)
+            }
+
+    def stop(self, timeout=2.0):
+        self.stop_event.set()
+        self.thread.join(timeout)
+
+    # ---------------- Worker side ----------------
+    def _next_batch(self):
+        try:
+            batch = [self.queue.get(timeout=0.2)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            batch = self._next_batch()
+            if not batch:
+                continue
+            try:
+                self._resolve_batch(batch)
+            except Exception as e:
+                print(f"ReID Worker Error: {e}")
+            finally:
+                with self.lock:
+                    for tid, _, _ in batch:
+                        self.in_queue.discard(tid)
+                        if tid in self.forgotten:
+                            self.forgotten.discard(tid)
+                            self.first_submit.pop(tid, None)
+
+    def _resolve_batch(self, batch):
+        # Heavy part (CNN) runs without holding the gallery lock
+        features = [f for _, _, f in batch]
+        need_crops = [i for i, f in enumerate(features) if f is None]
+        if need_crops and self.gallery.feature_extractor is not None:
+            embedded = self.gallery.feature_extractor.extract_batch([batch[i][1] for i in need_crops])
+            for i, f in zip(need_crops, embedded):
+                features[i] = f
+
+        for (tid, _, _), feat in zip(batch, features):
+            gid = self.gallery._resolve_track(tid, feat)
+            if gid < 0:
+                continue  # Still buffering / no features: resubmitted next frame
+
+            now = time.time()
+            with self.lock:
+                started = self.first_submit.pop(tid, now)
+                latency = now - started
+                self.resolved += 1
+                self.latency_avg = latency if self.resolved == 1 else 0.9 * self.latency_avg + 0.1 * latency
+                self.latency_max = max(self.latency_max, latency)
@@ -0,0 +1,93 @@
+import math
+import time
+
+from re_id import Config
+
+
+class InferenceScheduler:
+    """
+    Per-camera detection stride (run YOLO every `stride`-th frame).
+
+    DeepSORT predicts positions on skipped frames (process_frame with
+    run_inference=False). The stride is re-chosen after every frame:
+    - cost   : smallest stride whose average frame cost fits the latency budget
+               (inference frame cost amortised over stride-1 cheap tracking frames)
+    - motion : fast-moving tracks would drift too far between detections
+    - crowd  : many tracks -> prediction-only frames cause ID switches
+    Motion and crowd caps win over the cost target.
+    """
+
+    def __init__(self, target_latency=None, max_stride=None):
+        self.target_latency = target_latency or Config.INFERENCE_TARGET_LATENCY
+        self.max_stride = max_stride or Config.INFERENCE_MAX_STRIDE
+        self.stride = 1
+        self.frames_since_inference = self.max_stride  # First frame always detects
+
+        # Exponential moving averages
+        self.inference_cost = 0.0   # Seconds per frame with detection
+        self.tracking_cost = 0.0    # Seconds per frame without detection
+        self.motion = 0.0           # Mean track displacement, px/frame
+        self.track_count = 0
+
+        self.last_frame_time = 0.0
+        self.fps = 0.0              # Achieved processing FPS
+        self.latency = 0.0          # Average seconds per frame (EMA)
+
+    @staticmethod
+    def _ema(old, new, alpha=0.2):
+        return new if old == 0 else (1 - alpha) * old + alpha * new
+
+    def should_run(self):
+        """True if this frame should run detection"""
+        return self.frames_since_inference + 1 >= self.stride
+
+    def record(self, ran_inference, elapsed, track_count=0, motion=0.0):
+        """Feed back one processed frame and update the stride"""
+        now = time.time()
+        if self.last_frame_time > 0:
+            dt = now - self.last_frame_time
+            if dt > 0:
+                self.fps = self._ema(self.fps, 1.0 / dt, 0.1)
+        self.last_frame_time = now
+
+        if ran_inference:
+            self.inference_cost = self._ema(self.inference_cost, elapsed)
+            self.frames_since_inference = 0
+        else:
+            self.tracking_cost = self._ema(self.tracking_cost, elapsed)
+            self.frames_since_inference += 1
+        self.latency = self._ema(self.latency, elapsed)
+        self.track_count = track_count
+        self.motion = self._ema(self.motion, motion)
+
+        self.stride = self._choose_stride()
+        return self.stride
+
+    def _choose_stride(self):
+        # 1. Cost: (inference + (s-1) * tracking) / s <= budget
+        budget = self.target_latency
+        tracking = self.tracking_cost or 0.0
+        if self.inference_cost <= budget:
+            stride = 1
+        elif tracking >= budget:
+            stride = self.max_stride
+        else:
+            stride = math.ceil((self.inference_cost - tracking) / (budget - tracking))
+
+        # 2. Motion: drift between detections must stay within tolerance
+        cap = self.max_stride
+        if self.motion > 0:
+            cap = min(cap, max(1, int(Config.INFERENCE_MOTION_TOLERANCE / self.motion)))
+
+        # 3. Crowd: dense scenes get at most half the maximum stride
+        if self.track_count >= Config.INFERENCE_CROWD_TRACKS:
+            cap = min(cap, max(1, self.max_stride // 2))
+
+        return max(1, min(stride, cap))
+
+    def status(self):
+        return {
+            "stride": self.stride,
+            "detect_fps": round(self.fps / self.stride, 1),
+            "latency_ms": round(self.latency * 1000, 1)
+        }
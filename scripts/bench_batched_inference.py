@@ -0,0 +1,86 @@
+"""
+Benchmark: per-camera vs batched YOLO inference.
+
+Simulates N cameras by reading N staggered streams of the bundled video(s)
+and times the detection stage of run_detection_headless both ways:
+  - per-camera : one shared_yolo call per camera (batch size 1)
+  - batched    : one detect_people_batch call for all cameras
+
+Usage:
+    python scripts/bench_batched_inference.py --cameras 1 2 4 8 --iters 30
+    python scripts/bench_batched_inference.py --model yolov8n.yaml   # offline, random weights
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+import cv2
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from re_id import Config
+from detection import detect_people_batch
+
+
+def load_frames(count, width=640, height=360):
+    videos = sorted(glob.glob(os.path.join(ROOT, 'data', 'videos', '*.mp4')))
+    if not videos:
+        raise SystemExit("No videos found in data/videos")
+
+    frames = []
+    for path in videos:
+        cap = cv2.VideoCapture(path)
+        while len(frames) < count:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(cv2.resize(frame, (width, height)))
+        cap.release()
+        if len(frames) >= count:
+            break
+    return frames
+
+
+def bench(model, frames, cams, iters, batched):
+    # Camera i starts i*7 frames later so the batch holds different content
+    start = time.perf_counter()
+    for it in range(iters):
+        batch = [frames[(it + c * 7) % len(frames)] for c in range(cams)]
+        if batched:
+            detect_people_batch(model, batch)
+        else:
+            for frame in batch:
+                detect_people_batch(model, [frame])
+    elapsed = time.perf_counter() - start
+    return (iters * cams) / elapsed, elapsed / iters
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-camera vs batched YOLO benchmark")
+    parser.add_argument("--model", type=str, default=Config.YOLO_MODEL)
+    parser.add_argument("--cameras", type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument("--iters", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    args = parser.parse_args()
+
+    from ultralytics import YOLO
+    model = YOLO(args.model)
+    frames = load_frames(args.iters + 7 * max(args.cameras) + 1)
+    print(f"Model: {args.model} | Frames loaded: {len(frames)}")
+
+    # Warmup (first call builds the graph / fuses layers)
+    for _ in range(args.warmup):
+        detect_people_batch(model, frames[:max(args.cameras)])
+
+    print(f"{'cams':>4} | {'per-cam fps':>11} | {'batched fps':>11} | {'per-cam ms/iter':>15} | {'batched ms/iter':>15} | {'speedup':>7}")
+    for cams in args.cameras:
+        fps_single, it_single = bench(model, frames, cams, args.iters, batched=False)
+        fps_batch, it_batch = bench(model, frames, cams, args.iters, batched=True)
+        print(f"{cams:>4} | {fps_single:>11.1f} | {fps_batch:>11.1f} | {it_single * 1000:>15.1f} | {it_batch * 1000:>15.1f} | {fps_batch / fps_single:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
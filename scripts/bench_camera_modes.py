@@ -0,0 +1,113 @@
+"""
+Thread mode vs process mode (camera_pool) throughput at several camera counts.
+
+Every camera plays the same video file. For each mode and camera count the
+detection loop runs against a SystemState that counts published frames;
+after all cameras have produced their first frame (models loaded), frames
+published during --seconds are counted.
+
+Usage:
+    python scripts/bench_camera_modes.py --cameras 1 2 4 8 --seconds 30
+    # Offline (no yolov8n.pt / ImageNet weights): random-init YOLO, DeepSORT embeddings
+    python scripts/bench_camera_modes.py --model yolov8n.yaml --feature-source tracker
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+os.chdir(ROOT)
+
+from re_id import Config
+from backend.state import SystemState
+
+
+class CountingState(SystemState):
+    def __init__(self):
+        super().__init__()
+        self.frames = {}
+
+    def update_frame(self, cam_id, frame_bytes, *args):
+        super().update_frame(cam_id, frame_bytes, *args)
+        with self.lock:
+            self.frames[str(cam_id)] = self.frames.get(str(cam_id), 0) + 1
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.frames)
+
+
+def run(mode, cameras, args):
+    from main import run_detection_headless
+    from camera_pool import run_detection_pool
+
+    state = CountingState()
+    for cam in range(cameras):
+        state.subscribe_stream(cam) # Frames are only encoded for watched cameras
+    source = ",".join([args.video] * cameras)
+    target = run_detection_pool if mode == "process" else run_detection_headless
+    thread = threading.Thread(target=target, kwargs={"args_source": source, "state_manager": state}, daemon=True)
+    thread.start()
+
+    deadline = time.time() + args.warmup_timeout
+    while len(state.snapshot()) < cameras and time.time() < deadline:
+        time.sleep(0.2)
+    if len(state.snapshot()) < cameras:
+        state.stop_event.set()
+        thread.join(30)
+        return None
+
+    start = state.snapshot()
+    time.sleep(args.seconds)
+    end = state.snapshot()
+    state.stop_event.set()
+    thread.join(60)
+
+    per_cam = [(end[c] - start.get(c, 0)) / args.seconds for c in end]
+    return sum(per_cam), min(per_cam)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Thread vs process detection mode benchmark")
+    parser.add_argument("--video", type=str, default=os.path.join(ROOT, 'data', 'videos', 'video2.mp4'))
+    parser.add_argument("--cameras", type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument("--modes", type=str, nargs='+', default=["thread", "process"])
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--warmup-timeout", type=float, default=180)
+    parser.add_argument("--model", type=str, default=Config.YOLO_MODEL)
+    parser.add_argument("--feature-source", choices=["extractor", "tracker"], default=Config.REID_FEATURE_SOURCE)
+    args = parser.parse_args()
+
+    Config.YOLO_MODEL = args.model
+    Config.REID_FEATURE_SOURCE = args.feature_source
+
+    # Silence the per-frame DEBUG prints while timing
+    devnull = open(os.devnull, "w")
+    results = {}
+    for cameras in args.cameras:
+        for mode in args.modes:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                results[(mode, cameras)] = run(mode, cameras, args)
+            finally:
+                sys.stdout = stdout
+            r = results[(mode, cameras)]
+            if r is None:
+                print(f"{mode:>8} | {cameras:>3} cams | did not start within {args.warmup_timeout:.0f}s")
+            else:
+                print(f"{mode:>8} | {cameras:>3} cams | total {r[0]:6.1f} fps | slowest camera {r[1]:5.1f} fps")
+
+    print(f"\nCPUs: {os.cpu_count()}")
+    print(f"{'cameras':>7} | {'thread fps':>10} | {'process fps':>11} | {'speedup':>7}")
+    for cameras in args.cameras:
+        t = results.get(("thread", cameras))
+        p = results.get(("process", cameras))
+        if t and p:
+            print(f"{cameras:>7} | {t[0]:>10.1f} | {p[0]:>11.1f} | {p[0] / t[0]:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+CPU cost of drawing + JPEG-encoding frames nobody watches.
+
+Runs the same frames through PeopleCountingSystem twice:
+  - watched  : overlays drawn and the frame encoded at quality 70 (what the
+               loop used to do for every frame)
+  - unwatched: process_frame(draw=False), no encoding (headless, no viewers)
+and reports CPU time per frame (time.process_time) for each.
+
+Usage:
+    python scripts/bench_encode_skip.py --frames 300
+    # Offline (no YOLO weights): blob detector instead of YOLO
+    python scripts/bench_encode_skip.py --detector mog2
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+os.chdir(ROOT)
+
+from re_id import Config
+from detection import PeopleCountingSystem, detect_people_batch
+from bench_reid_modes import RecordingGallery, load_frames, mog2_detections
+
+
+def run(frames, detections, watched):
+    with tempfile.TemporaryDirectory() as tmp:
+        pcs = PeopleCountingSystem(yolo_model=object(), reid_gallery=RecordingGallery(None, tmp))
+        start = time.process_time()
+        for frame, dets in zip(frames, detections):
+            out = pcs.process_frame(frame.copy(), detections=dets, draw=watched)
+            if watched:
+                cv2.putText(out, "CAM 1", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
+                cv2.imencode('.jpg', out, [int(cv2.IMWRITE_JPEG_QUALITY), 70])[1].tobytes()
+        return (time.process_time() - start) * 1000 / len(frames)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Encode-skip CPU benchmark")
+    parser.add_argument("--video", type=str, default=os.path.join(ROOT, 'data', 'videos', 'video2.mp4'))
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--detector", choices=["yolo", "mog2"], default="yolo")
+    args = parser.parse_args()
+
+    Config.REID_FEATURE_SOURCE = "tracker" # No extra CNN: isolate draw/encode cost
+    frames = load_frames(args.video, args.frames)
+    if args.detector == "yolo":
+        from ultralytics import YOLO
+        model = YOLO(Config.YOLO_MODEL)
+        detections = [detect_people_batch(model, [f])[0] for f in frames]
+    else:
+        detections = mog2_detections(frames)
+
+    # Silence the per-frame DEBUG prints of process_frame while timing
+    devnull = open(os.devnull, "w")
+    stdout, sys.stdout = sys.stdout, devnull
+    try:
+        watched = run(frames, detections, True)
+        unwatched = run(frames, detections, False)
+    finally:
+        sys.stdout = stdout
+
+    print(f"Frames: {len(frames)} | Detections/frame: {sum(map(len, detections)) / len(frames):.1f}")
+    print(f"watched   (draw + encode): {watched:6.2f} ms CPU/frame")
+    print(f"unwatched (neither)      : {unwatched:6.2f} ms CPU/frame")
+    print(f"saved                    : {watched - unwatched:6.2f} ms/frame ({100 * (watched - unwatched) / watched:.1f}% of tracking+counting+encode)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Recall vs latency report: LSH gallery index vs exact matrix scan.
+
+Builds a gallery of random unit vectors, then queries with noisy copies of
+stored identities (cosine ~0.75, just above REID_SIMILARITY_THRESHOLD like a
+real re-identification). Recall@1 = ANN top-1 agrees with the exact top-1.
+
+Usage:
+    python scripts/bench_reid_ann.py --sizes 20000 100000
+    python scripts/bench_reid_ann.py --configs 16x10 24x14 32x16
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from re_id import EmbeddingMatrix, FeatureExtractor
+from reid_index import LSHIndex
+
+
+def build(n, dim, rng):
+    matrix = EmbeddingMatrix(capacity=n)
+    feats = rng.standard_normal((n, dim)).astype(np.float32)
+    feats /= np.linalg.norm(feats, axis=1, keepdims=True)
+    for gid in range(n):
+        matrix.add(gid, feats[gid])
+    return matrix, feats
+
+
+def make_queries(feats, count, noise, rng):
+    idx = rng.integers(len(feats), size=count)
+    noisy = feats[idx] + noise * rng.standard_normal((count, feats.shape[1])).astype(np.float32) / np.sqrt(feats.shape[1])
+    return noisy
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LSH vs exact Re-ID search report")
+    parser.add_argument("--sizes", type=int, nargs='+', default=[20000, 100000])
+    parser.add_argument("--dim", type=int, default=FeatureExtractor.FEATURE_DIM)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=0.85, help="Noise norm relative to the unit feature")
+    parser.add_argument("--configs", type=str, nargs='+', default=["16x10", "24x14", "32x16"],
+                        help="LSH settings as TABLESxBITS")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'identities':>10} | {'index':>12} | {'recall@1':>8} | {'ms/query':>8} | {'candidates':>10} | {'speedup':>7}")
+
+    for n in args.sizes:
+        matrix, feats = build(n, args.dim, rng)
+        queries = make_queries(feats, args.queries, args.noise, rng)
+
+        start = time.perf_counter()
+        exact = [matrix.search(q)[0] for q in queries]
+        exact_s = (time.perf_counter() - start) / len(queries)
+        print(f"{n:>10} | {'exact':>12} | {1.0:>8.3f} | {exact_s * 1000:>8.2f} | {n:>10} | {'1.0x':>7}")
+
+        for cfg in args.configs:
+            tables, bits = map(int, cfg.lower().split('x'))
+            index = LSHIndex(tables=tables, bits=bits, probe_radius=1)
+            for row in range(matrix.size):
+                index.add(row, matrix.vectors[row])
+
+            hits, cands = 0, 0
+            start = time.perf_counter()
+            for q, truth in zip(queries, exact):
+                rows = index.candidates(q)
+                cands += len(rows)
+                row, _ = matrix.search(q, rows)
+                hits += int(row == truth)
+            ann_s = (time.perf_counter() - start) / len(queries)
+
+            label = f"lsh {tables}x{bits}"
+            print(f"{n:>10} | {label:>12} | {hits / len(queries):>8.3f} | {ann_s * 1000:>8.2f} | {cands // len(queries):>10} | {exact_s / ann_s:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
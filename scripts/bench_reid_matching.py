@@ -0,0 +1,98 @@
+"""
+Microbenchmark: Re-ID gallery matching, legacy Python loop vs EmbeddingMatrix.
+
+The legacy path is the original ReIDGallery._find_best_match: for every global
+ID, for every stored feature, call cosine_similarity().
+
+Usage:
+    python scripts/bench_reid_matching.py --sizes 1000 10000 100000
+
+The default --dim is the production feature size (FeatureExtractor.FEATURE_DIM,
+also DeepSORT's embedder).
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from re_id import Config, FeatureExtractor, ReIDGallery, cosine_similarity
+
+
+class NullExtractor:
+    def extract(self, image_crop):
+        return image_crop
+
+
+class BenchGallery(ReIDGallery):
+    def _load_persistent_gallery(self):
+        pass
+
+
+def legacy_find_best_match(gallery, features):
+    best_id = None
+    best_similarity = 0.0
+
+    for global_id, data in gallery.items():
+        for stored_features in data["features"]:
+            sim = cosine_similarity(features, stored_features)
+            if sim > best_similarity:
+                best_similarity = sim
+                best_id = global_id
+
+    if best_similarity >= Config.REID_SIMILARITY_THRESHOLD:
+        return best_id, best_similarity
+
+    return None, 0.0
+
+
+def timed(fn, queries, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for q in queries:
+            fn(q)
+    return (time.perf_counter() - start) / (repeat * len(queries))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-ID matching microbenchmark")
+    parser.add_argument("--sizes", type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument("--dim", type=int, default=FeatureExtractor.FEATURE_DIM)
+    parser.add_argument("--queries", type=int, default=5)
+    parser.add_argument("--skip-legacy-above", type=int, default=100000,
+                        help="Only time the Python loop up to this gallery size")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'identities':>10} | {'legacy ms':>10} | {'matrix ms':>10} | {'speedup':>8}")
+
+    for n in args.sizes:
+        gallery = BenchGallery(NullExtractor())
+        feats = rng.standard_normal((n, args.dim)).astype(np.float32)
+        feats /= np.linalg.norm(feats, axis=1, keepdims=True)
+        for gid in range(n):
+            gallery._update_gallery(gid + 1, feats[gid])
+
+        queries = [feats[rng.integers(n)] + 0.1 * rng.standard_normal(args.dim).astype(np.float32)
+                   for _ in range(args.queries)]
+
+        matrix_s = timed(gallery._find_best_match, queries, repeat=3)
+
+        legacy_ms = "skipped"
+        speedup = "-"
+        if n <= args.skip_legacy_above:
+            legacy = {gid + 1: {"features": deque([feats[gid]])} for gid in range(n)}
+            legacy_s = timed(lambda q: legacy_find_best_match(legacy, q), queries[:2], repeat=1)
+            legacy_ms = f"{legacy_s * 1000:.2f}"
+            speedup = f"{legacy_s / matrix_s:.0f}x"
+
+        print(f"{n:>10} | {legacy_ms:>10} | {matrix_s * 1000:>10.2f} | {speedup:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Compare Re-ID feature sources: separate FeatureExtractor vs DeepSORT embeddings.
+
+Runs PeopleCountingSystem over a bundled video once per REID_FEATURE_SOURCE and
+reports per-frame time, Re-ID time and identity-quality proxies. The bundled
+videos have no ground truth, so ID switches are estimated by:
+  - collisions : frames where one global ID is shown on 2+ tracks at once
+                 (always an error)
+  - ids/track  : identities created per distinct track (fragmentation)
+
+Usage:
+    python scripts/bench_reid_modes.py --frames 300
+    # Offline (no YOLO / ImageNet weights): blob detector + untrained extractor.
+    # Timing stays representative, identity metrics do not.
+    python scripts/bench_reid_modes.py --detector mog2 --untrained-extractor
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import cv2
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+os.chdir(ROOT)
+
+from re_id import Config, FeatureExtractor, ReIDGallery
+from detection import PeopleCountingSystem, detect_people_batch
+
+
+class UntrainedExtractor(FeatureExtractor):
+    """Same network/compute as FeatureExtractor, random weights (offline timing)"""
+    def _backbone(self):
+        import torchvision.models as models
+        return models.mobilenet_v2()
+
+
+class RecordingGallery(ReIDGallery):
+    def __init__(self, feature_extractor, tmp_dir):
+        self.tmp_dir = tmp_dir
+        self.reid_time = 0.0
+        self.last_ids = []
+        super().__init__(feature_extractor)
+
+    def _persistent_dir(self):
+        return self.tmp_dir
+
+    def get_global_ids(self, track_ids, image_crops, features=None):
+        t0 = time.perf_counter()
+        ids = super().get_global_ids(track_ids, image_crops, features=features)
+        self.reid_time += time.perf_counter() - t0
+        self.last_ids = list(zip(track_ids, ids))
+        return ids
+
+
+def mog2_detections(frames):
+    """Moving blobs as person detections, for runs without YOLO weights"""
+    sub = cv2.createBackgroundSubtractorMOG2(history=200, detectShadows=False)
+    out = []
+    for frame in frames:
+        mask = sub.apply(frame)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, np.ones((3, 3), np.uint8))
+        mask = cv2.dilate(mask, np.ones((7, 7), np.uint8))
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        dets = []
+        for c in contours:
+            x, y, w, h = cv2.boundingRect(c)
+            if w * h >= 400 and h >= w:
+                dets.append(([x, y, w, h], 0.9, "person"))
+        out.append(dets)
+    return out
+
+
+def load_frames(path, count):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(cv2.resize(frame, (640, 360)))
+    cap.release()
+    return frames
+
+
+def run_mode(mode, frames, detections, args):
+    Config.REID_FEATURE_SOURCE = mode
+    extractor = None
+    if mode == "extractor":
+        extractor = UntrainedExtractor() if args.untrained_extractor else FeatureExtractor()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        gallery = RecordingGallery(extractor, tmp)
+        pcs = PeopleCountingSystem(yolo_model=object(), reid_gallery=gallery)
+
+        times = []
+        tracks_seen = set()
+        collisions = 0
+        for frame, dets in zip(frames, detections):
+            t0 = time.perf_counter()
+            pcs.process_frame(frame.copy(), detections=dets)
+            times.append(time.perf_counter() - t0)
+
+            tracks_seen.update(tid for tid, _ in gallery.last_ids)
+            shown = Counter(gid for _, gid in gallery.last_ids if gid > 0)
+            collisions += sum(1 for c in shown.values() if c > 1)
+
+        times = np.array(times) * 1000
+        identities = gallery.next_global_id - 1
+        return {
+            "frame_ms": times.mean(),
+            "p95_ms": np.percentile(times, 95),
+            "reid_ms": gallery.reid_time * 1000 / len(frames),
+            "tracks": len(tracks_seen),
+            "identities": identities,
+            "ids_per_track": identities / max(len(tracks_seen), 1),
+            "collisions": collisions,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-ID feature source comparison")
+    parser.add_argument("--video", type=str, default=os.path.join(ROOT, 'data', 'videos', 'video2.mp4'))
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--detector", choices=["yolo", "mog2"], default="yolo")
+    parser.add_argument("--untrained-extractor", action="store_true")
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.frames)
+    if args.detector == "yolo":
+        from ultralytics import YOLO
+        model = YOLO(Config.YOLO_MODEL)
+        detections = [detect_people_batch(model, [f])[0] for f in frames]
+    else:
+        detections = mog2_detections(frames)
+    print(f"Frames: {len(frames)} | Detections/frame: {sum(map(len, detections)) / len(frames):.1f}")
+
+    # Silence the per-frame DEBUG prints of process_frame while timing
+    devnull = open(os.devnull, "w")
+    results = {}
+    for mode in ("extractor", "tracker"):
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            results[mode] = run_mode(mode, frames, detections, args)
+        finally:
+            sys.stdout = stdout
+
+    print(f"{'mode':>10} | {'frame ms':>8} | {'p95 ms':>7} | {'reid ms':>7} | {'tracks':>6} | {'ids':>5} | {'ids/track':>9} | {'collisions':>10}")
+    for mode, r in results.items():
+        print(f"{mode:>10} | {r['frame_ms']:>8.1f} | {r['p95_ms']:>7.1f} | {r['reid_ms']:>7.1f} | {r['tracks']:>6} | "
+              f"{r['identities']:>5} | {r['ids_per_track']:>9.2f} | {r['collisions']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+/analytics/full_report over AnalyticsData: old queries vs grouped SQL vs cache.
+
+Fills a temporary SQLite database with --days of synthetic global occupancy
+at 1 Hz (a year = 31.5M rows) and times, for several ranges ending today:
+  old    : MAX + AVG queries, then every row of the range loaded as ORM
+           objects and bucketed by hour in Python (the previous report)
+  grouped: reports.summary_from_db with an empty cache, one GROUP BY over
+           the covering index (first request for the range)
+  cached : the same call again, every (finished) day served from the cache
+
+Usage:
+    python scripts/bench_report.py --days 365
+    python scripts/bench_report.py --days 365 --old-max-days 365   # old path on the full year too (slow, lots of RAM)
+"""
+import argparse
+import datetime
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from flask import Flask
+from sqlalchemy import func
+from backend.extensions import db
+from backend.models import AnalyticsData
+from backend.timeseries import GLOBAL_SERIES
+from backend.reports import ReportCache, summary_from_db
+
+
+def old_summary(start_dt, end_dt):
+    """The report as get_analytics_summary computed it before (3 queries, ORM rows)"""
+    peak_val = db.session.query(func.max(AnalyticsData.count)).filter(
+        AnalyticsData.zone_name == GLOBAL_SERIES,
+        AnalyticsData.timestamp >= start_dt,
+        AnalyticsData.timestamp < end_dt
+    ).scalar() or 0
+    avg_val = db.session.query(func.avg(AnalyticsData.count)).filter(
+        AnalyticsData.zone_name == GLOBAL_SERIES,
+        AnalyticsData.timestamp >= start_dt,
+        AnalyticsData.timestamp < end_dt
+    ).scalar() or 0
+    data_points = AnalyticsData.query.filter(
+        AnalyticsData.zone_name == GLOBAL_SERIES,
+        AnalyticsData.timestamp >= start_dt,
+        AnalyticsData.timestamp < end_dt
+    ).all()
+    hourly_sums, hourly_counts = {}, {}
+    for dp in data_points:
+        h = dp.timestamp.strftime("%H")
+        hourly_sums[h] = hourly_sums.get(h, 0) + dp.count
+        hourly_counts[h] = hourly_counts.get(h, 0) + 1
+    hourly_data = [0] * 24
+    for h_str, total in hourly_sums.items():
+        hourly_data[int(h_str)] = round(total / hourly_counts[h_str])
+    db.session.expunge_all()
+    return peak_val, avg_val, hourly_data
+
+
+def fill(path, days, end):
+    """1 Hz rows in SQLAlchemy's SQLite DateTime format, straight through sqlite3"""
+    seconds = np.arange(86400)
+    tod = [f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}.000000" for s in seconds]
+    hours = seconds / 3600.0
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    rng = np.random.default_rng(0)
+    for d in range(days, 0, -1):
+        day = (end - datetime.timedelta(days=d)).date().isoformat()
+        counts = np.clip(20 * np.exp(-((hours - 13) / 4) ** 2) + rng.normal(0, 2, 86400), 0, None).astype(int)
+        conn.executemany(
+            "INSERT INTO analytics_data (zone_name, count, timestamp) VALUES (?, ?, ?)",
+            zip([GLOBAL_SERIES] * 86400, counts.tolist(), [f"{day} {t}" for t in tod])
+        )
+        conn.commit()
+    conn.close()
+
+
+def timed(fn, repeat=3, warm=True):
+    if warm:
+        fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full report: old queries vs grouped SQL vs cache")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--old-max-days", type=int, default=30, help="Longest range to time the old path on")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, 'bench.db')
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + path
+        db.init_app(app)
+        end = datetime.datetime.combine(datetime.date.today(), datetime.time())
+        with app.app_context():
+            db.create_all()
+            db.engine.dispose()
+
+        start = time.perf_counter()
+        fill(path, args.days, end)
+        print(f"{args.days * 86400:,} rows ({args.days} days at 1 Hz) written in {time.perf_counter() - start:.0f}s, "
+              f"{os.path.getsize(path) / 1e9:.2f} GB\n")
+
+        with app.app_context():
+            print(f"{'range':>7} | {'old':>10} | {'grouped':>10} | {'cached':>8} | same result")
+            for days in [d for d in (1, 7, 30, 90, 365) if d <= args.days]:
+                lo = end - datetime.timedelta(days=days)
+                cache = ReportCache()
+                grouped_ms, grouped = timed(lambda: summary_from_db(GLOBAL_SERIES, lo, end, cache), repeat=1, warm=False)
+                cached_ms, cached = timed(lambda: summary_from_db(GLOBAL_SERIES, lo, end, cache), repeat=100)
+                assert cached == grouped
+                if days <= args.old_max_days:
+                    old_ms, old = timed(lambda: old_summary(lo, end), repeat=1)
+                    same = old[0] == grouped[0] and abs(float(old[1]) - grouped[1]) < 1e-6 and old[2] == grouped[2]
+                    old_s = f"{old_ms:>8.0f}ms"
+                else:
+                    old_s, same = f"{'skipped':>10}", "-"
+                print(f"{days:>5} d | {old_s} | {grouped_ms:>8.0f}ms | {cached_ms * 1000:>6.1f}us | {same}")
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Analytics report: AnalyticsData (SQL) vs the columnar time-series store.
+
+Writes --days of synthetic global occupancy, one sample every --interval
+seconds, into both a temporary SQLite AnalyticsData table and a temporary
+TimeSeriesStore, then times the /analytics/full_report computation
+(peak, average, hourly trend) for 1-day and --days-long ranges.
+
+Usage:
+    python scripts/bench_timeseries.py --days 90 --interval 30
+    python scripts/bench_timeseries.py --days 90 --interval 1    # 1 Hz, slow to generate
+"""
+import argparse
+import datetime
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from flask import Flask
+from backend.extensions import db
+from backend.models import AnalyticsData
+from backend.timeseries import TimeSeriesStore, GLOBAL_SERIES
+import backend.reports as reports
+
+
+def synthetic(days, interval, end):
+    ts = np.arange((end - datetime.timedelta(days=days)).timestamp(), end.timestamp(), interval)
+    hours = (ts % 86400) / 3600.0
+    # Busy around midday, noisy
+    values = np.clip(20 * np.exp(-((hours - 13) / 4) ** 2) + np.random.normal(0, 2, len(ts)), 0, None).round()
+    return ts, values
+
+
+def timed(fn, repeat):
+    fn() # Warm (first run loads files / fills the page cache)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analytics report: SQL vs time-series store")
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--interval", type=float, default=30, help="Seconds between samples (persistence interval)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    try:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(tmp, 'bench.db')
+        db.init_app(app)
+
+        end = datetime.datetime.combine(datetime.date.today(), datetime.time())
+        ts, values = synthetic(args.days, args.interval, end)
+        print(f"{len(ts):,} samples ({args.days} days, every {args.interval:g}s)")
+
+        start = time.perf_counter()
+        store = TimeSeriesStore(os.path.join(tmp, 'timeseries'))
+        store.extend(GLOBAL_SERIES, ts, values)
+        print(f"time-series store written in {time.perf_counter() - start:.1f}s")
+        reports.timeseries = store # What the report reads
+
+        with app.app_context():
+            db.create_all()
+            start = time.perf_counter()
+            rows = [{"zone_name": GLOBAL_SERIES, "count": int(v), "timestamp": datetime.datetime.fromtimestamp(t)}
+                    for t, v in zip(ts, values)]
+            db.session.execute(AnalyticsData.__table__.insert(), rows)
+            db.session.commit()
+            print(f"AnalyticsData rows written in {time.perf_counter() - start:.1f}s\n")
+
+            print(f"{'range':>8} | {'SQL report':>11} | {'store report':>12} | {'speedup':>7} | same peak/avg")
+            for days in sorted({1, 7, args.days}):
+                lo = end - datetime.timedelta(days=days)
+                sql_ms, sql = timed(lambda: reports.summary_from_db(GLOBAL_SERIES, lo, end), args.repeat)
+                ts_ms, fast = timed(lambda: reports.summary_from_timeseries(GLOBAL_SERIES, lo, end), args.repeat)
+                same = sql[0] == fast[0] and abs(float(sql[1]) - fast[1]) < 1e-6
+                print(f"{days:>6} d | {sql_ms:>9.1f}ms | {ts_ms:>10.2f}ms | {sql_ms / ts_ms:>6.0f}x | {same}")
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Zone membership per frame: per-zone point tests vs the rasterized ZoneMask.
+
+--zones random zones (overlapping, on a 640x360 frame) and --tracks tracks
+moving randomly over --frames frames (10 fps clock), timed four ways:
+  loop       : what process_frame did, count_entry() then is_inside() for
+               every zone and every track (two geometric tests per pair)
+  mask       : one ZoneMask lookup for all tracks, then count_entry() with the
+               membership already known
+  zoneset    : the ZoneMask lookup, then ZoneSet.update() for the whole frame
+               (vectorised transitions, what process_frame does now)
+  membership : the geometric work alone, Z x N point tests vs the lookup
+The first three must leave identical zone state. Run once with rectangles
+and once with polygons.
+
+Usage:
+    python scripts/bench_zone_mask.py --zones 100 --tracks 200 --frames 200
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from counting import Zone, ZoneMask, ZoneSet
+
+W, H = 640, 360
+
+
+def make_zones(rng, count, polygons):
+    zones = []
+    for i in range(count):
+        cx, cy = rng.integers(0, W), rng.integers(0, H)
+        if polygons:
+            angles = np.sort(rng.uniform(0, 2 * np.pi, 6))
+            radius = rng.uniform(20, 120, 6)
+            coords = [[int(cx + r * np.cos(a)), int(cy + r * np.sin(a))] for a, r in zip(angles, radius)]
+        else:
+            w, h = rng.integers(20, 200), rng.integers(20, 150)
+            coords = (int(cx - w // 2), int(cy - h // 2), int(cx + w // 2), int(cy + h // 2))
+        zones.append(Zone(f"Z{i}", coords, (0, 255, 0)))
+    return zones
+
+
+def walk(rng, tracks, frames):
+    pos = np.column_stack([rng.uniform(0, W, tracks), rng.uniform(0, H, tracks)])
+    out = []
+    for _ in range(frames):
+        pos = np.clip(pos + rng.normal(0, 8, pos.shape), 0, [W - 1, H - 1])
+        out.append([(int(x), int(y)) for x, y in pos])
+    return out
+
+
+def run_loop(zones, frames):
+    for i, points in enumerate(frames):
+        for gid, c in enumerate(points, start=1):
+            for zone in zones:
+                zone.count_entry(gid, c, now=i * 0.1)
+                zone.is_inside(c)
+
+
+def run_mask(zones, frames):
+    mask = ZoneMask(zones, W, H)
+    for i, points in enumerate(frames):
+        membership = mask.lookup(points)
+        for gid, (c, inside) in enumerate(zip(points, membership), start=1):
+            for zone, zone_inside in zip(zones, inside.tolist()):
+                zone.count_entry(gid, c, inside=zone_inside, now=i * 0.1)
+
+
+def run_zoneset(zones, frames):
+    mask, zone_set = ZoneMask(zones, W, H), ZoneSet(zones)
+    gids = np.arange(1, len(frames[0]) + 1)
+    for i, points in enumerate(frames):
+        zone_set.update(gids, points, mask.lookup(points), now=i * 0.1)
+
+
+def state(zones):
+    return [(z.total_count, sorted(z.active_ids), z.exit_count, sorted(z.counted_ids), z.left_at) for z in zones]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()): # count_entry prints every entry / exit
+        fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Zone membership: per-zone tests vs ZoneMask / ZoneSet")
+    parser.add_argument("--zones", type=int, default=100)
+    parser.add_argument("--tracks", type=int, default=200)
+    parser.add_argument("--frames", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{args.zones} zones x {args.tracks} tracks, {args.frames} frames (ms per frame)\n")
+    print(f"{'zones':>10} | {'mask build':>10} | {'loop':>8} | {'mask':>8} | {'zoneset':>8} | "
+          f"{'tests':>8} | {'lookup':>8} | same state")
+    for polygons in (False, True):
+        rng = np.random.default_rng(0)
+        frames = walk(rng, args.tracks, args.frames)
+        zones_a = make_zones(np.random.default_rng(1), args.zones, polygons)
+        zones_b = make_zones(np.random.default_rng(1), args.zones, polygons)
+        zones_c = make_zones(np.random.default_rng(1), args.zones, polygons)
+
+        loop_ms = timed(lambda: run_loop(zones_a, frames)) / args.frames
+        mask_ms = timed(lambda: run_mask(zones_b, frames)) / args.frames
+        zoneset_ms = timed(lambda: run_zoneset(zones_c, frames)) / args.frames
+        same = state(zones_a) == state(zones_b) == state(zones_c)
+
+        start = time.perf_counter()
+        mask = ZoneMask(zones_b, W, H)
+        build_ms = (time.perf_counter() - start) * 1000
+        sample = frames[:20]
+        start = time.perf_counter()
+        for points in sample:
+            [[z.is_inside(c) for z in zones_b] for c in points]
+        tests_ms = (time.perf_counter() - start) * 1000 / len(sample)
+        start = time.perf_counter()
+        for points in sample:
+            mask.lookup(points)
+        lookup_ms = (time.perf_counter() - start) * 1000 / len(sample)
+
+        kind = "polygons" if polygons else "rects"
+        print(f"{kind:>10} | {build_ms:>8.1f}ms | {loop_ms:>6.1f}ms | {mask_ms:>6.1f}ms | {zoneset_ms:>6.2f}ms | "
+              f"{tests_ms:>6.2f}ms | {lookup_ms:>6.3f}ms | {same}")
+
+
+if __name__ == "__main__":
+    main()
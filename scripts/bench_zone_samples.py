@@ -0,0 +1,99 @@
+"""
+Zone sample write throughput: one commit per snapshot vs buffered bulk inserts.
+
+Simulates --zones zones sampled at 1 Hz for --seconds seconds (timestamps are
+synthetic, nothing sleeps) and writes them to a temporary SQLite file:
+  per-sample: ORM objects added and committed every sample tick (what the
+              persistence loop did for its single global row)
+  batched   : ZoneSampler buffer flushed with persistence.write_batch every
+              --flush ticks (one executemany INSERT, one transaction)
+each with SQLite's default rollback journal and with WAL.
+
+Usage:
+    python scripts/bench_zone_samples.py --zones 50 --seconds 600 --flush 30
+"""
+import argparse
+import datetime
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from flask import Flask
+from sqlalchemy import event
+from backend.extensions import db, enable_sqlite_wal
+from backend.models import ZoneSample
+from backend.persistence import ZoneSampler, write_batch
+
+
+def live_data(zones, tick):
+    return {"zones": {"0": [{
+        "name": f"C1: Zone {z}",
+        "count": (tick + z) % 7,
+        "entries": tick // 3 + z,
+        "exits": tick // 4 + z,
+        "dwell_total": tick * 1.5
+    } for z in range(zones)]}}
+
+
+def run(mode, wal, args, tmp):
+    path = os.path.join(tmp, f"{mode}_{'wal' if wal else 'journal'}.db")
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + path
+    db.init_app(app)
+    with app.app_context():
+        if wal:
+            enable_sqlite_wal(db.engine)
+        else:
+            @event.listens_for(db.engine, "connect")
+            def journal(dbapi_connection, connection_record):
+                dbapi_connection.execute("PRAGMA journal_mode=DELETE")
+        db.create_all()
+
+        sampler = ZoneSampler()
+        start_ts = datetime.datetime(2024, 1, 1)
+        start = time.perf_counter()
+        for tick in range(args.seconds):
+            now = start_ts + datetime.timedelta(seconds=tick)
+            sampler.sample(live_data(args.zones, tick), now)
+            if mode == "per-sample":
+                for row in sampler.drain():
+                    db.session.add(ZoneSample(**row))
+                db.session.commit()
+            elif (tick + 1) % args.flush == 0:
+                write_batch(sampler.drain(), 0, now, [])
+        if mode == "batched" and sampler.buffer:
+            write_batch(sampler.drain(), 0, now, [])
+        elapsed = time.perf_counter() - start
+        rows = ZoneSample.query.count()
+        db.session.remove()
+        db.engine.dispose()
+    return rows, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Zone sample write throughput")
+    parser.add_argument("--zones", type=int, default=50)
+    parser.add_argument("--seconds", type=int, default=600, help="Simulated seconds of 1 Hz sampling")
+    parser.add_argument("--flush", type=int, default=30, help="Samples per batched flush")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    try:
+        print(f"{args.zones} zones at 1 Hz, {args.seconds} simulated seconds, batched flush every {args.flush}s")
+        print(f"{'mode':>10} | {'journal':>7} | {'rows':>7} | {'wall':>7} | {'rows/s':>9} | {'real-time headroom':>18}")
+        for mode in ("per-sample", "batched"):
+            for wal in (False, True):
+                rows, elapsed = run(mode, wal, args, tmp)
+                headroom = args.seconds / elapsed
+                print(f"{mode:>10} | {'wal' if wal else 'delete':>7} | {rows:>7} | {elapsed:>6.2f}s | {rows / elapsed:>9.0f} | {headroom:>17.0f}x")
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Polling /get_count vs the /stream/live push feed with N open dashboards.
+
+Starts the Flask app in a subprocess with a synthetic detection loop that
+publishes a live payload through SystemState at --update-hz (like
+main.py's state_manager.update). Then N clients either poll /get_count every
+--poll-ms (what dashboard.html / cameras.html did; "etag" also sends
+If-None-Match) or keep one /stream/live EventSource open. Reports HTTP
+requests/s and DB queries/s seen by the server, server CPU and the updates/s
+each client received (304s not counted).
+
+Usage:
+    python scripts/compare_live_push.py --clients 20 --seconds 20
+    python scripts/compare_live_push.py --clients 20 --poll-ms 200   # cameras.html rate
+    python scripts/compare_live_push.py --modes poll etag --update-hz 1
+Requires psutil for the CPU figure.
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+
+def serve(args):
+    """Server side: the real app + counters + a synthetic detection loop"""
+    from flask import jsonify
+    from sqlalchemy import event
+    from backend.app import create_app
+    from backend.extensions import db
+    from backend.state import state
+
+    app = create_app()
+    counters = {"requests": 0, "queries": 0}
+    lock = threading.Lock()
+
+    def count(key):
+        with lock:
+            counters[key] += 1
+
+    @app.before_request
+    def count_request():
+        count("requests")
+
+    @app.route('/_bench/counters')
+    def bench_counters():
+        with lock:
+            return jsonify(counters)
+
+    with app.app_context():
+        db.create_all()
+        event.listen(db.engine, "before_cursor_execute", lambda *a: count("queries"))
+
+    def detection():
+        visitors = 0
+        while True:
+            people = random.randint(0, 12)
+            visitors += random.randint(0, 1)
+            state.update({
+                "people_count": people,
+                "total_visitors": visitors,
+                "cameras": {"0": {"people_count": people}},
+                "zones": [{"name": "CAM 0: Entrance", "count": people // 2, "threshold": 10}]
+            })
+            time.sleep(1.0 / args.update_hz)
+
+    threading.Thread(target=detection, daemon=True).start()
+    app.run(port=args.port, threaded=True, use_reloader=False)
+
+
+class Poller(threading.Thread):
+    def __init__(self, base, interval, stop, etag=False):
+        super().__init__(daemon=True)
+        self.base = base
+        self.interval = interval
+        self.stop = stop
+        self.etag = etag
+        self.updates = 0
+
+    def run(self):
+        session = requests.Session()
+        last_etag = None
+        while not self.stop.is_set():
+            start = time.time()
+            try:
+                headers = {"If-None-Match": last_etag} if self.etag and last_etag else {}
+                resp = session.get(f"{self.base}/get_count", headers=headers, timeout=5)
+                if resp.status_code != 304:
+                    resp.json()
+                    last_etag = resp.headers.get("ETag")
+                    self.updates += 1
+            except requests.RequestException:
+                pass
+            self.stop.wait(max(0.0, self.interval - (time.time() - start)))
+
+
+class Subscriber(threading.Thread):
+    def __init__(self, base, stop):
+        super().__init__(daemon=True)
+        self.base = base
+        self.stop = stop
+        self.updates = 0
+
+    def run(self):
+        try:
+            with requests.get(f"{self.base}/stream/live", stream=True, timeout=30) as resp:
+                for line in resp.iter_lines(decode_unicode=True):
+                    if line and line.startswith("data: "):
+                        self.updates += 1
+                    if self.stop.is_set():
+                        break
+        except requests.RequestException:
+            pass
+
+
+def run_mode(mode, args, base, proc):
+    stop = threading.Event()
+    if mode in ("poll", "etag"):
+        clients = [Poller(base, args.poll_ms / 1000.0, stop, etag=mode == "etag") for _ in range(args.clients)]
+    else:
+        clients = [Subscriber(base, stop) for _ in range(args.clients)]
+    for c in clients:
+        c.start()
+    time.sleep(2)  # Connect + warm up
+
+    before = requests.get(f"{base}/_bench/counters", timeout=5).json()
+    cpu_start = proc.cpu_times() if proc else None
+    updates_start = [c.updates for c in clients]
+    time.sleep(args.seconds)
+    updates_end = [c.updates for c in clients]
+    cpu_end = proc.cpu_times() if proc else None
+    after = requests.get(f"{base}/_bench/counters", timeout=5).json()
+    stop.set()
+
+    # The two counter reads themselves are requests too
+    reqs = (after["requests"] - before["requests"] - 1) / args.seconds
+    queries = (after["queries"] - before["queries"]) / args.seconds
+    cpu = None
+    if proc:
+        used = (cpu_end.user + cpu_end.system) - (cpu_start.user + cpu_start.system)
+        cpu = 100.0 * used / args.seconds
+    per_client = sum(e - s for s, e in zip(updates_start, updates_end)) / len(clients) / args.seconds
+    return reqs, queries, cpu, per_client
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Live stats: polling vs /stream/live push")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=5056)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--poll-ms", type=float, default=500, help="Polling interval (dashboard.html: 500, cameras.html: 200)")
+    parser.add_argument("--update-hz", type=float, default=10, help="Detection loop publish rate")
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--modes", nargs='+', choices=["poll", "etag", "push"], default=["poll", "etag", "push"],
+                        help="etag = polling with If-None-Match (304 when unchanged)")
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+        print("psutil not installed: server CPU will not be reported")
+
+    server = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--serve", "--port", str(args.port),
+         "--update-hz", str(args.update_hz)],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    proc = psutil.Process(server.pid) if psutil else None
+    base = f"http://127.0.0.1:{args.port}"
+    try:
+        deadline = time.time() + 60
+        while time.time() < deadline:
+            try:
+                requests.get(f"{base}/_bench/counters", timeout=1)
+                break
+            except requests.RequestException:
+                time.sleep(0.5)
+
+        print(f"{args.clients} dashboards | detection updates: {args.update_hz:.0f}/s | poll interval: {args.poll_ms:.0f} ms")
+        print(f"{'mode':>6} | {'requests/s':>10} | {'db queries/s':>12} | {'server cpu':>10} | {'updates/s per client':>20}")
+        for mode in args.modes:
+            reqs, queries, cpu, per_client = run_mode(mode, args, base, proc)
+            cpu_s = f"{cpu:>9.1f}%" if cpu is not None else f"{'n/a':>10}"
+            print(f"{mode:>6} | {reqs:>10.1f} | {queries:>12.1f} | {cpu_s} | {per_client:>20.1f}")
+            time.sleep(1)
+    finally:
+        server.terminate()
+        server.wait(10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Load test for /video_feed: N simulated MJPEG viewers against one camera.
+
+Starts the Flask app in a subprocess with a synthetic camera (a video file
+encoded at --source-fps and published through SystemState, like the detection
+loop does), connects N streaming clients and reports server CPU and the frame
+rate each client actually received. --slow makes some clients read slowly to
+show that they only lose frames themselves.
+
+Usage:
+    python scripts/load_test_streams.py --clients 1 10 50 --seconds 15
+    python scripts/load_test_streams.py --clients 20 --slow 5 --client-fps 10 --quality 50
+Requires psutil for the CPU figure.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+
+def serve(args):
+    """Server side: the real app + a synthetic camera 0"""
+    import cv2
+    from backend.app import create_app
+    from backend.state import state
+
+    cap = cv2.VideoCapture(args.video)
+    frames = []
+    while len(frames) < 100:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(cv2.resize(frame, (640, 360)))
+    cap.release()
+
+    def camera():
+        i = 0
+        while True:
+            start = time.time()
+            frame = frames[i % len(frames)]
+            # Like the detection loop: encode only what the viewers asked for
+            for quality in state.stream_demand(0):
+                ret, buffer = cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+                state.update_frame(0, buffer.tobytes(), quality)
+            i += 1
+            time.sleep(max(0.0, 1.0 / args.source_fps - (time.time() - start)))
+
+    threading.Thread(target=camera, daemon=True).start()
+    app = create_app()
+    app.run(port=args.port, threaded=True, use_reloader=False)
+
+
+class Viewer(threading.Thread):
+    def __init__(self, url, stop, slow=False):
+        super().__init__(daemon=True)
+        self.url = url
+        self.stop = stop
+        self.slow = slow
+        self.frames = 0
+        self.error = None
+
+    def run(self):
+        try:
+            with requests.get(self.url, stream=True, timeout=10) as resp:
+                tail = b''
+                for chunk in resp.iter_content(chunk_size=16384):
+                    data = tail + chunk
+                    self.frames += data.count(b'--frame')
+                    tail = data[-7:]
+                    if self.slow:
+                        time.sleep(0.2)  # ~5 reads/s: much slower than the camera
+                    if self.stop.is_set():
+                        break
+        except Exception as e:
+            self.error = e
+
+
+def run_load(n, args):
+    url = f"http://127.0.0.1:{args.port}/video_feed/0"
+    params = []
+    if args.client_fps:
+        params.append(f"fps={args.client_fps}")
+    if args.quality:
+        params.append(f"quality={args.quality}")
+    if params:
+        url += "?" + "&".join(params)
+
+    stop = threading.Event()
+    viewers = [Viewer(url, stop, slow=i < args.slow) for i in range(n)]
+    for v in viewers:
+        v.start()
+    time.sleep(2)  # Connect + warm up
+
+    proc = args.server_proc
+    cpu_start = proc.cpu_times() if proc else None
+    counts_start = [v.frames for v in viewers]
+    time.sleep(args.seconds)
+    counts_end = [v.frames for v in viewers]
+    cpu_end = proc.cpu_times() if proc else None
+    stop.set()
+
+    fps = [(e - s) / args.seconds for s, e in zip(counts_start, counts_end)]
+    fast = fps[args.slow:] or [0.0]
+    slow = fps[:args.slow]
+    cpu = None
+    if proc:
+        used = (cpu_end.user + cpu_end.system) - (cpu_start.user + cpu_start.system)
+        cpu = 100.0 * used / args.seconds
+    errors = sum(1 for v in viewers if v.error)
+    return cpu, fast, slow, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/video_feed fan-out load test")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--video", type=str, default=os.path.join(ROOT, 'data', 'videos', 'video2.mp4'))
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--source-fps", type=float, default=25)
+    parser.add_argument("--clients", type=int, nargs='+', default=[1, 10, 50])
+    parser.add_argument("--slow", type=int, default=0, help="How many of the clients read slowly")
+    parser.add_argument("--client-fps", type=float, default=None, help="?fps= requested by every client")
+    parser.add_argument("--quality", type=int, default=None, help="?quality= requested by every client")
+    parser.add_argument("--seconds", type=float, default=15)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+        print("psutil not installed: server CPU will not be reported")
+
+    server = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--serve", "--port", str(args.port),
+         "--video", args.video, "--source-fps", str(args.source_fps)],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    args.server_proc = psutil.Process(server.pid) if psutil else None
+    try:
+        deadline = time.time() + 60
+        while time.time() < deadline:
+            try:
+                requests.get(f"http://127.0.0.1:{args.port}/get_count", timeout=1)
+                break
+            except requests.RequestException:
+                time.sleep(0.5)
+
+        print(f"Camera: {args.source_fps:.0f} fps | client fps cap: {args.client_fps or 'none'} | quality: {args.quality or 'default'}")
+        print(f"{'clients':>7} | {'server cpu':>10} | {'fps min':>7} | {'fps avg':>7} | {'slow fps':>8} | {'errors':>6}")
+        for n in args.clients:
+            cpu, fast, slow, errors = run_load(n, args)
+            cpu_s = f"{cpu:>9.1f}%" if cpu is not None else f"{'n/a':>10}"
+            slow_s = f"{sum(slow) / len(slow):>8.1f}" if slow else f"{'-':>8}"
+            print(f"{n:>7} | {cpu_s} | {min(fast):>7.1f} | {sum(fast) / len(fast):>7.1f} | {slow_s} | {errors:>6}")
+            time.sleep(1)
+    finally:
+        server.terminate()
+        server.wait(10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+
+import sys
+import os
+import threading
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.broadcaster import FrameBroadcaster, StreamClient, rate_limit
+from backend.state import SystemState
+
+class TestFrameBroadcaster(unittest.TestCase):
+    def setUp(self):
+        self.b = FrameBroadcaster()
+
+    def test_every_client_gets_the_same_object(self):
+        clients = [self.b.subscribe() for _ in range(3)]
+        frame = b'jpeg'
+        self.b.publish(frame)
+        for c in clients:
+            self.assertIs(c.next(timeout=0.1), frame)
+
+    def test_slow_client_only_gets_newest(self):
+        fast, slow = self.b.subscribe(), self.b.subscribe()
+        for i in range(5):
+            self.b.publish(bytes([i]))
+            self.assertEqual(fast.next(timeout=0.1), bytes([i]))
+        self.assertEqual(slow.next(timeout=0.1), b'\x04')
+        self.assertEqual(slow.dropped, 4)
+        self.assertEqual(fast.dropped, 0)
+
+    def test_max_fps(self):
+        client = StreamClient(max_fps=10)
+        # 25 fps camera for 2 s -> 20 frames accepted
+        for i in range(50):
+            client.offer(b'f', now=100.0 + i * 0.04)
+        self.assertEqual(50 - client.rate_skipped, 20)
+
+    def test_rate_limit_first_frame_then_interval(self):
+        due, next_due = rate_limit(0.0, 50.0, 4)
+        self.assertTrue(due)
+        self.assertEqual(next_due, 50.25)
+        self.assertEqual(rate_limit(next_due, 50.1, 4), (False, 50.25))
+
+    def test_quality_routing_and_demand(self):
+        default = self.b.subscribe()
+        low = self.b.subscribe(max_fps=5, quality=40)
+        self.b.subscribe(max_fps=10, quality=40)
+        self.assertEqual(self.b.demand(), {70: None, 40: 10})
+
+        self.b.publish(b'q40', 40)
+        self.assertIsNone(default.next(timeout=0.01))
+        self.assertEqual(low.next(timeout=0.1), b'q40')
+
+    def test_unsubscribe_wakes_and_removes(self):
+        client = self.b.subscribe()
+        threading.Timer(0.05, self.b.unsubscribe, args=(client,)).start()
+        self.assertIsNone(client.next(timeout=2.0))
+        self.assertEqual(self.b.demand(), {})
+
+    def test_state_routes_frames(self):
+        state = SystemState()
+        client = state.subscribe_stream("1")
+        state.update_frame(1, b'frame')
+        self.assertEqual(client.next(timeout=0.1), b'frame')
+        state.unsubscribe_stream("1", client)
+        self.assertEqual(state.stream_demand(1), {})
+
+    def test_frames_do_not_need_state_lock(self):
+        state = SystemState()
+        client = state.subscribe_stream("0") # Only the broadcaster's creation takes the state lock
+        with state.lock: # e.g. a slow live_data reader
+            done = threading.Event()
+            def publish_and_read():
+                state.update_frame("0", b'f')
+                if client.next(timeout=0.1) is not None:
+                    done.set()
+            t = threading.Thread(target=publish_and_read)
+            t.start()
+            self.assertTrue(done.wait(1.0))
+            t.join()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+
+import sys
+import os
+import tempfile
+import threading
+import unittest
+import multiprocessing as mp
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from re_id import Config
+from camera_pool import GalleryClient, ParentLink, CameraWorker, TRACK_KEY_SPAN, _split
+from verify_reid_gallery import VectorExtractor, TempGallery
+
+class FakeWorker(CameraWorker):
+    """CameraWorker without a process: just the parent end of a pipe"""
+    def __init__(self, index, conn):
+        self.index = index
+        self.conn = conn
+        self.payload = None
+        self.pending = {}
+        self.closed = False
+
+class TestCameraPool(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.gallery = TempGallery(VectorExtractor(), self.tmp.name)
+        self.rng = np.random.default_rng(4)
+
+        parent_conns, self.clients = [], []
+        for _ in range(2):
+            parent_conn, child_conn = mp.Pipe()
+            parent_conns.append(parent_conn)
+            self.clients.append(GalleryClient(ParentLink(child_conn, threading.Event())))
+        self.workers = [FakeWorker(i, conn) for i, conn in enumerate(parent_conns)]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def serve(self):
+        """What run_detection_pool does with Re-ID requests (synchronous gallery)"""
+        for w in self.workers:
+            while w.conn.poll():
+                kind, items = w.conn.recv()
+                self.assertEqual(kind, "reid")
+                keys = []
+                for tid, crop, _ in items:
+                    w.pending[w.key(tid)] = tid
+                    keys.append(w.key(tid))
+                self.gallery.get_global_ids(keys, [crop for _, crop, _ in items])
+            w.push_resolved(self.gallery)
+
+    def test_same_track_id_on_two_workers(self):
+        a, b = self.rng.standard_normal(32), self.rng.standard_normal(32)
+        # Both workers have a DeepSORT track "1", different people
+        self.assertEqual(self.clients[0].get_global_ids(["1"], [a]), [-1])
+        self.assertEqual(self.clients[1].get_global_ids(["1"], [b]), [-1])
+        self.serve()
+
+        ids = [c.get_global_ids(["1"], [None])[0] for c in self.clients]
+        self.assertEqual(sorted(ids), [1, 2])
+        self.assertEqual(self.clients[1].next_global_id, 3)  # Answered after both were created
+        self.assertIn(TRACK_KEY_SPAN + 1, self.gallery.track_to_global)
+
+    def test_same_person_on_two_workers(self):
+        a = self.rng.standard_normal(32)
+        self.clients[0].get_global_ids(["1"], [a])
+        self.serve()
+        self.clients[1].get_global_ids(["7"], [a + 0.01])
+        self.serve()
+        self.assertEqual(self.clients[1].get_global_ids(["7"], [None]),
+                         self.clients[0].get_global_ids(["1"], [None]))
+
+    def test_unanswered_track_sent_once(self):
+        client, worker = self.clients[0], self.workers[0]
+        a = self.rng.standard_normal(32)
+        for _ in range(3):
+            client.get_global_ids(["1"], [a])
+        worker.conn.recv()
+        self.assertFalse(worker.conn.poll())  # Not resent every frame
+
+        client.sent["1"] -= Config.REID_RESEND_INTERVAL  # No answer in time: resent
+        client.get_global_ids(["1"], [a])
+        self.assertTrue(worker.conn.poll())
+        worker.conn.recv()
+
+        client.forget(["1"])
+        self.assertNotIn("1", client.sent)
+        self.assertEqual(worker.conn.recv(), ("forget", ["1"]))
+
+    def test_commands_reach_worker(self):
+        self.workers[0].send(("command", {"action": "save_zones"}))
+        self.assertEqual(self.clients[0].link.get_and_clear_commands(), [{"action": "save_zones"}])
+        self.assertEqual(self.clients[0].link.get_and_clear_commands(), [])
+
+    def test_split(self):
+        self.assertEqual(_split([0, 1, 2, 3, 4], 2), [[0, 1], [2, 3], [4]])
+
+if __name__ == '__main__':
+    unittest.main()
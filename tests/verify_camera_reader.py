@@ -0,0 +1,109 @@
+
+import sys
+import os
+import threading
+import time
+import unittest
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from camera_feed import CameraReader
+
+class FakeCapture:
+    """cv2.VideoCapture stand-in: frame n is filled with n, reads take `delay`"""
+    def __init__(self, delay=0.001, fail_after=None):
+        self.delay = delay
+        self.fail_after = fail_after
+        self.count = 0
+        self.stall = threading.Event()
+        self.released = False
+
+    def isOpened(self):
+        return not self.released
+
+    def read(self):
+        while self.stall.is_set():
+            time.sleep(0.01)
+        time.sleep(self.delay)
+        if self.fail_after is not None and self.count >= self.fail_after:
+            return False, None
+        self.count += 1
+        return True, np.full((4, 4, 3), self.count % 256, dtype=np.uint8)
+
+    def get(self, prop):
+        return 0
+
+    def set(self, prop, value):
+        return True
+
+    def release(self):
+        self.released = True
+
+class TestCameraReader(unittest.TestCase):
+    def setUp(self):
+        self.readers = []
+
+    def tearDown(self):
+        for reader in self.readers:
+            reader.stop()
+
+    def make(self, cap):
+        reader = CameraReader("fake", cap=cap)
+        self.readers.append(reader)
+        return reader
+
+    def wait_frame(self, reader, last_seq=None, timeout=2.0):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            frame, seq = reader.read(last_seq)
+            if frame is not None:
+                return frame, seq
+            time.sleep(0.005)
+        self.fail("No frame decoded")
+
+    def test_latest_frame_and_drops(self):
+        cap = FakeCapture()
+        reader = self.make(cap)
+        self.wait_frame(reader)
+        time.sleep(0.1)  # Decoder runs ahead of the consumer
+        frame, seq = self.wait_frame(reader)
+        self.assertEqual(int(frame[0, 0, 0]), seq % 256)
+        self.assertGreater(reader.metrics()["dropped_frames"], 0)
+        self.assertGreater(reader.metrics()["decode_fps"], 0)
+
+    def test_no_new_frame_returns_none(self):
+        cap = FakeCapture()
+        reader = self.make(cap)
+        _, seq = self.wait_frame(reader)
+        cap.stall.set()
+        time.sleep(0.05)
+        _, seq = reader.read()  # Whatever was decoded before the stall
+        frame, same_seq = reader.read(seq)
+        self.assertIsNone(frame)
+        self.assertEqual(same_seq, seq)
+        cap.stall.clear()
+
+    def test_stalled_source_does_not_block(self):
+        cap = FakeCapture()
+        reader = self.make(cap)
+        _, seq = self.wait_frame(reader)
+        cap.stall.set()
+        start = time.perf_counter()
+        for _ in range(100):
+            reader.read(seq)
+        self.assertLess(time.perf_counter() - start, 0.1)
+        time.sleep(0.05)
+        self.assertGreater(reader.metrics()["staleness_ms"], 0)
+        cap.stall.clear()
+
+    def test_failed_reads_are_counted(self):
+        cap = FakeCapture(fail_after=2)
+        reader = self.make(cap)
+        reader.RETRY_DELAY = 0.01
+        time.sleep(0.2)
+        self.assertGreater(reader.metrics()["read_failures"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -50,26 +50,68 @@ class TestCountingLogic(unittest.TestCase):
 
     def test_long_absence_reset(self):
         # ID 1 enters
-        self.zone.count_entry(1, (50, 50))
+        self.zone.count_entry(1, (50, 50), now=0.0)
         # ID 1 exits
-        self.zone.count_entry(1, (150, 150))
-        
-        # Simulate passing frames
-        for _ in range(self.zone.HYSTERESIS_THRESHOLD + 5):
-            self.zone.count_entry(1, (150, 150)) # Still outside
-            
+        self.zone.count_entry(1, (150, 150), now=1.0)
+        # Still outside, within the hysteresis window: still remembered
+        self.zone.count_entry(1, (150, 150), now=1.0 + self.zone.HYSTERESIS_SECONDS)
+        self.assertIn(1, self.zone.counted_ids)
+
         # ID 1 re-enters after long time
-        self.zone.count_entry(1, (50, 50))
+        self.zone.count_entry(1, (50, 50), now=1.5 + self.zone.HYSTERESIS_SECONDS)
         
         # Should be active
         self.assertIn(1, self.zone.active_ids)
         # Should increment total count again (new session)
         self.assertEqual(self.zone.total_count, 2)
 
+    def test_departed_ids_are_forgotten(self):
+        # Counted, then the track is lost: forgotten once the window passes
+        self.zone.count_entry(1, (50, 50), now=0.0)
+        self.zone.remove_id(1, now=1.0)
+        self.assertEqual(self.zone.left_at, {1: 1.0})
+        self.assertEqual(self.zone.expire(now=2.0 + self.zone.HYSTERESIS_SECONDS), [1])
+        self.assertEqual((self.zone.counted_ids, self.zone.left_at, self.zone.entry_times), (set(), {}, {}))
+        self.assertEqual(self.zone.total_count, 1)
+
     def test_unconfirmed_id(self):
         # ID -1 (unconfirmed) should be ignored
         self.zone.count_entry(-1, (50, 50))
         self.assertEqual(self.zone.count, 0)
 
+    def test_provisional_resolution_is_counted(self):
+        # Track 7 walks through the zone while Re-ID is still pending
+        self.zone.count_entry(-7, (50, 50))
+        self.zone.count_entry(-7, (150, 150))
+        self.assertEqual(self.zone.total_count, 0)
+
+        # Resolved to global ID 3 after it already left: visit still counts once
+        self.zone.resolve_provisional(-7, 3)
+        self.assertEqual(self.zone.total_count, 1)
+        self.assertEqual(self.zone.count, 0)
+
+        # Seen inside again with the resolved ID: active, not double counted
+        self.zone.count_entry(3, (50, 50))
+        self.assertEqual(self.zone.count, 1)
+        self.assertEqual(self.zone.total_count, 1)
+
+    def test_provisional_outside_not_counted(self):
+        self.zone.count_entry(-8, (150, 150))
+        self.zone.resolve_provisional(-8, 4)
+        self.assertEqual(self.zone.total_count, 0)
+
+    def test_exits_and_dwell(self):
+        from unittest import mock
+        with mock.patch('counting.time.time', return_value=100.0):
+            self.zone.count_entry(1, (50, 50))
+            self.zone.count_entry(2, (60, 60))
+        with mock.patch('counting.time.time', return_value=112.5):
+            self.zone.count_entry(1, (150, 150))  # Walks out
+            self.zone.remove_id(2)                # Track lost inside
+            self.zone.remove_id(2)                # Already gone: no second exit
+        self.assertEqual(self.zone.exit_count, 2)
+        self.assertAlmostEqual(self.zone.dwell_total, 25.0)
+        self.assertEqual(self.zone.entry_times, {})
+
 if __name__ == '__main__':
     unittest.main()
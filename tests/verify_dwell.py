@@ -0,0 +1,63 @@
+import sys
+import os
+import json
+import contextlib
+import io
+import unittest
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dwell import DwellHistogram, DWELL_BUCKETS, DWELL_MAX
+from counting import Zone
+
+class TestDwellHistogram(unittest.TestCase):
+    def test_quantiles_close_to_exact(self):
+        rng = np.random.default_rng(0)
+        visits = rng.lognormal(3, 1, 20000) # Median ~20 s, long tail
+        hist = DwellHistogram()
+        for v in visits:
+            hist.add(v)
+        self.assertEqual(hist.total, len(visits))
+        for q in (0.5, 0.9, 0.99):
+            self.assertLess(abs(hist.quantile(q) / np.quantile(visits, q) - 1), 0.02, q)
+
+    def test_edges(self):
+        hist = DwellHistogram()
+        self.assertIsNone(hist.quantile(0.5))
+        hist.add(0.2)  # Under a second: bucket 0
+        hist.add(10 * 3600)  # Past the last edge: last bucket
+        self.assertEqual((hist.counts[0], hist.counts[-1]), (1, 1))
+        self.assertLessEqual(hist.quantile(0.5), 1.0)
+        self.assertEqual(hist.quantile(1.0), DWELL_MAX)
+
+    def test_merge_and_json(self):
+        a, b = DwellHistogram(), DwellHistogram()
+        for v in (5, 6, 7):
+            a.add(v)
+        b.add(300)
+        text = json.dumps(a.to_json())
+        merged = DwellHistogram.from_json(text).merge(DwellHistogram.from_json(b.to_json()))
+        self.assertEqual(merged.total, 4)
+        self.assertEqual(len(merged.counts), DWELL_BUCKETS)
+        self.assertGreater(merged.quantile(0.9), 100)
+        self.assertEqual(DwellHistogram.from_json(None).total, 0)
+
+class TestZoneDwell(unittest.TestCase):
+    def test_visits_closed_on_exit(self):
+        zone = Zone("Entrance", (0, 0, 100, 100), (0, 255, 0))
+        with contextlib.redirect_stdout(io.StringIO()):
+            zone.count_entry(1, (50, 50), now=0.0)
+            zone.count_entry(2, (50, 50), now=0.0)
+            zone.count_entry(1, (150, 150), now=10.0)  # Left: 10 s
+            zone.remove_id(2, now=30.0)                # Lost: 30 s
+            zone.count_entry(3, (50, 50), now=30.0)    # Still inside: not a visit yet
+        self.assertEqual(zone.dwell_hist.total, 2)
+        self.assertEqual(set(zone.entry_times), {3})
+        self.assertLess(abs(zone.dwell_hist.quantile(0.25) - 10) / 10, 0.2)
+        self.assertLess(abs(zone.dwell_hist.quantile(0.9) - 30) / 30, 0.2)
+
+if __name__ == '__main__':
+    unittest.main()
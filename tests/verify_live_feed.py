@@ -0,0 +1,101 @@
+import sys
+import os
+import json
+import threading
+import time
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.live_feed import LiveFeed
+from backend.state import SystemState
+
+def parse(event):
+    """(event name, data dict) of one SSE message"""
+    name, data = None, None
+    for line in event.strip().split("\n"):
+        if line.startswith("event: "):
+            name = line[len("event: "):]
+        elif line.startswith("data: "):
+            data = json.loads(line[len("data: "):])
+    return name, data
+
+class TestLiveFeed(unittest.TestCase):
+    def setUp(self):
+        self.state = SystemState()
+        self.builds = 0
+
+        def build():
+            self.builds += 1
+            return self.state.get_data()
+
+        self.feed = LiveFeed(build)
+
+    def test_version_bumps_on_update(self):
+        self.assertEqual(self.state.version, 0)
+        self.state.update({"people_count": 3})
+        self.assertEqual(self.state.version, 1)
+        self.assertEqual(self.state.wait_for_update(0, timeout=0.01), 1)
+        # Nothing newer: returns the same version after the timeout
+        self.assertEqual(self.state.wait_for_update(1, timeout=0.01), 1)
+
+    def test_one_build_per_version(self):
+        self.state.update({"people_count": 3})
+        for _ in range(20):
+            self.feed.get(self.state.version)
+        self.assertEqual(self.builds, 1)
+        self.state.update({"people_count": 4})
+        self.feed.get(self.state.version)
+        self.assertEqual(self.builds, 2)
+
+    def test_delta_has_only_changed_keys(self):
+        self.state.update({"people_count": 3, "total_visitors": 10})
+        self.feed.get(self.state.version)
+        self.state.update({"people_count": 4, "total_visitors": 10})
+        version, prev, full, delta = self.feed.get(self.state.version)
+        self.assertEqual((version, prev), (2, 1))
+        self.assertEqual(json.loads(delta), {"people_count": 4})
+        self.assertEqual(json.loads(full)["total_visitors"], 10)
+
+    def test_stream_sends_snapshot_then_deltas(self):
+        self.state.update({"people_count": 1})
+        events = self.feed.events(self.state, keepalive=0.05)
+        self.assertTrue(next(events).startswith("retry:"))
+        name, data = parse(next(events))
+        self.assertEqual((name, data["people_count"]), ("snapshot", 1))
+
+        self.state.update({"people_count": 2})
+        self.assertEqual(parse(next(events)), ("delta", {"people_count": 2}))
+
+        # No update: keepalive comment
+        self.assertTrue(next(events).startswith(":"))
+
+    def test_stream_resyncs_after_gap(self):
+        self.state.update({"people_count": 1})
+        events = self.feed.events(self.state, keepalive=0.05)
+        next(events)
+        next(events)
+        # Two updates before this client reads again: the cached delta is
+        # relative to a version it never saw, so it gets a snapshot
+        self.state.update({"people_count": 2})
+        self.feed.get(self.state.version)
+        self.state.update({"people_count": 3, "total_visitors": 5})
+        self.feed.get(self.state.version)
+        name, data = parse(next(events))
+        self.assertEqual(name, "snapshot")
+        self.assertEqual((data["people_count"], data["total_visitors"]), (3, 5))
+
+    def test_waiting_stream_wakes_on_update(self):
+        self.state.update({"people_count": 1})
+        events = self.feed.events(self.state, keepalive=5.0)
+        next(events)
+        next(events)
+        threading.Timer(0.05, self.state.update, [{"people_count": 2}]).start()
+        start = time.time()
+        name, data = parse(next(events))
+        self.assertEqual(name, "delta")
+        self.assertLess(time.time() - start, 1.0)
+
+if __name__ == '__main__':
+    unittest.main()
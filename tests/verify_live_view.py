@@ -0,0 +1,133 @@
+import sys
+import os
+import datetime
+import unittest
+
+from flask import Flask
+from sqlalchemy import event
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.extensions import db
+from backend.models import Alert, Zone
+from backend.live_view import LiveView, ALERT_WINDOW
+from backend.state import SystemState
+
+def make_app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    return app
+
+class TestLiveView(unittest.TestCase):
+    def setUp(self):
+        self.app = make_app()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.queries = 0
+        event.listen(db.engine, "before_cursor_execute", self.count_query)
+
+        now = datetime.datetime.now()
+        db.session.add(Alert(zone_name="A", message="old", timestamp=now - ALERT_WINDOW - datetime.timedelta(minutes=5)))
+        db.session.add(Alert(zone_name="A", message="recent", timestamp=now - datetime.timedelta(hours=1)))
+        db.session.add(Zone(name="Entrance", points_json="[]", threshold=7))
+        db.session.commit()
+
+        self.state = SystemState()
+        self.state.update({"zones": [{"name": "CAM 1: Entrance", "count": 3, "threshold": 10}], "cameras": {"0": {}}})
+        self.view = LiveView(self.state)
+
+    def tearDown(self):
+        event.remove(db.engine, "before_cursor_execute", self.count_query)
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def count_query(self, *args):
+        self.queries += 1
+
+    def test_payload_matches_old_view(self):
+        data = self.view.build()
+        self.assertEqual(data['alert_count'], 1)
+        self.assertEqual(data['active_cameras'], 1)
+        self.assertEqual(data['zones'][0]['threshold'], 7)
+        # The shared state's zone dicts are left alone
+        self.assertEqual(self.state.get_data()['zones'][0]['threshold'], 10)
+
+    def test_no_queries_after_first_build(self):
+        self.view.build()
+        before = self.queries
+        for i in range(10):
+            self.state.update({"people_count": i})
+            self.view.build()
+            self.view.serialized()
+        self.assertEqual(self.queries, before)
+
+    def test_alert_counter_is_incremental(self):
+        self.assertEqual(self.view.alert_count(), 1)
+        self.view.record_alerts(3)
+        self.assertEqual(self.view.alert_count(), 4)
+        # The window moves: only the 3 just recorded are left after 23.5h
+        later = datetime.datetime.now() + datetime.timedelta(hours=23, minutes=30)
+        self.assertEqual(self.view.alert_count(later), 3)
+
+    def test_thresholds_reload_only_when_invalidated(self):
+        self.view.build()
+        Zone.query.filter_by(name="Entrance").first().threshold = 20
+        db.session.commit()
+        self.state.update({"people_count": 1})
+        self.assertEqual(self.view.build()['zones'][0]['threshold'], 7) # Cached
+        self.view.invalidate_thresholds()
+        self.assertEqual(self.view.build()['zones'][0]['threshold'], 20)
+
+    def test_serialized_once_per_change(self):
+        body, etag = self.view.serialized()
+        self.assertIs(self.view.serialized()[0], body)
+        self.state.update({"people_count": 5})
+        body2, etag2 = self.view.serialized()
+        self.assertNotEqual(etag, etag2)
+        # A new version with identical content keeps the ETag
+        self.state.update({"people_count": 5})
+        self.assertEqual(self.view.serialized()[1], etag2)
+
+    def test_telemetry_does_not_change_etag(self):
+        _, etag = self.view.serialized()
+        self.state.update({"reid": {"queue_depth": 3, "latency_ms_avg": 12.5},
+                           "cameras": {"0": {"latency_ms": 40, "staleness_ms": 8}}})
+        body, etag2 = self.view.serialized()
+        self.assertIn('latency_ms', body) # Still sent, just not hashed
+        self.assertEqual(etag2, etag)
+        self.state.update({"cameras": {"0": {"fps": 15, "latency_ms": 40}}})
+        self.assertNotEqual(self.view.serialized()[1], etag) # Rendered on the cameras page
+
+class TestGetCountETag(unittest.TestCase):
+    def setUp(self):
+        from backend.routes.dashboard_routes import dashboard_bp
+        self.app = make_app()
+        self.app.register_blueprint(dashboard_bp, url_prefix='/')
+        with self.app.app_context():
+            db.create_all()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+
+    def test_unchanged_poll_is_304(self):
+        from backend.state import state
+        first = self.client.get('/get_count')
+        self.assertEqual(first.status_code, 200)
+        etag = first.headers['ETag']
+        self.assertIn('people_count', first.get_json())
+
+        again = self.client.get('/get_count', headers={'If-None-Match': etag})
+        self.assertEqual(again.status_code, 304)
+
+        state.update({"people_count": first.get_json()['people_count'] + 1})
+        changed = self.client.get('/get_count', headers={'If-None-Match': etag})
+        self.assertEqual(changed.status_code, 200)
+
+if __name__ == '__main__':
+    unittest.main()
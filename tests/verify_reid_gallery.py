@@ -0,0 +1,304 @@
+
+import sys
+import os
+import json
+import tempfile
+import threading
+import time
+import unittest
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from re_id import Config, ReIDGallery, EmbeddingMatrix, FeatureExtractor, cosine_similarity
+
+
+class VectorExtractor:
+    """Test double: the 'crop' already is the feature vector"""
+    def extract(self, image_crop):
+        if image_crop is None:
+            return None
+        vec = np.asarray(image_crop, dtype=np.float32)
+        return vec / np.linalg.norm(vec)
+
+    def extract_batch(self, image_crops):
+        self.batches.append(len(image_crops))
+        return [self.extract(c) for c in image_crops]
+
+    def __init__(self):
+        self.batches = []
+
+
+class TempGallery(ReIDGallery):
+    """Gallery persisted to a temp dir instead of data/"""
+    def __init__(self, extractor, tmp_dir):
+        self.tmp_dir = tmp_dir
+        super().__init__(extractor)
+
+    def _persistent_dir(self):
+        return self.tmp_dir
+
+
+class TestReIDGallery(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.rng = np.random.default_rng(0)
+        self.gallery = TempGallery(VectorExtractor(), self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _random_vec(self, dim=64):
+        return self.rng.standard_normal(dim).astype(np.float32)
+
+    def test_match_equals_bruteforce(self):
+        vecs = {}
+        for gid in range(1, 201):
+            vecs[gid] = self._random_vec()
+            self.gallery._update_gallery(gid, vecs[gid])
+
+        for _ in range(20):
+            # Noisy copy of a known identity
+            target = int(self.rng.integers(1, 201))
+            query = vecs[target] + 0.3 * self._random_vec()
+
+            expected = max(vecs, key=lambda g: cosine_similarity(query, vecs[g]))
+            matched, sim = self.gallery._find_best_match(query)
+            self.assertEqual(matched, expected)
+            self.assertAlmostEqual(sim, cosine_similarity(query, vecs[expected]), places=4)
+
+    def test_below_threshold_is_no_match(self):
+        self.gallery._update_gallery(1, np.array([1.0, 0.0], dtype=np.float32))
+        matched, sim = self.gallery._find_best_match(np.array([0.0, 1.0], dtype=np.float32))
+        self.assertIsNone(matched)
+        self.assertEqual(sim, 0.0)
+
+    def test_identity_rows_are_recycled(self):
+        for _ in range(Config.REID_GALLERY_SIZE * 3):
+            self.gallery._update_gallery(1, self._random_vec())
+        self.assertEqual(len(self.gallery.gallery[1]["rows"]), Config.REID_GALLERY_SIZE)
+        self.assertEqual(self.gallery.matrix.size, Config.REID_GALLERY_SIZE)
+
+    def test_evicted_rows_are_reused(self):
+        self.gallery._update_gallery(1, self._random_vec())
+        self.gallery._update_gallery(2, self._random_vec())
+        self.gallery.gallery[1]["last_seen"] = 0  # Very old
+        self.gallery.cleanup_old_entries()
+
+        self.assertNotIn(1, self.gallery.gallery)
+        self.gallery._update_gallery(3, self._random_vec())
+        self.assertEqual(self.gallery.matrix.size, 2)
+        self.assertEqual(len(self.gallery.matrix), 2)
+
+    def test_matrix_grows(self):
+        matrix = EmbeddingMatrix(capacity=4)
+        for gid in range(10):
+            matrix.add(gid, self._random_vec(8))
+        self.assertGreaterEqual(matrix.capacity, 10)
+        self.assertEqual(list(matrix.row_to_gid[:10]), list(range(10)))
+
+    def test_get_global_ids_batches_new_tracks(self):
+        extractor = self.gallery.feature_extractor
+        a, b, c = self._random_vec(), self._random_vec(), self._random_vec()
+        ids = self.gallery.get_global_ids([1, 2, 3], [a, b, c])
+        self.assertEqual(extractor.batches, [3])
+        self.assertEqual(sorted(ids), [1, 2, 3])
+
+        # Known tracks are not re-embedded; only the new track is
+        ids_again = self.gallery.get_global_ids([1, 2, 3, 4], [a, b, c, a])
+        self.assertEqual(extractor.batches, [3, 1])
+        self.assertEqual(ids_again[:3], ids)
+        self.assertEqual(ids_again[3], ids[0])  # Same appearance as track 1
+
+    def test_external_features_without_extractor(self):
+        gallery = TempGallery(None, self.tmp.name)
+        a, b = self._random_vec(), self._random_vec()
+        ids = gallery.get_global_ids([1, 2], [None, None], features=[a, b])
+        self.assertEqual(sorted(ids), [1, 2])
+        # Track without an embedding stays provisional
+        self.assertEqual(gallery.get_global_ids([3], [None], features=[None]), [-3])
+        self.assertEqual(gallery.get_global_id(3, None), -3)
+
+    def test_save_and_reload(self):
+        vec = self._random_vec()
+        self.gallery._update_gallery(7, vec)
+        self.gallery.save_compact()
+
+        reloaded = TempGallery(VectorExtractor(), self.tmp.name)
+        self.assertEqual(reloaded.next_global_id, 8)
+        matched, _ = reloaded._find_best_match(vec)
+        self.assertEqual(matched, 7)
+
+
+class TestGalleryPersistence(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.rng = np.random.default_rng(2)
+        self.gallery = TempGallery(VectorExtractor(), self.tmp.name)
+        self.paths = self.gallery._persistent_paths()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_migrates_legacy_json(self):
+        legacy = {
+            "4": {"last_seen": 123.0, "feature": [1.0, 0.0, 0.0]},
+            "9": {"last_seen": 456.0, "features": [[0.0, 1.0, 0.0], [0.0, 1.0, 0.0]]}
+        }
+        with open(self.paths["json"], "w", encoding="utf-8") as f:
+            json.dump(legacy, f, indent=2)
+
+        migrated = TempGallery(VectorExtractor(), self.tmp.name)
+        self.assertEqual(sorted(migrated.gallery), [4, 9])
+        self.assertFalse(os.path.exists(self.paths["json"]))
+        self.assertTrue(os.path.exists(self.paths["features"]))
+
+        reloaded = TempGallery(VectorExtractor(), self.tmp.name)
+        self.assertEqual(reloaded.next_global_id, 10)
+        self.assertEqual(reloaded.gallery[9]["last_seen"], 456.0)
+        self.assertEqual(reloaded._find_best_match([0.0, 0.9, 0.1])[0], 9)
+
+    def test_migrates_unpooled_legacy_json(self):
+        maps = self.rng.random((2, FeatureExtractor.FEATURE_DIM, 49)).astype(np.float32)
+        legacy = {str(gid): {"last_seen": 100.0, "feature": m.reshape(-1).tolist()}
+                  for gid, m in enumerate(maps, start=1)}
+        with open(self.paths["json"], "w", encoding="utf-8") as f:
+            json.dump(legacy, f)
+
+        migrated = TempGallery(VectorExtractor(), self.tmp.name)
+        self.assertEqual(migrated.matrix.dim, FeatureExtractor.FEATURE_DIM)
+        self.assertEqual(migrated._find_best_match(maps[1].mean(axis=1))[0], 2)
+
+    def test_checkpoint_appends_only_changes(self):
+        for gid in range(1, 11):
+            self.gallery._update_gallery(gid, self.rng.standard_normal(16))
+        self.gallery.save_compact()
+        size_after_save = os.path.getsize(self.paths["features"])
+
+        # One new identity, one last_seen-only change, one eviction
+        self.gallery._update_gallery(11, self.rng.standard_normal(16))
+        self.gallery.next_global_id = 12
+        seen = time.time() + 5
+        self.gallery.gallery[2]["last_seen"] = seen
+        self.gallery._dirty_seen.add(2)
+        self.gallery.gallery[3]["last_seen"] = 0
+        self.gallery.cleanup_old_entries()
+        self.gallery.checkpoint()
+
+        self.assertEqual(os.path.getsize(self.paths["features"]), size_after_save + 16 * 4)
+
+        reloaded = TempGallery(VectorExtractor(), self.tmp.name)
+        self.assertEqual(sorted(reloaded.gallery), [1, 2] + list(range(4, 12)))
+        self.assertEqual(reloaded.gallery[2]["last_seen"], seen)
+        self.assertEqual(reloaded.next_global_id, 12)
+
+    def test_pools_unpooled_gallery(self):
+        # Saved before pooling: flattened (1280, 7, 7) maps
+        maps = self.rng.random((3, FeatureExtractor.FEATURE_DIM, 49)).astype(np.float32)
+        for gid, m in enumerate(maps, start=1):
+            self.gallery._update_gallery(gid, m.reshape(-1))
+        self.gallery.save_compact()
+        self.assertEqual(self.gallery.matrix.dim, FeatureExtractor.FLAT_DIM)
+
+        reloaded = TempGallery(VectorExtractor(), self.tmp.name)
+        self.assertEqual(reloaded.matrix.dim, FeatureExtractor.FEATURE_DIM)
+        # A pooled query of identity 2 (what the extractor returns now) matches it
+        self.assertEqual(reloaded._find_best_match(maps[1].mean(axis=1))[0], 2)
+        with open(self.paths["meta"], encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["dim"], FeatureExtractor.FEATURE_DIM) # Rewritten
+        self.assertEqual(TempGallery(VectorExtractor(), self.tmp.name).matrix.dim, FeatureExtractor.FEATURE_DIM)
+
+
+class TestLSHGallery(unittest.TestCase):
+    def setUp(self):
+        self.saved = (Config.REID_INDEX, Config.REID_INDEX_MIN_SIZE)
+        Config.REID_INDEX = "lsh"
+        Config.REID_INDEX_MIN_SIZE = 0
+        self.tmp = tempfile.TemporaryDirectory()
+        self.rng = np.random.default_rng(1)
+        self.gallery = TempGallery(VectorExtractor(), self.tmp.name)
+
+    def tearDown(self):
+        Config.REID_INDEX, Config.REID_INDEX_MIN_SIZE = self.saved
+        self.tmp.cleanup()
+
+    def test_lsh_matches_close_queries(self):
+        vecs = {gid: self.rng.standard_normal(128).astype(np.float32) for gid in range(1, 501)}
+        for gid, vec in vecs.items():
+            self.gallery._update_gallery(gid, vec)
+
+        for gid in (3, 77, 250, 499):
+            query = vecs[gid] + 0.2 * self.rng.standard_normal(128).astype(np.float32)
+            matched, _ = self.gallery._find_best_match(query)
+            self.assertEqual(matched, gid)
+
+    def test_index_follows_eviction(self):
+        vec = self.rng.standard_normal(128).astype(np.float32)
+        self.gallery._update_gallery(1, vec)
+        self.assertEqual(len(self.gallery.index), 1)
+
+        self.gallery.gallery[1]["last_seen"] = 0
+        self.gallery.cleanup_old_entries()
+        self.assertEqual(len(self.gallery.index), 0)
+        self.assertEqual(self.gallery._find_best_match(vec), (None, 0.0))
+
+
+class TestReIDWorker(unittest.TestCase):
+    def setUp(self):
+        from reid_worker import ReIDWorker
+        self.tmp = tempfile.TemporaryDirectory()
+        self.rng = np.random.default_rng(3)
+        self.gallery = TempGallery(VectorExtractor(), self.tmp.name)
+        self.worker = ReIDWorker(self.gallery, max_queue=2)
+
+    def tearDown(self):
+        self.worker.stop()
+        self.tmp.cleanup()
+
+    def _wait_resolved(self, track_ids, timeout=5.0):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if all(t in self.gallery.track_to_global for t in track_ids):
+                return True
+            time.sleep(0.01)
+        return False
+
+    def test_provisional_until_resolved(self):
+        crops = [self.rng.standard_normal(32).astype(np.float32) for _ in range(2)]
+        ids = self.worker.get_global_ids(["1", "2"], crops)
+        self.assertEqual(ids, [-1, -2])
+
+        self.assertTrue(self._wait_resolved(["1", "2"]))
+        resolved = self.worker.get_global_ids(["1", "2"], crops)
+        self.assertEqual(sorted(resolved), [1, 2])
+
+        metrics = self.worker.metrics()
+        self.assertEqual(metrics["resolved"], 2)
+        self.assertEqual(metrics["pending_tracks"], 0)
+
+    def test_forgotten_while_queued(self):
+        self.worker.stop()
+        self.worker.submit("1")  # No crop, no features: never resolves
+        self.worker.forget(["1"])
+        self.assertEqual(self.worker.metrics()["pending_tracks"], 1)
+
+        self.worker.stop_event.clear()
+        self.worker.thread = threading.Thread(target=self.worker._run, daemon=True)
+        self.worker.thread.start()
+        deadline = time.time() + 5.0
+        while self.worker.metrics()["pending_tracks"] and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.worker.metrics()["pending_tracks"], 0)
+        self.assertEqual(self.worker.forgotten, set())
+
+    def test_full_queue_drops(self):
+        self.worker.stop()  # Nothing consumes the queue now
+        for tid in range(5):
+            self.worker.submit(str(tid), features=self.rng.standard_normal(32))
+        self.assertEqual(self.worker.metrics()["dropped"], 3)
+        self.assertEqual(self.worker.metrics()["queue_depth"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
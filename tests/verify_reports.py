@@ -0,0 +1,169 @@
+import sys
+import os
+import datetime
+import json
+import shutil
+import tempfile
+import unittest
+
+from flask import Flask
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.extensions import db
+from backend.models import AnalyticsData, ZoneSample
+from backend.timeseries import TimeSeriesStore, GLOBAL_SERIES
+import backend.reports as reports
+from backend.reports import ReportCache, summary_from_db, zone_breakdown
+from dwell import DwellHistogram
+
+DAY = datetime.datetime(2024, 3, 10)
+
+class TestReportQueries(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        # 09:00 -> 4, 09:30 -> 8, 14:00 -> 2; next day 09:00 -> 6
+        for when, count in ((DAY.replace(hour=9), 4), (DAY.replace(hour=9, minute=30), 8),
+                            (DAY.replace(hour=14), 2), (DAY.replace(hour=9) + datetime.timedelta(days=1), 6)):
+            db.session.add(AnalyticsData(zone_name=GLOBAL_SERIES, count=count, timestamp=when))
+        rows = [
+            {"timestamp": DAY.replace(hour=10), "camera_id": "0", "zone_name": "C1: Entrance",
+             "count": 3, "entries": 4, "exits": 2, "dwell": 10.0, "dwell_hist": self.visits(5, 15)},
+            {"timestamp": DAY.replace(hour=11), "camera_id": "0", "zone_name": "C1: Entrance",
+             "count": 5, "entries": 1, "exits": 1, "dwell": 40.0, "dwell_hist": self.visits(40)},
+            {"timestamp": DAY.replace(hour=11), "camera_id": "1", "zone_name": "C2: Exit",
+             "count": 1, "entries": 0, "exits": 0, "dwell": None, "dwell_hist": None},
+        ]
+        db.session.execute(ZoneSample.__table__.insert(), rows)
+        db.session.commit()
+        self.cache = ReportCache()
+
+    @staticmethod
+    def visits(*seconds):
+        hist = DwellHistogram()
+        for s in seconds:
+            hist.add(s)
+        return json.dumps(hist.to_json())
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_single_day(self):
+        peak, avg, hourly = summary_from_db(GLOBAL_SERIES, DAY, DAY + datetime.timedelta(days=1), self.cache)
+        self.assertEqual(peak, 8)
+        self.assertAlmostEqual(avg, 14 / 3)
+        self.assertEqual(hourly[9], 6)
+        self.assertEqual(hourly[14], 2)
+        self.assertEqual(sum(hourly), 8)
+
+    def test_multi_day_hour_of_day(self):
+        peak, avg, hourly = summary_from_db(GLOBAL_SERIES, DAY, DAY + datetime.timedelta(days=2), self.cache)
+        self.assertAlmostEqual(avg, 20 / 4)
+        self.assertEqual(hourly[9], 6) # (4 + 8 + 6) / 3
+
+    def test_zone_series_and_missing(self):
+        peak, avg, _ = summary_from_db("C1: Entrance", DAY, DAY + datetime.timedelta(days=1), self.cache)
+        self.assertEqual((peak, avg), (5, 4))
+        self.assertIsNone(summary_from_db("nope", DAY, DAY + datetime.timedelta(days=1), self.cache))
+
+    def test_zone_breakdown(self):
+        zones = {z["name"]: z for z in zone_breakdown(DAY, DAY + datetime.timedelta(days=1), self.cache)}
+        entrance = zones["C1: Entrance"]
+        self.assertEqual((entrance["peak"], entrance["avg"], entrance["entries"], entrance["exits"]), (5, 4.0, 5, 3))
+        self.assertEqual(entrance["avg_dwell"], 20.0) # (2 * 10 + 1 * 40) / 3
+        self.assertIsNone(zones["C2: Exit"]["avg_dwell"])
+        # Visits of 5, 15 and 40 s from the merged histograms
+        self.assertLess(abs(entrance["p50_dwell"] - 15) / 15, 0.2)
+        self.assertGreater(entrance["p90_dwell"], 30)
+        self.assertIsNone(zones["C2: Exit"]["p50_dwell"])
+
+    def test_queries_use_covering_indexes(self):
+        plans = [
+            "SELECT substr(timestamp, 1, 13), max(count) FROM analytics_data "
+            "WHERE zone_name = 'x' AND timestamp >= '2024' GROUP BY 1",
+            "SELECT substr(timestamp, 1, 10), zone_name, max(count), sum(entries), sum(exits), sum(dwell * exits) "
+            "FROM zone_sample WHERE timestamp >= '2024' AND timestamp < '2025' GROUP BY 1, zone_name",
+            "SELECT substr(timestamp, 1, 10), zone_name, dwell_hist FROM zone_sample "
+            "WHERE timestamp >= '2024' AND timestamp < '2025' AND dwell_hist IS NOT NULL",
+        ]
+        for sql in plans:
+            plan = " ".join(str(r[-1]) for r in db.session.execute(db.text("EXPLAIN QUERY PLAN " + sql)))
+            self.assertIn("COVERING INDEX", plan, sql)
+
+    def test_timeseries_matches_db(self):
+        root = tempfile.mkdtemp()
+        try:
+            store = TimeSeriesStore(root)
+            for row in AnalyticsData.query.all():
+                store.record({GLOBAL_SERIES: row.count}, row.timestamp.timestamp())
+            store.flush()
+            end = DAY + datetime.timedelta(days=2)
+            saved, reports.timeseries = reports.timeseries, store
+            try:
+                self.assertEqual(reports.summary_from_timeseries(GLOBAL_SERIES, DAY, end),
+                                 summary_from_db(GLOBAL_SERIES, DAY, end, self.cache))
+            finally:
+                reports.timeseries = saved
+        finally:
+            shutil.rmtree(root)
+
+    def test_days_before_the_store_come_from_the_db(self):
+        # The store started on the second day: only that day's sample is in it
+        root = tempfile.mkdtemp()
+        try:
+            store = TimeSeriesStore(root)
+            store.record({GLOBAL_SERIES: 6}, (DAY.replace(hour=9) + datetime.timedelta(days=1)).timestamp())
+            store.flush()
+            saved, reports.timeseries = reports.timeseries, store
+            try:
+                end = DAY + datetime.timedelta(days=2)
+                self.assertEqual(reports.summary(GLOBAL_SERIES, DAY, end, self.cache),
+                                 summary_from_db(GLOBAL_SERIES, DAY, end, self.cache))
+                self.assertEqual(reports.summary(GLOBAL_SERIES, DAY + datetime.timedelta(days=1), end, self.cache)[0], 6)
+            finally:
+                reports.timeseries = saved
+            self.assertEqual(store.first_sample_time(), (DAY.replace(hour=9) + datetime.timedelta(days=1)).timestamp())
+        finally:
+            shutil.rmtree(root)
+
+    def test_days_cached_and_only_today_recomputed(self):
+        end = DAY + datetime.timedelta(days=2)
+        self.assertEqual(summary_from_db(GLOBAL_SERIES, DAY, end, self.cache)[0], 8)
+        # Rows added to a cached (finished) day are not seen...
+        db.session.add(AnalyticsData(zone_name=GLOBAL_SERIES, count=50, timestamp=DAY.replace(hour=15)))
+        db.session.commit()
+        self.assertEqual(summary_from_db(GLOBAL_SERIES, DAY, end, self.cache)[0], 8)
+        # ...until that day is invalidated by a write covering it
+        self.cache.invalidate_since(DAY.replace(hour=15))
+        self.assertEqual(summary_from_db(GLOBAL_SERIES, DAY, end, self.cache)[0], 50)
+
+class TestReportCache(unittest.TestCase):
+    def test_only_recent_ranges_invalidated(self):
+        cache = ReportCache(size=10)
+        yesterday_end = DAY
+        today_end = DAY + datetime.timedelta(days=1)
+        cache.put("yesterday", yesterday_end, {"peak_occupancy": 1})
+        cache.put("today", today_end, {"peak_occupancy": 2})
+
+        cache.invalidate_since(DAY.replace(hour=12))
+        self.assertEqual(cache.get("yesterday"), {"peak_occupancy": 1})
+        self.assertIsNone(cache.get("today"))
+
+    def test_size_bound(self):
+        cache = ReportCache(size=2)
+        for i in range(3):
+            cache.put(i, DAY, i)
+        self.assertIsNone(cache.get(0))
+        self.assertEqual(cache.get(2), 2)
+
+if __name__ == '__main__':
+    unittest.main()
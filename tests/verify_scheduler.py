@@ -0,0 +1,49 @@
+
+import sys
+import os
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from re_id import Config
+from scheduler import InferenceScheduler
+
+class TestInferenceScheduler(unittest.TestCase):
+    def setUp(self):
+        self.sched = InferenceScheduler(target_latency=0.1, max_stride=4)
+
+    def feed(self, inference_cost, tracking_cost, frames=20, tracks=3, motion=1.0):
+        for _ in range(frames):
+            ran = self.sched.should_run()
+            self.sched.record(ran, inference_cost if ran else tracking_cost, tracks, motion)
+
+    def test_cheap_inference_keeps_stride_one(self):
+        self.feed(0.05, 0.01)
+        self.assertEqual(self.sched.stride, 1)
+
+    def test_expensive_inference_raises_stride(self):
+        # (0.25 + (s-1) * 0.02) / s <= 0.1  ->  s = 3
+        self.feed(0.25, 0.02)
+        self.assertEqual(self.sched.stride, 3)
+
+    def test_stride_cadence(self):
+        self.sched.stride = 3
+        runs = []
+        for _ in range(6):
+            ran = self.sched.should_run()
+            runs.append(ran)
+            self.sched.frames_since_inference = 0 if ran else self.sched.frames_since_inference + 1
+        self.assertEqual(runs, [True, False, False, True, False, False])
+
+    def test_fast_motion_caps_stride(self):
+        # Tracks move 25 px/frame -> at most 40 // 25 = 1 frame between detections
+        self.feed(0.4, 0.02, motion=25.0)
+        self.assertEqual(self.sched.stride, 1)
+
+    def test_crowd_caps_stride(self):
+        self.feed(0.4, 0.02, tracks=Config.INFERENCE_CROWD_TRACKS)
+        self.assertEqual(self.sched.stride, 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import sys
+import os
+import datetime
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.timeseries import TimeSeriesStore, GLOBAL_SERIES, COUNT, SUM, MIN, MAX
+
+def at(day, hour, minute=0, second=0):
+    return datetime.datetime.combine(day, datetime.time(hour, minute, second)).timestamp()
+
+class TestTimeSeriesStore(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.store = TimeSeriesStore(self.root)
+        self.day = datetime.date(2024, 3, 10)
+        self.start = datetime.datetime.combine(self.day, datetime.time())
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_hour_rollup(self):
+        self.store.record({GLOBAL_SERIES: 4, "C1: Entrance": 1}, at(self.day, 9, 0))
+        self.store.record({GLOBAL_SERIES: 8, "C1: Entrance": 3}, at(self.day, 9, 30))
+        self.store.record({GLOBAL_SERIES: 2}, at(self.day, 14, 5))
+        self.store.flush()
+
+        times, r = self.store.rollup(GLOBAL_SERIES, self.start, self.start + datetime.timedelta(days=1))
+        self.assertEqual(len(times), 24)
+        self.assertEqual(times[9].hour, 9)
+        self.assertEqual(list(r[9]), [2, 12, 4, 8])
+        self.assertEqual(r[14, MAX], 2)
+        self.assertEqual(r[10, COUNT], 0)
+        self.assertEqual(self.store.aggregate(GLOBAL_SERIES, self.start, self.start + datetime.timedelta(days=1)),
+                         {"samples": 3, "peak": 8.0, "avg": 14 / 3})
+        self.assertEqual(self.store.series_names(self.day), ["C1: Entrance", GLOBAL_SERIES])
+
+    def test_reopened_store_reads_disk(self):
+        self.store.record({GLOBAL_SERIES: 5}, at(self.day, 1))
+        self.store.flush()
+        other = TimeSeriesStore(self.root)
+        _, r = other.rollup(GLOBAL_SERIES, self.start, self.start + datetime.timedelta(days=1), "minute")
+        self.assertEqual(r.shape, (1440, 4))
+        self.assertEqual(list(r[60]), [1, 5, 5, 5])
+
+        # Appending after a restart continues the day's rollup
+        other.record({GLOBAL_SERIES: 7}, at(self.day, 1, 0, 30))
+        other.flush()
+        _, r = TimeSeriesStore(self.root).rollup(GLOBAL_SERIES, self.start, self.start + datetime.timedelta(hours=2), "minute")
+        self.assertEqual(list(r[60]), [2, 12, 5, 7])
+
+    def test_rollup_rebuilt_from_raw_columns(self):
+        self.store.record({GLOBAL_SERIES: 5}, at(self.day, 1))
+        self.store.flush()
+        prefix = self.store._prefix(self.day, GLOBAL_SERIES)
+        os.remove(prefix + ".minute.npy")
+        os.remove(prefix + ".hour.npy")
+        _, r = TimeSeriesStore(self.root).rollup(GLOBAL_SERIES, self.start, self.start + datetime.timedelta(days=1))
+        self.assertEqual(list(r[1]), [1, 5, 5, 5])
+
+    def test_range_across_days_and_partial_hours(self):
+        ts = [at(self.day + datetime.timedelta(days=d), h) for d in range(3) for h in (8, 20)]
+        self.store.extend(GLOBAL_SERIES, ts, np.arange(6))
+        start = self.start + datetime.timedelta(hours=12)
+        times, r = self.store.rollup(GLOBAL_SERIES, start, start + datetime.timedelta(days=1))
+        self.assertEqual(len(times), 24)
+        self.assertEqual(times[0], start)
+        self.assertEqual(r[:, COUNT].sum(), 2)  # 20:00 day 0, 08:00 day 1
+        self.assertEqual(r[:, SUM].sum(), 1 + 2)
+        self.assertEqual(self.store.series_names(self.day + datetime.timedelta(days=2)), [GLOBAL_SERIES])
+
+    def test_raw_includes_unflushed_samples(self):
+        self.store.record({GLOBAL_SERIES: 1}, at(self.day, 10))
+        self.store.flush()
+        self.store.record({GLOBAL_SERIES: 2}, at(self.day, 11))
+        t, v = self.store.raw(GLOBAL_SERIES, self.start, self.start + datetime.timedelta(days=1))
+        self.assertEqual(list(v), [1, 2])
+        self.assertEqual(t[1], at(self.day, 11))
+
+    def test_missing_series_is_empty(self):
+        _, r = self.store.rollup("nope", self.start, self.start + datetime.timedelta(days=2))
+        self.assertEqual(r.shape, (48, 4))
+        self.assertEqual(r[:, COUNT].sum(), 0)
+        self.assertTrue(np.isinf(r[:, MIN]).all())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import sys
+import os
+import datetime
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+from flask import Flask
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.extensions import db
+from backend.models import AnalyticsData
+from backend.timeseries import TimeSeriesStore, GLOBAL_SERIES
+import backend.trend as trend_module
+from backend.trend import lttb, trend
+
+START = datetime.datetime(2024, 3, 10)
+
+class TestLTTB(unittest.TestCase):
+    def test_budget_and_endpoints(self):
+        x = np.arange(10000, dtype=float)
+        y = np.sin(x / 500)
+        keep = lttb(x, y, 300)
+        self.assertEqual(len(keep), 300)
+        self.assertEqual((keep[0], keep[-1]), (0, 9999))
+        self.assertTrue(np.all(np.diff(keep) > 0))
+
+    def test_spike_survives(self):
+        x = np.arange(100000, dtype=float)
+        y = np.zeros(100000)
+        y[61234] = 50
+        keep = lttb(x, y, 100)
+        self.assertIn(61234, keep)
+
+    def test_short_series_untouched(self):
+        self.assertEqual(list(lttb(np.arange(5.0), np.ones(5), 300)), [0, 1, 2, 3, 4])
+        self.assertEqual(len(lttb(np.empty(0), np.empty(0), 300)), 0)
+
+class TestTrend(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.store = TimeSeriesStore(self.root)
+        self.saved, trend_module.timeseries = trend_module.timeseries, self.store
+
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        trend_module.timeseries = self.saved
+        shutil.rmtree(self.root)
+
+    def test_short_range_reads_raw_samples(self):
+        ts = START.timestamp() + np.arange(3600.0)
+        self.store.extend(GLOBAL_SERIES, ts, np.arange(3600) % 7)
+        result = trend(GLOBAL_SERIES, START, START + datetime.timedelta(hours=1), 200)
+        self.assertEqual(result["resolution"], "raw")
+        self.assertEqual(result["source_points"], 3600)
+        self.assertEqual(len(result["data"]), 200)
+        self.assertEqual(result["timestamps"][0], ts[0])
+
+    def test_long_range_reads_rollups(self):
+        # A week at 1 sample / 10 s: minute averages, 10080 buckets
+        ts = START.timestamp() + np.arange(0, 7 * 86400, 10.0)
+        self.store.extend(GLOBAL_SERIES, ts, np.full(len(ts), 4.0))
+        result = trend(GLOBAL_SERIES, START, START + datetime.timedelta(days=7), 300)
+        self.assertEqual(result["resolution"], "minute")
+        self.assertEqual(result["source_points"], 7 * 1440)
+        self.assertEqual(len(result["data"]), 300)
+        self.assertEqual(set(result["data"]), {4.0})
+
+        result = trend(GLOBAL_SERIES, START, START + datetime.timedelta(days=120), 300)
+        self.assertEqual(result["resolution"], "hour")
+        self.assertEqual(result["source_points"], 7 * 24)
+
+    def test_db_fallback(self):
+        for minute, count in ((0, 2), (1, 6), (61, 3)):
+            db.session.add(AnalyticsData(zone_name=GLOBAL_SERIES, count=count,
+                                         timestamp=START + datetime.timedelta(minutes=minute)))
+        db.session.commit()
+
+        result = trend(GLOBAL_SERIES, START, START + datetime.timedelta(hours=2))
+        self.assertEqual((result["resolution"], result["data"]), ("raw", [2.0, 6.0, 3.0]))
+
+        result = trend(GLOBAL_SERIES, START, START + datetime.timedelta(days=2))
+        self.assertEqual(result["resolution"], "minute")
+        self.assertEqual(result["data"], [2.0, 6.0, 3.0])
+        self.assertEqual(result["timestamps"][2], (START + datetime.timedelta(minutes=61)).timestamp())
+
+        result = trend(GLOBAL_SERIES, START, START + datetime.timedelta(days=100))
+        self.assertEqual((result["resolution"], result["data"]), ("hour", [4.0, 3.0]))
+
+    def test_history_before_the_store_from_db(self):
+        # DB rows for the first 3 days, the store from day 3 on (rolled out then)
+        for day in range(3):
+            db.session.add(AnalyticsData(zone_name=GLOBAL_SERIES, count=2,
+                                         timestamp=START + datetime.timedelta(days=day, hours=12)))
+        db.session.commit()
+        ts = (START + datetime.timedelta(days=3)).timestamp() + np.arange(0, 4 * 86400, 3600.0)
+        self.store.extend(GLOBAL_SERIES, ts, np.full(len(ts), 8.0))
+
+        result = trend(GLOBAL_SERIES, START, START + datetime.timedelta(days=7))
+        self.assertEqual(result["resolution"], "minute")
+        self.assertEqual(result["source_points"], 3 + len(ts))
+        self.assertEqual(result["data"][:3], [2.0, 2.0, 2.0])
+        self.assertEqual(set(result["data"][3:]), {8.0})
+        self.assertTrue(np.all(np.diff(result["timestamps"]) > 0))
+
+if __name__ == '__main__':
+    unittest.main()
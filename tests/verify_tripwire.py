@@ -0,0 +1,134 @@
+import sys
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from counting import Tripwire, TripwireSet
+
+class TestTripwire(unittest.TestCase):
+    def setUp(self):
+        # Horizontal door line, left to right: moving down the screen is "in"
+        self.door = Tripwire("Door", (0, 100), (200, 100), (0, 0, 255))
+        self.wires = TripwireSet([self.door])
+
+    def test_crossing_directions(self):
+        result = self.wires.crossings(
+            [(50, 50), (50, 150), (50, 50), (300, 50), (50, 100), (50, 150), (50, 50)],
+            [(50, 150), (50, 50), (60, 60), (300, 150), (50, 150), (50, 100), (50, 100)]
+        )
+        # down = in, up = out, no crossing, past the end of the line; the line
+        # itself is the "in" side: off it downwards / onto it from below is no
+        # crossing, onto it from above is
+        self.assertEqual(result[:, 0].tolist(), [1, -1, 0, 0, 0, 0, 1])
+
+    def test_counts_across_frames(self):
+        self.wires.update([1, 2], [(50, 90), (150, 120)])
+        self.wires.update([1, 2], [(50, 110), (150, 95)])   # 1 in, 2 out
+        self.wires.update([1, 2], [(55, 120), (150, 80)])   # Same sides: nothing
+        self.wires.update([1], [(55, 90)])                  # 1 out
+        self.wires.update([1, 2], [(55, 80), (150, 130)])   # 2 was not seen last frame
+        self.assertEqual((self.door.in_count, self.door.out_count), (1, 2))
+
+    def test_crossing_on_resolution_frame(self):
+        self.wires.update([-7], [(50, 90)])          # Track 7, Re-ID still pending
+        self.wires.resolve_provisional(-7, 3)
+        self.wires.update([3], [(50, 110)])          # Resolved and crossed in the same frame
+        self.assertEqual(self.door.in_count, 1)
+        self.assertEqual(set(self.wires.prev), {3})
+
+    def test_state_bounded_by_active_tracks(self):
+        rng = np.random.default_rng(0)
+        for frame in range(500):
+            gids = list(range(frame * 10, frame * 10 + 20)) # IDs keep changing
+            self.wires.update(gids, rng.integers(0, 200, (20, 2)))
+            self.assertLessEqual(len(self.wires.prev), 20)
+
+    def test_many_lines_at_once(self):
+        diagonal = Tripwire("Diag", (0, 0), (200, 200), (0, 0, 255))
+        wires = TripwireSet([self.door, diagonal])
+        result = wires.crossings([(150, 50)], [(50, 150)])
+        self.assertEqual(result.tolist(), [[1, 1]]) # Down-left is right of both lines
+        self.assertEqual(TripwireSet([]).crossings([(0, 0)], [(1, 1)]).shape, (1, 0))
+
+class TestTripwireConfig(unittest.TestCase):
+    def test_saved_with_zones(self):
+        from zones import ZoneManager
+        root = tempfile.mkdtemp()
+        try:
+            path = os.path.join(root, "zones_source_0.json")
+            with open(path, "w") as f:
+                json.dump([{"id": "Entrance", "coords": [0, 0, 10, 10], "threshold": 5},
+                           {"id": "Door", "line": [[0, 100], [200, 100]]}], f)
+            zm = ZoneManager(path)
+            self.assertEqual(zm.tripwires, [{"id": "Door", "line": [[0, 100], [200, 100]]}])
+            zm.zones.clear()
+            zm.save_zones()
+            self.assertEqual(ZoneManager(path).tripwires, zm.tripwires)
+        finally:
+            shutil.rmtree(root)
+
+class TestZoneEditorKeepsTripwires(unittest.TestCase):
+    """The dashboard zone editor round trip (GET zones, POST save_zones)"""
+    def setUp(self):
+        from flask import Flask
+        from backend.extensions import db
+        self.db = db
+        self.root = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.root) # The controller uses zones/ relative to the working directory
+        os.makedirs("zones")
+        with open("zones/zones_source_0.json", "w") as f:
+            json.dump([{"id": "Entrance", "coords": [0, 0, 10, 10], "threshold": 5},
+                       {"id": "Door", "line": [[0, 100], [200, 100]]}], f)
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+    def tearDown(self):
+        from backend.state import state
+        state.get_and_clear_commands()
+        self.db.session.remove()
+        self.db.drop_all()
+        self.ctx.pop()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.root)
+
+    def call(self, handler, **kwargs):
+        from backend.controllers.admin_controller import AdminController
+        with self.app.test_request_context(**kwargs):
+            response, status = getattr(AdminController, handler)("admin")
+        return response.get_json(), status
+
+    def test_round_trip(self):
+        body, _ = self.call("get_zones", query_string={"source": "0"})
+        self.assertEqual(list(body["configured_zones"]), ["Entrance"]) # No tripwire as a zone
+        zones = [{"name": name, "coords": json.loads(z["points_json"]), "threshold": z["threshold"]}
+                 for name, z in body["configured_zones"].items()]
+        zones.append({"name": "Queue", "coords": [20, 20, 40, 40], "threshold": 3})
+        _, status = self.call("update_zones_config", method="POST",
+                              json={"action": "save_zones", "source": "0", "zones": zones})
+        self.assertEqual(status, 200)
+        with open("zones/zones_source_0.json") as f:
+            saved = json.load(f)
+        self.assertEqual([z["id"] for z in saved], ["Entrance", "Queue", "Door"])
+        self.assertEqual(saved[2], {"id": "Door", "line": [[0, 100], [200, 100]]})
+
+    def test_zone_without_coords_rejected(self):
+        _, status = self.call("update_zones_config", method="POST",
+                              json={"action": "save_zones", "source": "0", "zones": [{"name": "Door", "coords": []}]})
+        self.assertEqual(status, 400)
+        with open("zones/zones_source_0.json") as f:
+            self.assertEqual(len(json.load(f)), 2) # Untouched
+
+if __name__ == '__main__':
+    unittest.main()
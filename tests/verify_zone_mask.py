@@ -0,0 +1,63 @@
+import sys
+import os
+import unittest
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from counting import Zone, ZoneMask
+
+W, H = 640, 360
+
+def random_zones(rng, count):
+    zones = []
+    for i in range(count):
+        x, y = int(rng.integers(-50, W)), int(rng.integers(-50, H))
+        w, h = int(rng.integers(10, 250)), int(rng.integers(10, 200))
+        zones.append(Zone(f"Z{i}", (x, y, x + w, y + h), (0, 255, 0)))
+    return zones
+
+class TestZoneMask(unittest.TestCase):
+    def test_polygon_zone(self):
+        # Triangle: (0,0) (100,0) (0,100)
+        zone = Zone("Tri", [[0, 0], [100, 0], [0, 100]], (0, 255, 0))
+        self.assertTrue(zone.polygon)
+        self.assertTrue(zone.is_inside((10, 10)))
+        self.assertTrue(zone.is_inside((50, 0))) # Border
+        self.assertFalse(zone.is_inside((80, 80)))
+
+        zone.count_entry(1, (10, 10))
+        self.assertEqual(zone.count, 1)
+        zone.count_entry(1, (80, 80))
+        self.assertEqual(zone.count, 0)
+
+    def test_rectangles_match_exact_test(self):
+        rng = np.random.default_rng(0)
+        zones = random_zones(rng, 100) # Heavily overlapping
+        mask = ZoneMask(zones, W, H)
+        points = np.column_stack([rng.integers(-20, W + 20, 5000), rng.integers(-20, H + 20, 5000)])
+        expected = np.array([[z.is_inside((int(x), int(y))) for z in zones] for x, y in points])
+        np.testing.assert_array_equal(mask.lookup(points), expected)
+
+    def test_polygons_match_exact_test(self):
+        zones = [
+            Zone("Tri", [[0, 0], [300, 0], [0, 300]], (0, 255, 0)),
+            Zone("Quad", [[100, 50], [400, 80], [380, 300], [120, 250]], (0, 255, 0)),
+            Zone("Rect", (50, 50, 200, 200), (0, 255, 0)),
+        ]
+        mask = ZoneMask(zones, W, H)
+        rng = np.random.default_rng(1)
+        points = [(int(x), int(y)) for x, y in zip(rng.integers(-20, W, 5000), rng.integers(-20, H, 5000))]
+        expected = [[z.is_inside(p) for z in zones] for p in points]
+        self.assertEqual(mask.lookup(points).tolist(), expected)
+        self.assertEqual(mask.lookup([(150, 100)]).tolist(), [[True, True, True]])
+        self.assertEqual(mask.lookup(np.empty((0, 2))).shape, (0, 3))
+
+    def test_no_zones(self):
+        mask = ZoneMask([], W, H)
+        self.assertEqual(mask.lookup([(1, 1)]).shape, (1, 0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import sys
+import os
+import datetime
+import json
+import unittest
+
+from flask import Flask
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.extensions import db
+from backend.models import AnalyticsData, ZoneSample, Alert
+from backend.persistence import ZoneSampler, write_batch
+from dwell import DwellHistogram
+
+def live(count, entries, exits, dwell_total, dwell_hist=None):
+    return {"zones": {"0": [{"name": "C1: Entrance", "count": count, "entries": entries,
+                             "exits": exits, "dwell_total": dwell_total, "dwell_hist": dwell_hist}]}}
+
+class TestZoneSampler(unittest.TestCase):
+    def setUp(self):
+        self.sampler = ZoneSampler()
+        self.now = datetime.datetime(2024, 3, 10, 12, 0, 0)
+
+    def test_rows_hold_differences(self):
+        self.sampler.sample(live(2, 5, 3, 30.0), self.now)
+        self.sampler.sample(live(3, 7, 4, 42.0), self.now)
+        first, second = self.sampler.drain()
+        self.assertEqual((first["entries"], first["exits"], first["dwell"]), (0, 0, None))
+        self.assertEqual(second["camera_id"], "0")
+        self.assertEqual(second["zone_name"], "C1: Entrance")
+        self.assertEqual((second["count"], second["entries"], second["exits"]), (3, 2, 1))
+        self.assertAlmostEqual(second["dwell"], 12.0)
+        self.assertEqual(self.sampler.drain(), [])
+
+    def test_counter_reset(self):
+        self.sampler.sample(live(2, 5, 3, 30.0), self.now)
+        # Detection restarted: counters start from zero again
+        self.sampler.sample(live(1, 1, 1, 4.0), self.now)
+        row = self.sampler.drain()[1]
+        self.assertEqual((row["entries"], row["exits"], row["dwell"]), (1, 1, 4.0))
+
+    def test_dwell_histogram_of_the_interval(self):
+        hist = DwellHistogram()
+        for v in (5, 25):
+            hist.add(v)
+        self.sampler.sample(live(0, 2, 2, 30.0, hist.to_json()), self.now)
+        hist.add(300)
+        self.sampler.sample(live(0, 3, 3, 330.0, hist.to_json()), self.now)
+        self.sampler.sample(live(0, 3, 3, 330.0, hist.to_json()), self.now)
+        first, second, third = self.sampler.drain()
+        self.assertIsNone(first["dwell_hist"])
+        visits = DwellHistogram.from_json(second["dwell_hist"])
+        self.assertEqual(visits.total, 1) # Only the visit that ended since
+        self.assertGreater(visits.quantile(0.5), 250)
+        self.assertIsNone(third["dwell_hist"])
+
+    def test_requeue_keeps_order(self):
+        self.sampler.sample(live(1, 0, 0, 0.0), self.now)
+        rows = self.sampler.drain()
+        self.sampler.sample(live(2, 1, 0, 0.0), self.now)
+        self.sampler.requeue(rows)
+        self.assertEqual([r["count"] for r in self.sampler.drain()], [1, 2])
+
+class TestWriteBatch(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_one_transaction(self):
+        sampler = ZoneSampler()
+        now = datetime.datetime(2024, 3, 10, 12, 0, 0)
+        for i in range(5):
+            sampler.sample(live(i, i, 0, 0.0), now + datetime.timedelta(seconds=i))
+        write_batch(sampler.drain(), 4, now, [{"zone_name": "C1: Entrance", "message": "Overcrowded"}])
+        self.assertEqual(ZoneSample.query.count(), 5)
+        self.assertEqual(ZoneSample.query.order_by(ZoneSample.timestamp.desc()).first().count, 4)
+        self.assertEqual(AnalyticsData.query.count(), 1)
+        self.assertEqual(Alert.query.count(), 1)
+
+    def test_zone_time_index(self):
+        names = {i.name for i in ZoneSample.__table__.indexes}
+        self.assertIn('ix_zone_sample_zone_time_count', names)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,168 @@
+import sys
+import os
+import contextlib
+import io
+import unittest
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from counting import Zone, ZoneSet
+
+W, H = 640, 360
+
+def make_zones():
+    rng = np.random.default_rng(3)
+    zones = []
+    for i in range(12):
+        x, y = int(rng.integers(0, W - 100)), int(rng.integers(0, H - 80))
+        zones.append(Zone(f"R{i}", (x, y, x + int(rng.integers(30, 250)), y + int(rng.integers(30, 200))), (0, 255, 0)))
+    zones.append(Zone("Tri", [[0, 0], [300, 0], [0, 300]], (0, 255, 0)))
+    zones.append(Zone("Quad", [[100, 50], [400, 80], [380, 300], [120, 250]], (0, 255, 0)))
+    return zones
+
+def state(zones):
+    return [(z.total_count, z.active_ids, z.counted_ids, z.left_at, z.exit_count,
+             z.provisional_inside, set(z.entry_times)) for z in zones]
+
+def frames(seed, count=400, tracks=40):
+    """Per frame: [(gid, (x, y))]; IDs wander in and out, some tracks vanish, some
+    are provisional (negative), occasionally two tracks share a global ID"""
+    rng = np.random.default_rng(seed)
+    pos = {gid: rng.uniform(0, [W, H]) for gid in range(1, tracks + 1)}
+    for _ in range(count):
+        frame = []
+        for gid, p in pos.items():
+            pos[gid] = np.clip(p + rng.normal(0, 15, 2), -30, [W + 30, H + 30])
+            if rng.random() < 0.15:
+                continue # Not visible this frame
+            shown = -gid if rng.random() < 0.1 else gid
+            frame.append((shown, (int(pos[gid][0]), int(pos[gid][1]))))
+        if frame and rng.random() < 0.2:
+            frame.append((frame[0][0], (int(rng.integers(0, W)), int(rng.integers(0, H)))))
+        yield frame
+
+class TestZoneSetEquivalence(unittest.TestCase):
+    def run_both(self, seed):
+        reference, vectorised = make_zones(), make_zones()
+        zone_set = ZoneSet(vectorised)
+        provisional_prev = set()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i, frame in enumerate(frames(seed)):
+                now = i * 0.1 # 10 fps: hysteresis spans ~30 frames
+                gids = [g for g, _ in frame]
+                points = [p for _, p in frame]
+                present = {g for g in gids if g >= 0}
+                # Provisional IDs of the previous frame resolved now
+                resolved = [(-g, g) for g in present if -g in provisional_prev]
+
+                for pid, gid in resolved:
+                    for zone in reference:
+                        zone.resolve_provisional(pid, gid, now)
+                for zone in reference:
+                    zone.expire(now)
+                for gid, c in frame:
+                    for zone in reference:
+                        zone.count_entry(gid, c, now=now)
+                for zone in reference:
+                    for gid in list(zone.active_ids):
+                        if gid >= 0 and gid not in present:
+                            zone.remove_id(gid, now)
+
+                for pid, gid in resolved:
+                    zone_set.resolve_provisional(pid, gid, now)
+                zone_set.update(gids, points, now=now)
+                zone_set.remove_missing(present, now)
+
+                provisional_prev = {g for g in gids if g < 0}
+                self.assertEqual(state(vectorised), state(reference))
+        return reference
+
+    def test_identical_to_count_entry_loop(self):
+        for seed in range(3):
+            reference = self.run_both(seed)
+            self.assertGreater(sum(z.total_count for z in reference), 0)
+            self.assertGreater(sum(z.exit_count for z in reference), 0)
+
+    def test_membership_matches_is_inside(self):
+        zones = make_zones()
+        zone_set = ZoneSet(zones)
+        rng = np.random.default_rng(5)
+        points = [(int(x), int(y)) for x, y in zip(rng.integers(-20, W + 20, 3000), rng.integers(-20, H + 20, 3000))]
+        expected = [[z.is_inside(p) for z in zones] for p in points]
+        self.assertEqual(zone_set.membership(points).tolist(), expected)
+
+    def test_existing_zone_state_is_picked_up(self):
+        zones = make_zones()
+        zone = zones[0]
+        x1, y1, x2, y2 = zone.coords
+        with contextlib.redirect_stdout(io.StringIO()):
+            zone.count_entry(7, (x1 + 1, y1 + 1))
+            zone_set = ZoneSet(zones)
+            zone_set.update([7], [(x1 + 1, y1 + 1)]) # Already inside: no second entry
+        self.assertEqual(zone.total_count, 1)
+        self.assertEqual(zone.count, 1)
+
+    def test_empty_frame(self):
+        zone_set = ZoneSet(make_zones())
+        zone_set.update([], np.empty((0, 2)))
+        zone_set.remove_missing(set())
+        ZoneSet([]).update([1], [(1, 1)])
+
+class TestZoneStateBounded(unittest.TestCase):
+    """Hours of traffic with every visitor a new ID: state must not grow"""
+    def churn(self, count=6000, tracks=30):
+        # Each track is replaced by a fresh global ID every ~10 s (and sometimes
+        # vanishes without leaving the zone first)
+        rng = np.random.default_rng(11)
+        gids = np.arange(1, tracks + 1)
+        pos = rng.uniform(0, [W, H], (tracks, 2))
+        next_gid = tracks + 1
+        for i in range(count):
+            replaced = rng.random(tracks) < 0.01
+            gids[replaced] = np.arange(next_gid, next_gid + replaced.sum())
+            next_gid += int(replaced.sum())
+            pos[replaced] = rng.uniform(0, [W, H], (int(replaced.sum()), 2))
+            pos = np.clip(pos + rng.normal(0, 15, pos.shape), 0, [W - 1, H - 1])
+            yield i * 0.1, gids.tolist(), pos.astype(int)
+
+    def sizes(self, zones):
+        return max(len(z.counted_ids) + len(z.left_at) + len(z.entry_times) for z in zones)
+
+    def test_zone_set(self):
+        zones = make_zones()
+        zone_set = ZoneSet(zones)
+        rows, sizes = [], []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for now, gids, points in self.churn():
+                zone_set.update(gids, points, now=now)
+                zone_set.remove_missing(set(gids), now)
+                rows.append(len(zone_set.rows))
+                sizes.append(self.sizes(zones))
+        self.assertGreater(sum(z.total_count for z in zones), 1000) # Thousands of IDs went through
+        # Active (30) + departed within the window (~1 per 0.3 s): no growth
+        self.assertLess(max(rows), 100)
+        self.assertEqual(len(zone_set.rows) + len(zone_set.free), zone_set.n_rows)
+        self.assertLessEqual(max(rows[len(rows) // 2:]), max(rows[:len(rows) // 2]) + 10)
+        self.assertLessEqual(max(sizes[len(sizes) // 2:]), max(sizes[:len(sizes) // 2]) + 10)
+
+    def test_scalar_zone(self):
+        zones = make_zones()
+        sizes = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for now, gids, points in self.churn():
+                for gid, c in zip(gids, points.tolist()):
+                    for zone in zones:
+                        zone.count_entry(gid, c, now=now)
+                for zone in zones:
+                    for gid in list(zone.active_ids):
+                        if gid not in gids:
+                            zone.remove_id(gid, now)
+                sizes.append(self.sizes(zones))
+        self.assertLess(max(sizes), 150)
+        self.assertLessEqual(max(sizes[len(sizes) // 2:]), max(sizes[:len(sizes) // 2]) + 10)
+
+if __name__ == '__main__':
+    unittest.main()
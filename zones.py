@@ -8,6 +8,7 @@ import csv
 import os
 import cv2
 import json
+import numpy as np
 
 os.makedirs("zones", exist_ok=True)
 
@@ -19,6 +20,7 @@ class ZoneManager:
     def __init__(self, filepath="zones/zones.json"):
         self.filepath = filepath
         self.zones = []
+        self.tripwires = [] # Counting lines, stored in the same file: {"id", "line": [[x1,y1],[x2,y2]]}
         self.drawing = False
         self.ix, self.iy = -1, -1
         self.current_rect_coords = None
@@ -31,6 +33,7 @@ class ZoneManager:
 
     def load_zones(self):
         self.zones.clear()
+        self.tripwires.clear()
         if not os.path.exists(self.filepath):
             return
         with open(self.filepath, 'r') as f:
@@ -40,24 +43,41 @@ class ZoneManager:
                     if "coords" in z:
                         self.zones.append({
                             "id": z["id"],
+                            # [x1,y1,x2,y2] rectangle or [[x,y], ...] polygon
                             "coords": tuple(z["coords"]),
                             "threshold": z.get("threshold", 10)
                         })
+                    elif "line" in z:
+                        self.tripwires.append({
+                            "id": z["id"],
+                            "line": [list(p) for p in z["line"]]
+                        })
             except json.JSONDecodeError:
                 pass
 
     def save_zones(self):
         with open(self.filepath, 'w') as f:
-            json.dump(self.zones, f, indent=4)
+            json.dump(self.zones + self.tripwires, f, indent=4)
 
     def draw_existing_zones(self, frame):
         for i,z in enumerate(self.zones):
-            x1,y1,x2,y2 = z["coords"]
-            cv2.rectangle(frame,(x1,y1),(x2,y2),
-                          ZONE_COLORS[i%5],2)
+            if len(z["coords"]) and isinstance(z["coords"][0], (list, tuple)): # Polygon
+                pts = np.asarray(z["coords"], dtype=np.int32)
+                cv2.polylines(frame,[pts],True,ZONE_COLORS[i%5],2)
+                x1,y1 = int(pts[:,0].min()), int(pts[:,1].min())
+            else:
+                x1,y1,x2,y2 = z["coords"]
+                cv2.rectangle(frame,(x1,y1),(x2,y2),
+                              ZONE_COLORS[i%5],2)
             cv2.putText(frame,z["id"],(x1,y1-8),
                         cv2.FONT_HERSHEY_SIMPLEX,0.6,
                         ZONE_COLORS[i%5],2)
+        for t in self.tripwires:
+            (x1,y1),(x2,y2) = t["line"]
+            cv2.line(frame,(x1,y1),(x2,y2),(0,0,255),2)
+            cv2.putText(frame,t["id"],(x1,y1-8),
+                        cv2.FONT_HERSHEY_SIMPLEX,0.6,
+                        (0,0,255),2)
 
     def draw_preview(self, frame):
         if self.current_rect_coords: